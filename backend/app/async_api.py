@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date
+from typing import Optional, Union
+from . import async_crud, schemas, auth
+from .database import get_async_db
+
+# Async counterparts of the core transaction endpoints in main.py, served from
+# the asyncio engine. main.py mounts this router ahead of its own routes when
+# ASYNC_DATABASE is enabled, so these take over the same paths. Id routes use the
+# :int convertor so they don't swallow /transactions/batch.
+router = APIRouter()
+
+@router.get("/users/me", response_model=schemas.User)
+async def read_users_me(current_user: schemas.User = Depends(auth.get_current_user_async)):
+    return current_user
+
+@router.post("/transactions/", response_model=schemas.TransactionWrite)
+async def create_transaction(
+    transaction: schemas.TransactionCreate,
+    db=Depends(get_async_db),
+    current_user: schemas.User = Depends(auth.get_current_user_async)
+):
+    return await async_crud.create_user_transaction(db, transaction=transaction, user_id=current_user.id)
+
+@router.get("/transactions/", response_model=Union[list[schemas.Transaction], schemas.TransactionPage])
+async def read_transactions(
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db=Depends(get_async_db),
+    current_user: schemas.User = Depends(auth.get_current_user_async)
+):
+    if cursor is not None:
+        try:
+            items, next_cursor = await async_crud.get_transactions_page(
+                db, user_id=current_user.id, cursor=cursor, limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
+    return await async_crud.get_transactions(db, user_id=current_user.id, skip=skip, limit=limit)
+
+@router.put("/transactions/{transaction_id:int}", response_model=schemas.TransactionWrite)
+async def update_transaction(
+    transaction_id: int,
+    transaction: schemas.TransactionCreate,
+    db=Depends(get_async_db),
+    current_user: schemas.User = Depends(auth.get_current_user_async)
+):
+    db_transaction = await async_crud.get_transaction(db, transaction_id=transaction_id)
+    if db_transaction is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    if db_transaction.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to update this transaction")
+    return await async_crud.update_transaction(db, transaction_id=transaction_id, transaction=transaction)
+
+@router.delete("/transactions/{transaction_id:int}", response_model=schemas.Transaction)
+async def delete_transaction(
+    transaction_id: int,
+    db=Depends(get_async_db),
+    current_user: schemas.User = Depends(auth.get_current_user_async)
+):
+    db_transaction = await async_crud.get_transaction(db, transaction_id=transaction_id)
+    if db_transaction is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    if db_transaction.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to delete this transaction")
+    return await async_crud.delete_transaction(db, transaction_id=transaction_id)
+
+@router.get("/transactions/summary", response_model=schemas.TransactionSummary)
+async def get_transaction_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    db=Depends(get_async_db),
+    current_user: schemas.User = Depends(auth.get_current_user_async)
+):
+    return await async_crud.get_transaction_summary(
+        db,
+        user_id=current_user.id,
+        start_date=start_date,
+        end_date=end_date,
+        category=category
+    )
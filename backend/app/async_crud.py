@@ -0,0 +1,62 @@
+from typing import TYPE_CHECKING
+from sqlalchemy import select, tuple_
+from . import crud, models, schemas
+from datetime import date
+
+if TYPE_CHECKING:  # the asyncio extension needs greenlet, only required in async mode
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# The hot per-request reads are native asyncio queries. Writes and aggregates go
+# through the sync crud functions via run_sync (still non-blocking: the sync code
+# runs in a greenlet on the async connection), so their logic lives in one place.
+
+async def get_user_by_username(db: "AsyncSession", username: str):
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    return result.scalars().first()
+
+async def get_transaction(db: "AsyncSession", transaction_id: int):
+    return await db.get(models.Transaction, transaction_id)
+
+async def get_transactions(db: "AsyncSession", user_id: int, skip: int = 0, limit: int = 100):
+    result = await db.execute(
+        select(models.Transaction)
+        .where(models.Transaction.user_id == user_id)
+        .order_by(models.Transaction.date.desc(), models.Transaction.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+async def get_transactions_page(db: "AsyncSession", user_id: int, cursor: str = None, limit: int = 100):
+    query = select(models.Transaction).where(models.Transaction.user_id == user_id)
+    if cursor:
+        last_date, last_id = crud.decode_cursor(cursor)
+        query = query.where(
+            tuple_(models.Transaction.date, models.Transaction.id) < tuple_(last_date, last_id)
+        )
+    result = await db.execute(
+        query.order_by(models.Transaction.date.desc(), models.Transaction.id.desc()).limit(limit + 1)
+    )
+    rows = result.scalars().all()
+    next_cursor = crud.encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+async def get_transaction_summary(
+    db: "AsyncSession",
+    user_id: int,
+    start_date: date = None,
+    end_date: date = None,
+    category: str = None
+):
+    return await db.run_sync(lambda session: crud.get_transaction_summary(
+        session, user_id, start_date=start_date, end_date=end_date, category=category
+    ))
+
+async def create_user_transaction(db: "AsyncSession", transaction: schemas.TransactionCreate, user_id: int):
+    return await db.run_sync(lambda session: crud.create_user_transaction(session, transaction, user_id))
+
+async def update_transaction(db: "AsyncSession", transaction_id: int, transaction: schemas.TransactionCreate):
+    return await db.run_sync(lambda session: crud.update_transaction(session, transaction_id, transaction))
+
+async def delete_transaction(db: "AsyncSession", transaction_id: int):
+    return await db.run_sync(lambda session: crud.delete_transaction(session, transaction_id))
@@ -1,20 +1,100 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from . import schemas, crud
+from . import schemas, crud, async_crud, models
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
-from .database import get_db
+from .database import get_read_db, get_async_db
 
 SECRET_KEY = "your-secret-key"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Validated tokens are remembered so authenticated requests skip the user lookup
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+# When enabled, the user id/email carried in the token claims are trusted as-is
+# and no lookup is made at all (changes to the user show up on the next login)
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv("AUTH_TRUST_TOKEN_CLAIMS", "false").lower() in ("1", "true", "yes")
+
+# bcrypt cost factor for new hashes; stored hashes below it are upgraded on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt holds a CPU for ~0.25s at the default cost, so it runs on its own small
+# pool instead of the event loop (or the shared threadpool used by sync endpoints)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS
+)
+
+password_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+class TokenCache:
+    # Bounded LRU of token -> schemas.User; entries also expire after ttl seconds
+    # or when the token itself expires, whichever comes first
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return user
+
+    def set(self, token: str, user: schemas.User, token_expires_at: float):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (min(time.time() + self.ttl, token_expires_at), user)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            stale = [token for token, (_, user) in self._entries.items() if user.id == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+token_cache = TokenCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    token_cache.invalidate_user(target.id)
+
 def verify_password(plain_password, hashed_password):
     try:
         return pwd_context.verify(plain_password, hashed_password)
@@ -30,11 +110,29 @@ def authenticate_user(db: Session, username: str, password: str):
     if not user:
         print(f"User not found: {username}")
         return False
-    if not verify_password(password, user.hashed_password):
+    try:
+        verified, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+    except Exception as e:
+        print(f"Password verification error: {e}")
+        return False
+    if not verified:
         print(f"Invalid password for user: {username}")
         return False
+    if new_hash:
+        # Hash was made with a deprecated scheme or a lower cost; upgrade it now
+        # while we have the plain password
+        user.hashed_password = new_hash
+        db.commit()
     return user
 
+async def authenticate_user_async(db: Session, username: str, password: str):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_hash_executor, authenticate_user, db, username, password)
+
+async def get_password_hash_async(password):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_hash_executor, get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     if expires_delta:
@@ -45,23 +143,57 @@ def create_access_token(data: dict, expires_delta: timedelta = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
+            raise _credentials_exception()
         token_data = schemas.TokenData(username=username)
     except JWTError:
-        raise credentials_exception
-    
-    user = crud.get_user_by_username(db, username=token_data.username)
-    if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return payload, token_data
+
+def _user_from_claims(payload: dict, token_data: schemas.TokenData):
+    if AUTH_TRUST_TOKEN_CLAIMS and "uid" in payload:
+        return schemas.User(id=payload["uid"], username=token_data.username, email=payload.get("email", ""))
+    return None
+
+def _remember(token: str, payload: dict, db_user):
+    if db_user is None:
+        raise _credentials_exception()
+    user = schemas.User(id=db_user.id, username=db_user.username, email=db_user.email)
+    token_cache.set(token, user, payload.get("exp", time.time()))
     return user
 
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)):
+    # Cache hits return straight from the event loop; the sync session lookup on a
+    # miss runs on the threadpool so it can't block other requests
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
+    payload, token_data = _decode_token(token)
+    user = _user_from_claims(payload, token_data)
+    if user is not None:
+        return _remember(token, payload, user)
+    db_user = await run_in_threadpool(crud.get_user_by_username, db, token_data.username)
+    return _remember(token, payload, db_user)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db=Depends(get_async_db)):
+    cached_user = token_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
+    payload, token_data = _decode_token(token)
+    user = _user_from_claims(payload, token_data)
+    if user is not None:
+        return _remember(token, payload, user)
+    return _remember(token, payload, await async_crud.get_user_by_username(db, username=token_data.username))
@@ -0,0 +1,63 @@
+from datetime import date
+from sqlalchemy import and_, select
+from . import models, rollups
+
+# A budget caps a category's expenses per calendar month. Spend is not summed from
+# transactions: it is the expense bucket of monthly_rollups for that user, month and
+# category, which every crud write path already keeps current. A status is one
+# primary-key lookup per budget, and a write can tell from its own rollup deltas
+# whether it pushed a budget past its alert level or its limit.
+
+LEVELS = ("ok", "warning", "exceeded")
+
+def level(spent, limit, alert_percent: int):
+    if spent > limit:
+        return "exceeded"
+    if spent * 100 >= limit * alert_percent:
+        return "warning"
+    return "ok"
+
+def _budget_spend(user_id: int, month: str, categories=None):
+    # Each budget with the expenses of its category in month (a negative total), 0 if none
+    rollup = models.MonthlyRollup
+    query = select(models.Budget, rollup.total).outerjoin(rollup, and_(
+        rollup.user_id == models.Budget.user_id,
+        rollup.month == month,
+        rollup.transaction_type == "expense",
+        rollup.category == models.Budget.category
+    )).where(models.Budget.user_id == user_id)
+    if categories is not None:
+        query = query.where(models.Budget.category.in_(categories))
+    return query.order_by(models.Budget.category)
+
+def status(budget: models.Budget, month: str, total):
+    spent = -total if total is not None else 0
+    return {
+        "category": budget.category,
+        "month": month,
+        "limit": budget.limit,
+        "spent": spent,
+        "remaining": budget.limit - spent,
+        "percent": round(float(spent * 100 / budget.limit), 1),
+        "status": level(spent, budget.limit, budget.alert_percent)
+    }
+
+def get_status(db, user_id: int, month: str = None):
+    month = month or rollups.month_key(date.today())
+    return [status(budget, month, total) for budget, total in db.execute(_budget_spend(user_id, month))]
+
+def check(db, deltas):
+    # Statuses of the budgets whose level this write raised, read after the deltas are
+    # applied (so spend includes the change) and compared with spend without them
+    touched = {}
+    for (user_id, month, transaction_type, category), (total, count) in deltas.items():
+        if transaction_type == "expense" and total < 0:
+            touched.setdefault((user_id, month), {})[category] = total
+    alerts = []
+    for (user_id, month), categories in touched.items():
+        for budget, total in db.execute(_budget_spend(user_id, month, list(categories))):
+            after = status(budget, month, total)
+            before = level(after["spent"] + categories[budget.category], budget.limit, budget.alert_percent)
+            if LEVELS.index(after["status"]) > LEVELS.index(before):
+                alerts.append(after)
+    return alerts
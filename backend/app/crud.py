@@ -1,6 +1,10 @@
+import base64
+import re
+from sqlalchemy import DateTime, Integer, bindparam, case, func, literal, literal_column, select, table, text, tuple_
 from sqlalchemy.orm import Session
-from . import models, schemas
-from datetime import datetime
+from . import budgets, health, models, money, rollups, rules, schemas, sync
+from datetime import date, datetime
+from decimal import Decimal
 from . import auth
 
 def get_user(db: Session, user_id: int):
@@ -12,9 +16,10 @@ def get_user_by_email(db: Session, email: str):
 def get_user_by_username(db: Session, username: str):
     return db.query(models.User).filter(models.User.username == username).first()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = auth.get_password_hash(user.password)
-    print(f"Creating user with hashed password: {hashed_password}")  # Debug print
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: str = None):
+    # The API hashes on auth's bounded pool first and passes the hash in
+    if hashed_password is None:
+        hashed_password = auth.get_password_hash(user.password)
     db_user = models.User(
         email=user.email, 
         username=user.username, 
@@ -26,45 +31,372 @@ def create_user(db: Session, user: schemas.UserCreate):
     return db_user
 
 def get_transactions(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Transaction).filter(models.Transaction.user_id == user_id).offset(skip).limit(limit).all()
+    return db.query(models.Transaction).filter(
+        models.Transaction.user_id == user_id
+    ).order_by(
+        models.Transaction.date.desc(), models.Transaction.id.desc()
+    ).offset(skip).limit(limit).all()
+
+def encode_cursor(transaction: models.Transaction):
+    raw = f"{transaction.date.isoformat()}|{transaction.id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return date.fromisoformat(raw_date), int(raw_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def get_transactions_page(db: Session, user_id: int, cursor: str = None, limit: int = 100):
+    # Keyset pagination: seek past the last (date, id) seen instead of using
+    # OFFSET, so every page costs the same no matter how deep the client is
+    query = db.query(models.Transaction).filter(models.Transaction.user_id == user_id)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Transaction.date, models.Transaction.id) < tuple_(last_date, last_id)
+        )
+    rows = query.order_by(
+        models.Transaction.date.desc(), models.Transaction.id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def transaction_values(transaction: schemas.TransactionCreate):
+    # Expenses are stored negative and income positive, whatever the client sent.
+    # Built field by field rather than with .dict() since bulk import calls this per row.
+    amount = abs(transaction.amount)
+    return {
+        'date': transaction.date,
+        'amount': -amount if transaction.transaction_type == 'expense' else amount,
+        'transaction_type': transaction.transaction_type,
+        'category': transaction.category,
+        'description': transaction.description
+    }
+
+def rollup_values(db_transaction: models.Transaction):
+    return {
+        'date': db_transaction.date,
+        'amount': db_transaction.amount,
+        'transaction_type': db_transaction.transaction_type,
+        'category': db_transaction.category
+    }
 
 def create_user_transaction(db: Session, transaction: schemas.TransactionCreate, user_id: int):
-    transaction_dict = transaction.dict()
-    if transaction_dict['transaction_type'] == 'expense':
-        transaction_dict['amount'] = -abs(transaction_dict['amount'])
-    else:
-        transaction_dict['amount'] = abs(transaction_dict['amount'])
-    
+    transaction_dict = transaction_values(transaction)
+    matcher = rules.matcher_for(db, user_id)
+    if matcher is not None:
+        matcher.apply(transaction_dict)
     db_transaction = models.Transaction(**transaction_dict, user_id=user_id)
     db.add(db_transaction)
+    deltas = rollups.new_deltas()
+    rollups.add_delta(deltas, user_id, transaction_dict)
+    rollups.apply_deltas(db, deltas)
+    alerts = budgets.check(db, deltas)
     db.commit()
     db.refresh(db_transaction)
+    db_transaction.budget_alerts = alerts
     return db_transaction
 
+def bulk_create_user_transactions(db: Session, transactions: list[schemas.TransactionCreate], user_id: int):
+    # One executemany INSERT and one commit for the whole chunk
+    rows = [dict(transaction_values(transaction), user_id=user_id) for transaction in transactions]
+    matcher = rules.matcher_for(db, user_id) if rows else None
+    if matcher is not None:
+        for row in rows:
+            matcher.apply(row)
+    if rows:
+        insert_transaction_rows(db, rows)
+        db.commit()
+    return len(rows)
+
+# amount bound as plain integer cents, converted for the whole chunk up front
+BULK_INSERT = models.Transaction.__table__.insert().values(amount=bindparam("amount", type_=Integer))
+
+# Indexes a whole chunk in one statement instead of one trigger run per row
+INDEX_NEW_TRANSACTIONS = text(
+    "INSERT INTO transactions_fts(rowid, description, user_id) "
+    "SELECT id, description, user_id FROM transactions WHERE id > :last_id"
+)
+
+def insert_transaction_rows(db: Session, rows: list[dict]):
+    # The shared bulk insert path: one executemany INSERT plus the matching rollup
+    # deltas. Rows carry their own user_id; does not commit.
+    deltas = rollups.new_deltas()
+    for row in rows:
+        rollups.add_delta(deltas, row["user_id"], row)
+    # The rollup upsert goes first: as DML it opens the transaction (and takes the write
+    # lock), so the FTS insert trigger is dropped and recreated inside it and other
+    # connections never see it missing. New ids are above the max id read under the lock.
+    rollups.apply_deltas(db, deltas)
+    db.execute(text("DROP TRIGGER IF EXISTS transactions_fts_ai"))
+    last_id = db.query(func.coalesce(func.max(models.Transaction.id), 0)).scalar()
+    cents = money.to_cents_many(row["amount"] for row in rows)
+    seq = sync.sequence(db)
+    db.execute(BULK_INSERT, [dict(row, amount=amount, change_seq=seq) for row, amount in zip(rows, cents)])
+    db.execute(text(models.TRANSACTIONS_FTS_INSERT_TRIGGER))
+    db.execute(INDEX_NEW_TRANSACTIONS, {"last_id": last_id})
+
 def update_transaction(db: Session, transaction_id: int, transaction: schemas.TransactionCreate):
     db_transaction = db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
     if db_transaction:
-        transaction_dict = transaction.dict()
-        if transaction_dict['transaction_type'] == 'expense':
-            transaction_dict['amount'] = -abs(transaction_dict['amount'])
-        else:
-            transaction_dict['amount'] = abs(transaction_dict['amount'])
-        
+        transaction_dict = transaction_values(transaction)
+        # Take the old row out of its bucket and add the new one, which may be a different bucket
+        deltas = rollups.new_deltas()
+        rollups.add_delta(deltas, db_transaction.user_id, rollup_values(db_transaction), sign=-1)
+        rollups.add_delta(deltas, db_transaction.user_id, transaction_dict)
         for key, value in transaction_dict.items():
             setattr(db_transaction, key, value)
+        rollups.apply_deltas(db, deltas)
+        alerts = budgets.check(db, deltas)
         db.commit()
         db.refresh(db_transaction)
+        db_transaction.budget_alerts = alerts
     return db_transaction
 
 def delete_transaction(db: Session, transaction_id: int):
     db_transaction = db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
     if db_transaction:
         deleted_transaction = db_transaction  # Store the transaction before deletion
+        deltas = rollups.new_deltas()
+        rollups.add_delta(deltas, db_transaction.user_id, rollup_values(db_transaction), sign=-1)
+        db.merge(models.DeletedTransaction(
+            id=db_transaction.id, user_id=db_transaction.user_id, deleted_at=datetime.utcnow()
+        ))
         db.delete(db_transaction)
+        rollups.apply_deltas(db, deltas)
         db.commit()
         return deleted_transaction  # Return the deleted transaction
     return None
 
+def batch_conditions(
+    user_id: int,
+    ids: list[int] = None,
+    category: str = None,
+    transaction_type: str = None,
+    start_date: date = None,
+    end_date: date = None
+):
+    # The rows a batch edit applies to. Ownership is part of the WHERE clause, so
+    # ids belonging to someone else simply don't match instead of being checked one by one.
+    # At least one selector is required so a bare request can't touch the whole ledger.
+    if ids is None and category is None and transaction_type is None and start_date is None and end_date is None:
+        raise ValueError("Select transactions by ids or by a filter")
+    conditions = [models.Transaction.user_id == user_id]
+    if ids is not None:
+        conditions.append(models.Transaction.id.in_(ids))
+    if category is not None:
+        conditions.append(models.Transaction.category == category)
+    if transaction_type is not None:
+        if transaction_type not in ("income", "expense"):
+            raise ValueError(f"Unsupported transaction type: {transaction_type}")
+        conditions.append(models.Transaction.transaction_type == transaction_type)
+    if start_date is not None:
+        conditions.append(models.Transaction.date >= start_date)
+    if end_date is not None:
+        conditions.append(models.Transaction.date <= end_date)
+    return conditions
+
+def batch_update_transactions(db: Session, user_id: int, changes: dict, **selection):
+    # One UPDATE for every selected row. The rollup buckets are moved as a whole
+    # from one grouped SELECT taken beforehand, since the new values are known.
+    conditions = batch_conditions(user_id, **selection)
+    if not changes:
+        raise ValueError("Nothing to update")
+    buckets = rollups.bucket_totals(db, conditions)
+    deltas = rollups.new_deltas()
+    for owner, month, transaction_type, category, total, count in buckets:
+        rollups.add_bucket(deltas, (owner, month, transaction_type, category), -total, -count)
+        new_month = rollups.month_key(changes["date"]) if "date" in changes else month
+        new_category = changes.get("category", category)
+        rollups.add_bucket(deltas, (owner, new_month, transaction_type, new_category), total, count)
+    result = db.execute(
+        models.Transaction.__table__.update().where(*conditions).values(
+            **changes, updated_at=datetime.utcnow(), change_seq=sync.sequence(db)
+        )
+    )
+    rollups.apply_deltas(db, deltas)
+    alerts = budgets.check(db, deltas)
+    db.commit()
+    return {"affected": result.rowcount, "budget_alerts": alerts}
+
+def batch_delete_transactions(db: Session, user_id: int, **selection):
+    # Tombstones are written with INSERT ... SELECT over the same WHERE clause, then
+    # one DELETE removes the rows; the FTS triggers keep the search index in step
+    conditions = batch_conditions(user_id, **selection)
+    buckets = rollups.bucket_totals(db, conditions)
+    deltas = rollups.new_deltas()
+    for owner, month, transaction_type, category, total, count in buckets:
+        rollups.add_bucket(deltas, (owner, month, transaction_type, category), -total, -count)
+    tombstones = select(
+        models.Transaction.id, models.Transaction.user_id, literal(datetime.utcnow(), DateTime),
+        literal(sync.sequence(db), Integer)
+    ).where(*conditions)
+    db.execute(models.DeletedTransaction.__table__.insert().prefix_with("OR REPLACE").from_select(
+        ["id", "user_id", "deleted_at", "change_seq"], tombstones
+    ))
+    result = db.execute(models.Transaction.__table__.delete().where(*conditions))
+    rollups.apply_deltas(db, deltas)
+    db.commit()
+    return result.rowcount
+
+def get_rules(db: Session, user_id: int):
+    return db.query(models.CategoryRule).filter(models.CategoryRule.user_id == user_id).order_by(
+        models.CategoryRule.priority.desc(), models.CategoryRule.id
+    ).all()
+
+def create_rule(db: Session, rule: schemas.CategoryRuleCreate, user_id: int):
+    db_rule = models.CategoryRule(**rule.dict(), user_id=user_id)
+    db.add(db_rule)
+    db.commit()
+    db.refresh(db_rule)
+    return db_rule
+
+def delete_rule(db: Session, user_id: int, rule_id: int):
+    db_rule = db.query(models.CategoryRule).filter(
+        models.CategoryRule.id == rule_id, models.CategoryRule.user_id == user_id
+    ).first()
+    if db_rule:
+        db.delete(db_rule)
+        db.commit()
+    return db_rule
+
+def apply_rules(db: Session, user_id: int, batch_size: int = 1000, **selection):
+    # Re-run the rules over existing rows batch_size at a time (keyset on id). Only
+    # rows whose category changes are written: one executemany UPDATE, one rollup
+    # upsert and one commit per batch, so the write lock is never held for long.
+    matcher = rules.matcher_for(db, user_id)
+    if matcher is None:
+        return {"affected": 0, "budget_alerts": []}
+    if any(value is not None for value in selection.values()):
+        conditions = batch_conditions(user_id, **selection)
+    else:
+        conditions = [models.Transaction.user_id == user_id]
+    table = models.Transaction.__table__
+    statement = table.update().where(table.c.id == bindparam("row_id")).values(
+        category=bindparam("new_category"), updated_at=bindparam("stamp"), change_seq=bindparam("seq")
+    )
+
+    affected = 0
+    # Latest alert per budget and month: a later batch can raise the same budget again
+    alerts = {}
+    last_id = 0
+    while True:
+        rows = db.query(
+            models.Transaction.id,
+            models.Transaction.date,
+            models.Transaction.amount,
+            models.Transaction.transaction_type,
+            models.Transaction.category,
+            models.Transaction.description
+        ).filter(*conditions, models.Transaction.id > last_id).order_by(models.Transaction.id).limit(batch_size).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        stamp = datetime.utcnow()
+        updates = []
+        deltas = rollups.new_deltas()
+        for row in rows:
+            values = row._asdict()
+            old_category = values["category"]
+            if matcher.apply(values):
+                rollups.add_delta(deltas, user_id, dict(values, category=old_category), sign=-1)
+                rollups.add_delta(deltas, user_id, values)
+                updates.append({"row_id": row.id, "new_category": values["category"], "stamp": stamp})
+        if updates:
+            seq = sync.sequence(db)
+            db.execute(statement, [dict(update, seq=seq) for update in updates])
+            rollups.apply_deltas(db, deltas)
+            for alert in budgets.check(db, deltas):
+                alerts[alert["category"], alert["month"]] = alert
+            db.commit()
+            affected += len(updates)
+    return {"affected": affected, "budget_alerts": list(alerts.values())}
+
+def get_budgets(db: Session, user_id: int):
+    return db.query(models.Budget).filter(models.Budget.user_id == user_id).order_by(models.Budget.category).all()
+
+def set_budget(db: Session, budget: schemas.BudgetCreate, user_id: int):
+    # One budget per category: setting it again replaces the limit
+    db_budget = db.query(models.Budget).filter(
+        models.Budget.user_id == user_id, models.Budget.category == budget.category
+    ).first()
+    if db_budget is None:
+        db_budget = models.Budget(user_id=user_id, category=budget.category)
+        db.add(db_budget)
+    db_budget.limit = budget.limit
+    db_budget.alert_percent = budget.alert_percent
+    db.commit()
+    db.refresh(db_budget)
+    return db_budget
+
+def delete_budget(db: Session, user_id: int, budget_id: int):
+    db_budget = db.query(models.Budget).filter(
+        models.Budget.id == budget_id, models.Budget.user_id == user_id
+    ).first()
+    if db_budget:
+        db.delete(db_budget)
+        db.commit()
+    return db_budget
+
+def get_budget_status(db: Session, user_id: int, month: str = None):
+    # Normalized to the rollup's YYYY-MM so "2024-3" finds the same buckets
+    if month is not None:
+        month = rollups.month_key(month_range(month)[0])
+    return budgets.get_status(db, user_id, month)
+
+def get_recurring_transactions(db: Session, user_id: int):
+    return db.query(models.RecurringTransaction).filter(
+        models.RecurringTransaction.user_id == user_id
+    ).order_by(models.RecurringTransaction.id).all()
+
+def create_recurring_transaction(db: Session, template: schemas.RecurringTransactionCreate, user_id: int):
+    values = template.dict()
+    if template.transaction_type == "expense":
+        values["amount"] = -values["amount"]
+    db_template = models.RecurringTransaction(**values, user_id=user_id, occurrences=0, next_date=template.start_date)
+    db.add(db_template)
+    db.commit()
+    db.refresh(db_template)
+    return db_template
+
+def delete_recurring_transaction(db: Session, user_id: int, template_id: int):
+    # Transactions already posted from the template are kept
+    db_template = db.query(models.RecurringTransaction).filter(
+        models.RecurringTransaction.id == template_id, models.RecurringTransaction.user_id == user_id
+    ).first()
+    if db_template:
+        db.delete(db_template)
+        db.commit()
+    return db_template
+
+def get_changes(db: Session, user_id: int, since: int = None):
+    # Rows written and ids deleted after change sequence `since` (everything live
+    # when None), with the watermark to pass back next time. The watermark is read
+    # first: a write committed between it and the row queries is returned now and
+    # again next time, never skipped; clients apply deletions, then upsert by id.
+    watermark = sync.last_sequence(db)
+    changed = db.query(models.Transaction).filter(models.Transaction.user_id == user_id)
+    if since is not None:
+        changed = changed.filter(models.Transaction.change_seq > since)
+    changed = changed.order_by(models.Transaction.change_seq, models.Transaction.id).all()
+
+    deleted = []
+    if since is not None:
+        deleted = db.query(models.DeletedTransaction.id).filter(
+            models.DeletedTransaction.user_id == user_id,
+            models.DeletedTransaction.change_seq > since
+        ).order_by(models.DeletedTransaction.change_seq, models.DeletedTransaction.id).all()
+
+    return {
+        "changed": changed,
+        "deleted": [d.id for d in deleted],
+        "watermark": max(watermark, since or 0)
+    }
+
 def get_transactions_by_date_range(db: Session, user_id: int, start_date: datetime, end_date: datetime):
     return db.query(models.Transaction).filter(
         models.Transaction.user_id == user_id,
@@ -78,21 +410,287 @@ def get_transactions_by_category(db: Session, user_id: int, category: str):
         models.Transaction.category == category
     ).all()
 
-def get_transactions_by_amount_range(db: Session, user_id: int, min_amount: float, max_amount: float):
+def amount_range_filter(min_amount: Decimal = None, max_amount: Decimal = None):
+    # Bounds apply to the amount as clients see it (a magnitude): income is stored
+    # positive and expenses negative, so each type gets its own, index-friendly range.
+    # Amounts are whole cents, so the bounds are rounded inwards to cents.
+    income = models.Transaction.transaction_type == "income"
+    expense = models.Transaction.transaction_type == "expense"
+    if min_amount is not None:
+        min_amount = money.to_decimal(min_amount, money.ROUND_CEILING)
+        income = income & (models.Transaction.amount >= min_amount)
+        expense = expense & (models.Transaction.amount <= -min_amount)
+    if max_amount is not None:
+        max_amount = money.to_decimal(max_amount, money.ROUND_FLOOR)
+        income = income & (models.Transaction.amount <= max_amount)
+        expense = expense & (models.Transaction.amount >= -max_amount)
+    return income | expense
+
+def get_transactions_by_amount_range(db: Session, user_id: int, min_amount: Decimal, max_amount: Decimal):
     return db.query(models.Transaction).filter(
         models.Transaction.user_id == user_id,
-        (
-            # For income transactions (positive amounts)
-            ((models.Transaction.transaction_type == "income") & 
-             (models.Transaction.amount >= min_amount) & 
-             (models.Transaction.amount <= max_amount)) |
-            # For expense transactions (negative amounts)
-            ((models.Transaction.transaction_type == "expense") & 
-             (models.Transaction.amount <= -min_amount) & 
-             (models.Transaction.amount >= -max_amount))
-        )
+        amount_range_filter(min_amount, max_amount)
     ).all()
 
+def fulltext_query(text: str, user_id: int):
+    # FTS5 MATCH expression: every word of the search text as a quoted prefix
+    # term ("amaz"* matches "Amazon"), all required, within one user's rows
+    terms = " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+    if not terms:
+        return None
+    return f'user_id : "{user_id}" AND description : ({terms})'
+
+def encode_offset_cursor(offset: int):
+    return base64.urlsafe_b64encode(f"offset|{offset}".encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        kind, raw_offset = base64.urlsafe_b64decode(padded).decode().split("|")
+        if kind != "offset":
+            raise ValueError(kind)
+        return int(raw_offset)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def search_transactions(
+    db: Session,
+    user_id: int,
+    start_date: date = None,
+    end_date: date = None,
+    categories: list[str] = None,
+    transaction_type: str = None,
+    min_amount: Decimal = None,
+    max_amount: Decimal = None,
+    description: str = None,
+    q: str = None,
+    cursor: str = None,
+    limit: int = 100
+):
+    # Every filter is optional and they all compose into one WHERE clause; results
+    # are keyset-paginated like get_transactions_page and come with the total match count.
+    # A full-text query (q) instead ranks rows by bm25 relevance and pages by offset.
+    conditions = [models.Transaction.user_id == user_id]
+    if start_date is not None:
+        conditions.append(models.Transaction.date >= start_date)
+    if end_date is not None:
+        conditions.append(models.Transaction.date <= end_date)
+    if categories:
+        conditions.append(models.Transaction.category.in_(categories))
+    if transaction_type is not None:
+        if transaction_type not in ("income", "expense"):
+            raise ValueError(f"Unsupported transaction type: {transaction_type}")
+        conditions.append(models.Transaction.transaction_type == transaction_type)
+    if min_amount is not None or max_amount is not None:
+        conditions.append(amount_range_filter(min_amount, max_amount))
+    if description:
+        conditions.append(models.Transaction.description.contains(description, autoescape=True))
+
+    if q is not None:
+        match = fulltext_query(q, user_id)
+        if match is None:
+            return [], None, 0
+        fts = table("transactions_fts")
+        fts_rowid = literal_column("transactions_fts.rowid")
+        # The MATCH already scopes rows to the user; "+ 0" keeps the planner from
+        # driving the join off ix_transactions_user_date and probing the index per row
+        conditions[0] = models.Transaction.user_id + 0 == user_id
+        conditions.append(literal_column("transactions_fts").op("MATCH")(match))
+        total = db.query(func.count(models.Transaction.id)).select_from(fts).join(
+            models.Transaction, models.Transaction.id == fts_rowid
+        ).filter(*conditions).scalar()
+
+        offset = decode_offset_cursor(cursor) if cursor else 0
+        rows = db.query(models.Transaction).select_from(fts).join(
+            models.Transaction, models.Transaction.id == fts_rowid
+        ).filter(*conditions).order_by(
+            func.bm25(literal_column("transactions_fts")), models.Transaction.id.desc()
+        ).offset(offset).limit(limit + 1).all()
+        next_cursor = encode_offset_cursor(offset + limit) if len(rows) > limit else None
+        return rows[:limit], next_cursor, total
+
+    total = db.query(func.count(models.Transaction.id)).filter(*conditions).scalar()
+
+    query = db.query(models.Transaction).filter(*conditions)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(models.Transaction.date, models.Transaction.id) < tuple_(last_date, last_id)
+        )
+    rows = query.order_by(
+        models.Transaction.date.desc(), models.Transaction.id.desc()
+    ).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor, total
+
+TIMESERIES_GRANULARITIES = ("day", "week", "month")
+
+def _period_expression(granularity: str):
+    # Bucket keys are built in SQLite: ISO day, Monday of the week, or YYYY-MM
+    if granularity == "day":
+        return func.strftime("%Y-%m-%d", models.Transaction.date)
+    if granularity == "week":
+        return func.date(models.Transaction.date, "weekday 0", "-6 days")
+    if granularity == "month":
+        return func.strftime("%Y-%m", models.Transaction.date)
+    raise ValueError(f"Unsupported granularity: {granularity}. Use one of {', '.join(TIMESERIES_GRANULARITIES)}")
+
+def get_timeseries(
+    db: Session,
+    user_id: int,
+    granularity: str = "month",
+    start_date: date = None,
+    end_date: date = None
+):
+    span = rollups.month_span(start_date, end_date) if granularity == "month" else None
+    if span is not None:
+        # Whole months: read the pre-aggregated buckets instead of the raw rows
+        rollup = models.MonthlyRollup
+        period = rollup.month.label("period")
+        income = func.sum(case((rollup.transaction_type == "income", rollup.total), else_=0))
+        expenses = func.sum(case((rollup.transaction_type == "expense", rollup.total), else_=0))
+        query = rollups.filter_months(db.query(period, income, expenses).filter(rollup.user_id == user_id), *span)
+    else:
+        period = _period_expression(granularity).label("period")
+        income = func.sum(case((models.Transaction.transaction_type == "income", models.Transaction.amount), else_=0))
+        expenses = func.sum(case((models.Transaction.transaction_type == "expense", models.Transaction.amount), else_=0))
+        query = db.query(period, income, expenses).filter(models.Transaction.user_id == user_id)
+        if start_date is not None:
+            query = query.filter(models.Transaction.date >= start_date)
+        if end_date is not None:
+            query = query.filter(models.Transaction.date <= end_date)
+
+    buckets = []
+    for period_key, total_income, total_expenses in query.group_by(period).order_by(period):
+        total_income = total_income or 0
+        total_expenses = abs(total_expenses or 0)
+        buckets.append({
+            "period": period_key,
+            "income": total_income,
+            "expenses": total_expenses,
+            "net": total_income - total_expenses
+        })
+    return buckets
+
+def month_range(month: str):
+    # "YYYY-MM" -> (first day, last day)
+    try:
+        start = datetime.strptime(month, "%Y-%m").date()
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid month: {month}. Use YYYY-MM")
+    next_month = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, date.fromordinal(next_month.toordinal() - 1)
+
+def get_category_breakdown(
+    db: Session,
+    user_id: int,
+    start_date: date = None,
+    end_date: date = None,
+    transaction_type: str = "expense"
+):
+    if transaction_type not in ("income", "expense"):
+        raise ValueError(f"Unsupported transaction type: {transaction_type}")
+    # One grouped scan over (user_id, category, date); per-category totals are
+    # folded from the per-day rows so the result is sized by categories x days
+    query = db.query(
+        models.Transaction.category,
+        models.Transaction.date,
+        func.sum(models.Transaction.amount),
+        func.count(models.Transaction.id)
+    ).filter(
+        models.Transaction.user_id == user_id,
+        models.Transaction.transaction_type == transaction_type
+    )
+    if start_date is not None:
+        query = query.filter(models.Transaction.date >= start_date)
+    if end_date is not None:
+        query = query.filter(models.Transaction.date <= end_date)
+    query = query.group_by(models.Transaction.category, models.Transaction.date).order_by(
+        models.Transaction.category, models.Transaction.date
+    )
+
+    categories = {}
+    daily = []
+    for category, day, total, count in query:
+        total = abs(total or 0)
+        daily.append({"category": category, "date": day, "total": total})
+        bucket = categories.setdefault(category, {"category": category, "total": 0, "count": 0})
+        bucket["total"] += total
+        bucket["count"] += count
+    return {
+        "categories": sorted(categories.values(), key=lambda bucket: bucket["total"], reverse=True),
+        "daily": daily
+    }
+
+def get_health_report(db: Session, user_id: int, month: str = None):
+    # Served from app.health's cache; month defaults to the current one and is
+    # normalized to the rollup's YYYY-MM so "2024-3" hits the same entry
+    month = rollups.month_key(month_range(month)[0] if month is not None else date.today())
+    return health.get_report(db, user_id, month)
+
 def get_transaction(db: Session, transaction_id: int):
     return db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
 
+def iter_transactions(
+    db: Session,
+    user_id: int,
+    start_date: date = None,
+    end_date: date = None,
+    batch_size: int = 1000
+):
+    # Plain column rows fetched batch_size at a time off the open cursor, so
+    # memory stays flat however large the ledger is
+    query = db.query(
+        models.Transaction.id,
+        models.Transaction.date,
+        models.Transaction.amount,
+        models.Transaction.transaction_type,
+        models.Transaction.category,
+        models.Transaction.description
+    ).filter(models.Transaction.user_id == user_id)
+    if start_date is not None:
+        query = query.filter(models.Transaction.date >= start_date)
+    if end_date is not None:
+        query = query.filter(models.Transaction.date <= end_date)
+    return query.order_by(models.Transaction.date, models.Transaction.id).yield_per(batch_size)
+
+def get_transaction_summary(
+    db: Session,
+    user_id: int,
+    start_date: date = None,
+    end_date: date = None,
+    category: str = None
+):
+    span = rollups.month_span(start_date, end_date)
+    if span is not None:
+        # Whole months (or no dates at all): sum the monthly rollup, one row per
+        # month x category instead of one per transaction
+        rollup = models.MonthlyRollup
+        query = db.query(rollup.transaction_type, func.sum(rollup.total)).filter(rollup.user_id == user_id)
+        query = rollups.filter_months(query, *span)
+        if category is not None:
+            query = query.filter(rollup.category == category)
+        totals = dict(query.group_by(rollup.transaction_type).all())
+    else:
+        # One GROUP BY over the user's rows in range; only one row per type comes back
+        query = db.query(
+            models.Transaction.transaction_type,
+            func.sum(models.Transaction.amount)
+        ).filter(models.Transaction.user_id == user_id)
+        if start_date is not None:
+            query = query.filter(models.Transaction.date >= start_date)
+        if end_date is not None:
+            query = query.filter(models.Transaction.date <= end_date)
+        if category is not None:
+            query = query.filter(models.Transaction.category == category)
+        totals = dict(query.group_by(models.Transaction.transaction_type).all())
+
+    total_income = totals.get("income") or 0
+    total_expenses = abs(totals.get("expense") or 0)
+    return {
+        "total_income": total_income,
+        "total_expenses": total_expenses,
+        "net_balance": total_income - total_expenses
+    }
+
@@ -1,14 +1,85 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./finance_tracker.db"
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# ASYNC_DATABASE=true serves the core transaction endpoints from an asyncio
+# engine (aiosqlite) instead of sync sessions run on the threadpool
+ASYNC_DATABASE = os.getenv("ASYNC_DATABASE", "false").lower() in ("1", "true", "yes")
+ASYNC_SQLALCHEMY_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+# Pragmas applied to every new SQLite connection. "performance" switches to WAL so
+# readers no longer block behind writers and fsyncs only at checkpoints.
+SQLITE_PROFILES = {
+    "default": {},
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # negative means KiB, so ~64 MB per connection
+        "mmap_size": 268435456,
+        "busy_timeout": 5000,
+        "temp_store": "MEMORY",
+    },
+}
+# Pragmas that change the database file and cannot run on a read-only connection
+WRITE_ONLY_PRAGMAS = {"journal_mode", "synchronous"}
+
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "performance")
+# Optional per-pragma overrides, e.g. SQLITE_PRAGMAS="cache_size=-20000,mmap_size=0"
+SQLITE_PRAGMAS = os.getenv("SQLITE_PRAGMAS", "")
+# Sync endpoints run on a 40 thread pool, so size the pool to match instead of
+# letting requests queue on the default 5 + 10 connections
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "20"))
+SQLITE_MAX_OVERFLOW = int(os.getenv("SQLITE_MAX_OVERFLOW", "20"))
+# GET endpoints read through a separate pool of read-only connections
+SQLITE_READ_POOL = os.getenv("SQLITE_READ_POOL", "true").lower() in ("1", "true", "yes")
+
+def sqlite_pragmas(profile: str = SQLITE_PROFILE, overrides: str = SQLITE_PRAGMAS, read_only: bool = False):
+    pragmas = dict(SQLITE_PROFILES[profile])
+    for item in filter(None, (part.strip() for part in overrides.split(","))):
+        name, value = item.split("=", 1)
+        pragmas[name.strip()] = value.strip()
+    if read_only:
+        pragmas = {name: value for name, value in pragmas.items() if name not in WRITE_ONLY_PRAGMAS}
+    return pragmas
+
+def apply_sqlite_pragmas(engine, pragmas: dict):
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def read_only_url(url: str):
+    # sqlite:///./x.db -> sqlite:///file:./x.db?mode=ro&uri=true
+    path = url.split("///", 1)[1]
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+def create_sqlite_engine(url: str, profile: str = SQLITE_PROFILE, read_only: bool = False, **kwargs):
+    if read_only:
+        url = read_only_url(url)
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False},
+        pool_size=SQLITE_POOL_SIZE,
+        max_overflow=SQLITE_MAX_OVERFLOW,
+        **kwargs
+    )
+    apply_sqlite_pragmas(engine, sqlite_pragmas(profile, read_only=read_only))
+    return engine
+
+engine = create_sqlite_engine(SQLALCHEMY_DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine = create_sqlite_engine(SQLALCHEMY_DATABASE_URL, read_only=True) if SQLITE_READ_POOL else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 Base = declarative_base()
 
 def get_db():
@@ -18,3 +89,27 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def create_async_session_factory(url: str = ASYNC_SQLALCHEMY_DATABASE_URL, profile: str = SQLITE_PROFILE):
+    # Imported here so aiosqlite is only needed when the async mode is used
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    async_engine = create_async_engine(url, pool_size=SQLITE_POOL_SIZE, max_overflow=SQLITE_MAX_OVERFLOW)
+    apply_sqlite_pragmas(async_engine.sync_engine, sqlite_pragmas(profile))
+    return async_engine, sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+async_engine = None
+AsyncSessionLocal = None
+if ASYNC_DATABASE:
+    async_engine, AsyncSessionLocal = create_async_session_factory()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,102 @@
+import csv
+import io
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # parquet export is optional
+    pa = None
+    pq = None
+
+COLUMNS = ["id", "date", "amount", "transaction_type", "category", "description"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def csv_stream(rows, batch_size=1000):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for batch in batches(rows, batch_size):
+        for row in batch:
+            writer.writerow([row.id, row.date.isoformat(), row.amount, row.transaction_type, row.category, row.description])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+def ndjson_stream(rows, batch_size=1000):
+    for batch in batches(rows, batch_size):
+        yield "".join(
+            json.dumps({
+                "id": row.id,
+                "date": row.date.isoformat(),
+                "amount": float(row.amount),
+                "transaction_type": row.transaction_type,
+                "category": row.category,
+                "description": row.description,
+            }) + "\n"
+            for row in batch
+        ).encode()
+
+class _ChunkSink(io.RawIOBase):
+    # File-like target for ParquetWriter that hands back whatever was written
+    # since the last drain, so row groups can be streamed as they are flushed
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+def parquet_stream(rows, batch_size=10000):
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("date", pa.date32()),
+        ("amount", pa.decimal128(18, 2)),
+        ("transaction_type", pa.string()),
+        ("category", pa.string()),
+        ("description", pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for batch in batches(rows, batch_size):
+        columns = {name: [getattr(row, name) for row in batch] for name in COLUMNS}
+        writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def stream(export_format, rows):
+    if export_format == "csv":
+        return csv_stream(rows)
+    if export_format == "ndjson":
+        return ndjson_stream(rows)
+    if export_format == "parquet":
+        if pa is None:
+            raise ValueError("Parquet export requires pyarrow to be installed")
+        return parquet_stream(rows)
+    raise ValueError(f"Unsupported export format: {export_format}")
@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import models, rollups
+
+# Financial-health report for one user and month, built from the month's and the
+# previous month's monthly_rollups buckets (never from raw transactions) and kept
+# in an in-process LRU. rollups.apply_deltas notes which (user, month) buckets a
+# session changed; once that session commits, those months' reports and the
+# following months' (whose month-over-month deltas they feed) are dropped. Writes
+# made by another process are only picked up when the entry expires.
+
+HEALTH_CACHE_SIZE = int(os.getenv("HEALTH_CACHE_SIZE", "4096"))
+HEALTH_CACHE_TTL_SECONDS = int(os.getenv("HEALTH_CACHE_TTL_SECONDS", "300"))
+TOP_CATEGORIES = 5
+
+# Upper bounds (inclusive) of the expense ratio, in percent of income, per tier
+TIERS = (("excellent", 50), ("caution", 70))
+
+def previous_month(month: str):
+    start = datetime.strptime(month, "%Y-%m")
+    return f"{start.year - 1}-12" if start.month == 1 else f"{start.year}-{start.month - 1:02d}"
+
+def next_month(month: str):
+    start = datetime.strptime(month, "%Y-%m")
+    return f"{start.year + 1}-01" if start.month == 12 else f"{start.year}-{start.month + 1:02d}"
+
+def tier(expense_ratio):
+    if expense_ratio is None:
+        return "no_income"
+    for name, bound in TIERS:
+        if expense_ratio <= bound:
+            return name
+    return "alert"
+
+def percent(part, whole):
+    return round(float(part * 100 / whole), 1) if whole > 0 else None
+
+def _totals(buckets):
+    income = sum(total for transaction_type, _, total in buckets if transaction_type == "income")
+    expenses = -sum(total for transaction_type, _, total in buckets if transaction_type == "expense")
+    return income, expenses
+
+def compute(db, user_id: int, month: str):
+    previous = previous_month(month)
+    rollup = models.MonthlyRollup
+    buckets = {month: [], previous: []}
+    for bucket_month, transaction_type, category, total in db.query(
+        rollup.month, rollup.transaction_type, rollup.category, rollup.total
+    ).filter(rollup.user_id == user_id, rollup.month.in_([month, previous])):
+        buckets[bucket_month].append((transaction_type, category, total))
+
+    income, expenses = _totals(buckets[month])
+    previous_income, previous_expenses = _totals(buckets[previous])
+    expense_ratio = percent(expenses, income)
+    previous_ratio = percent(previous_expenses, previous_income)
+    by_category = sorted(
+        ((category, -total) for transaction_type, category, total in buckets[month] if transaction_type == "expense"),
+        key=lambda item: item[1], reverse=True
+    )
+    return {
+        "month": month,
+        "income": income,
+        "expenses": expenses,
+        "net": income - expenses,
+        "expense_ratio": expense_ratio,
+        "savings_rate": percent(income - expenses, income),
+        "tier": tier(expense_ratio),
+        "previous_month": previous,
+        "income_change": income - previous_income,
+        "expenses_change": expenses - previous_expenses,
+        "net_change": (income - expenses) - (previous_income - previous_expenses),
+        "expense_ratio_change": None if expense_ratio is None or previous_ratio is None
+        else round(expense_ratio - previous_ratio, 1),
+        "top_categories": [
+            {"category": category, "total": total, "share": percent(total, expenses)}
+            for category, total in by_category[:TOP_CATEGORIES]
+        ]
+    }
+
+class HealthCache:
+    # Bounded LRU of (user_id, month) -> report with a ttl. Every invalidation bumps
+    # the generation, so a report computed while a write committed is not stored.
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, report = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return report
+
+    def set(self, key, report, generation: int):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (time.time() + self.ttl, report)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+health_cache = HealthCache(HEALTH_CACHE_SIZE, HEALTH_CACHE_TTL_SECONDS)
+
+def get_report(db, user_id: int, month: str):
+    key = (user_id, month)
+    report = health_cache.get(key)
+    if report is None:
+        generation = health_cache.generation
+        report = compute(db, user_id, month)
+        health_cache.set(key, report, generation)
+    return report
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_months(session):
+    months = session.info.pop(rollups.CHANGED_MONTHS, None)
+    if months:
+        health_cache.invalidate(
+            {(user_id, month) for user_id, month in months} | {(user_id, next_month(month)) for user_id, month in months}
+        )
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_months(session):
+    session.info.pop(rollups.CHANGED_MONTHS, None)
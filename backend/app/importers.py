@@ -0,0 +1,189 @@
+import codecs
+import csv
+import json
+from collections import deque
+from pydantic import ValidationError
+from . import schemas
+
+CHUNK_SIZE = 5000
+
+JSON_TYPES = {"application/json"}
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/jsonlines"}
+CSV_TYPES = {"text/csv", "application/csv"}
+
+class ImportFormatError(ValueError):
+    pass
+
+def media_type(content_type: str):
+    return (content_type or "").split(";")[0].strip().lower()
+
+def is_supported(content_type: str):
+    return media_type(content_type) in JSON_TYPES | NDJSON_TYPES | CSV_TYPES
+
+async def iter_lines(chunks, keepends: bool = False):
+    # Re-split an async byte stream on newlines without buffering the whole body.
+    # Lines stay as bytes (json.loads takes bytes directly); a leading BOM is dropped.
+    pending = b""
+    first = True
+    async for chunk in chunks:
+        if first and chunk:
+            chunk = chunk.removeprefix(b"\xef\xbb\xbf")
+            first = False
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line + b"\n" if keepends else line.rstrip(b"\r")
+    if pending:
+        yield pending if keepends else pending.rstrip(b"\r")
+
+async def iter_json_array(chunks):
+    # Yields the elements of a top-level JSON array as the body arrives, decoding one
+    # element at a time (JSONDecoder.raw_decode) so the array is never held whole.
+    # An empty body counts as an empty array.
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    source = aiter(chunks)
+    buffer = ""
+    position = 0
+    eof = False
+
+    async def read_more():
+        nonlocal buffer, position, eof
+        try:
+            chunk = await anext(source)
+        except StopAsyncIteration:
+            chunk, eof = b"", True
+        try:
+            text = text_decoder.decode(chunk, final=eof)
+        except UnicodeDecodeError as e:
+            raise ImportFormatError(f"Invalid JSON body: {e}")
+        buffer, position = buffer[position:] + text, 0
+
+    async def next_token():
+        # The next non-whitespace character ("" at the end of the body)
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\n\r":
+                position += 1
+            if position < len(buffer) or eof:
+                return buffer[position:position + 1]
+            await read_more()
+
+    token = await next_token()
+    if token == "":
+        return
+    if token != "[":
+        raise ImportFormatError("Expected a JSON array of transactions")
+    position += 1
+    if await next_token() == "]":
+        position += 1
+    else:
+        while True:
+            # A number at the end of the buffer may be cut short ("2.5" of "2.5e3"), so
+            # an element is only taken once a delimiter follows it
+            while True:
+                try:
+                    record, end = decoder.raw_decode(buffer, position)
+                except ValueError as e:
+                    if eof:
+                        raise ImportFormatError(f"Invalid JSON body: {e}")
+                    await read_more()
+                    continue
+                if eof or (end < len(buffer) and buffer[end] in ",] \t\n\r"):
+                    break
+                await read_more()
+            position = end
+            yield record
+            token = await next_token()
+            position += 1
+            if token == "]":
+                break
+            if token != ",":
+                raise ImportFormatError("Invalid JSON body: expected ',' or ']' after an element")
+            await next_token()
+    if await next_token():
+        raise ImportFormatError("Invalid JSON body: extra data after the array")
+
+async def iter_records(content_type: str, chunks):
+    # Yields (row_number, record) where record is a dict of raw field values,
+    # or an ImportFormatError when the row could not be parsed. Row numbers
+    # start at 1 and count data rows only (not the CSV header).
+    kind = media_type(content_type)
+    if kind in JSON_TYPES:
+        row_number = 0
+        async for record in iter_json_array(chunks):
+            row_number += 1
+            yield row_number, record
+    elif kind in NDJSON_TYPES:
+        row_number = 0
+        async for line in iter_lines(chunks):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                yield row_number, json.loads(line)
+            except ValueError as e:
+                yield row_number, ImportFormatError(f"Invalid JSON: {e}")
+    elif kind in CSV_TYPES:
+        # One csv.reader parses the whole upload, fed a record at a time: a line that
+        # leaves a quote open is held back and joined to the next, so quoted fields
+        # may span lines (line endings inside them are kept)
+        complete = deque()
+        reader = csv.reader(iter(complete.popleft, None))
+        header = None
+        row_number = 0
+        pending = []
+        quotes = 0
+        async for line in iter_lines(chunks, keepends=True):
+            if not pending and not line.strip():
+                continue
+            try:
+                text = line.decode("utf-8")
+            except UnicodeDecodeError as e:
+                if header is None:
+                    raise ImportFormatError(f"Invalid CSV header: {e}")
+                pending, quotes = [], 0
+                row_number += 1
+                yield row_number, ImportFormatError(f"Invalid UTF-8: {e}")
+                continue
+            pending.append(text)
+            quotes += text.count('"')
+            if quotes % 2:
+                continue
+            complete.append("".join(pending))
+            pending, quotes = [], 0
+            values = next(reader)
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row_number += 1
+            if len(values) != len(header):
+                yield row_number, ImportFormatError(f"Expected {len(header)} columns, got {len(values)}")
+            else:
+                yield row_number, dict(zip(header, values))
+        if pending:
+            if header is None:
+                raise ImportFormatError("Invalid CSV header: unterminated quoted field")
+            yield row_number + 1, ImportFormatError("Unterminated quoted field")
+    else:
+        raise ImportFormatError(f"Unsupported content type: {content_type}")
+
+def validate_chunk(records):
+    # Splits a chunk of (row_number, record) pairs into valid transactions and row errors
+    transactions = []
+    errors = []
+    for row_number, record in records:
+        if isinstance(record, ImportFormatError):
+            errors.append({"row": row_number, "error": str(record)})
+            continue
+        if not isinstance(record, dict):
+            errors.append({"row": row_number, "error": "Expected an object"})
+            continue
+        try:
+            transactions.append(schemas.TransactionCreate(**record))
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            errors.append({"row": row_number, "error": message})
+    return transactions, errors
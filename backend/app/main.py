@@ -1,14 +1,35 @@
-from fastapi import Depends, FastAPI, HTTPException, status
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
-from . import crud, models, schemas, auth
-from .database import engine, get_db
-from datetime import timedelta
+from . import crud, schemas, auth, migrations, importers, exporters, async_api, recurring
+from .database import ASYNC_DATABASE, SessionLocal, engine, get_db, get_read_db
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional, Union
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
-models.Base.metadata.create_all(bind=engine)
+migrations.upgrade(engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Posts due recurring transactions in the background, catching up on startup
+    scheduler = recurring.RecurringScheduler(SessionLocal) if recurring.RECURRING_SCHEDULER else None
+    if scheduler is not None:
+        scheduler.start()
+    yield
+    if scheduler is not None:
+        await run_in_threadpool(scheduler.stop)
+
+app = FastAPI(lifespan=lifespan)
+
+if ASYNC_DATABASE:
+    # Registered ahead of the sync routes below, so it serves the paths both define
+    app.include_router(async_api.router)
 
 @app.get("/")
 def read_root():
@@ -23,11 +44,14 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Ledger and analytics payloads are repetitive JSON; small responses go out as-is
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 @app.post("/token", response_model=schemas.Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,25 +60,28 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         )
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id, "email": user.email},
+        expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    # bcrypt runs on auth's bounded hashing pool, the sync queries on the threadpool
+    db_user = await run_in_threadpool(crud.get_user_by_email, db, user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    db_user = crud.get_user_by_username(db, username=user.username)
+    db_user = await run_in_threadpool(crud.get_user_by_username, db, user.username)
     if db_user:
         raise HTTPException(status_code=400, detail="Username already taken")
-    return crud.create_user(db=db, user=user)
+    hashed_password = await auth.get_password_hash_async(user.password)
+    return await run_in_threadpool(crud.create_user, db, user, hashed_password)
 
 @app.get("/users/me", response_model=schemas.User)
 async def read_users_me(current_user: schemas.User = Depends(auth.get_current_user)):
     return current_user
 
-@app.post("/transactions/", response_model=schemas.Transaction)
+@app.post("/transactions/", response_model=schemas.TransactionWrite)
 def create_transaction(
     transaction: schemas.TransactionCreate,
     db: Session = Depends(get_db),
@@ -62,17 +89,191 @@ def create_transaction(
 ):
     return crud.create_user_transaction(db=db, transaction=transaction, user_id=current_user.id)
 
-@app.get("/transactions/", response_model=list[schemas.Transaction])
+@app.post("/transactions/bulk", response_model=schemas.BulkImportResult)
+async def bulk_create_transactions(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    # Accepts a JSON array, NDJSON or CSV body (picked by Content-Type). Rows are
+    # validated and inserted a chunk at a time, one transaction per chunk.
+    content_type = request.headers.get("content-type", "")
+    if not importers.is_supported(content_type):
+        raise HTTPException(status_code=415, detail=f"Unsupported content type: {content_type}")
+
+    inserted = 0
+    errors = []
+    chunk = []
+    pending_insert = None
+
+    async def flush(records, pending_insert):
+        # Validate this chunk while the previous one is still being written,
+        # so parsing and SQLite work overlap; at most one insert is in flight
+        transactions, row_errors = importers.validate_chunk(records)
+        errors.extend(row_errors)
+        count = await pending_insert if pending_insert is not None else 0
+        next_insert = asyncio.ensure_future(run_in_threadpool(
+            crud.bulk_create_user_transactions, db, transactions, current_user.id
+        ))
+        return count, next_insert
+
+    try:
+        async for record in importers.iter_records(content_type, request.stream()):
+            chunk.append(record)
+            if len(chunk) >= importers.CHUNK_SIZE:
+                count, pending_insert = await flush(chunk, pending_insert)
+                inserted += count
+                chunk = []
+        if chunk:
+            count, pending_insert = await flush(chunk, pending_insert)
+            inserted += count
+    except importers.ImportFormatError as e:
+        if pending_insert is not None:
+            inserted += await pending_insert
+        raise HTTPException(status_code=400, detail=f"{e} ({inserted} rows were already imported)")
+    if pending_insert is not None:
+        inserted += await pending_insert
+
+    return {"inserted": inserted, "failed": len(errors), "errors": errors}
+
+@app.get("/transactions/", response_model=Union[list[schemas.Transaction], schemas.TransactionPage])
 def read_transactions(
     skip: int = 0,
-    limit: int = 100,
-    db: Session = Depends(get_db),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     current_user: schemas.User = Depends(auth.get_current_user)
 ):
+    # Passing cursor (empty for the first page) switches to keyset pagination;
+    # plain skip/limit requests keep getting a bare list
+    if cursor is not None:
+        try:
+            items, next_cursor = crud.get_transactions_page(
+                db, user_id=current_user.id, cursor=cursor, limit=limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"items": items, "next_cursor": next_cursor}
     transactions = crud.get_transactions(db, user_id=current_user.id, skip=skip, limit=limit)
     return transactions
 
-@app.put("/transactions/{transaction_id}", response_model=schemas.Transaction)
+@app.get("/transactions/export")
+def export_transactions(
+    export_format: str = Query("csv", alias="format"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    # The session stays open until the response has been fully streamed
+    rows = crud.iter_transactions(db, user_id=current_user.id, start_date=start_date, end_date=end_date)
+    try:
+        body = exporters.stream(export_format, rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        body,
+        media_type=exporters.MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="transactions.{export_format}"'}
+    )
+
+@app.get("/transactions/search", response_model=schemas.TransactionSearchPage)
+def search_transactions(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[list[str]] = Query(None),
+    transaction_type: Optional[str] = None,
+    min_amount: Optional[Decimal] = None,
+    max_amount: Optional[Decimal] = None,
+    description: Optional[str] = None,
+    q: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    # category may be repeated (?category=Food&category=Housing) to match any of them;
+    # q is a full-text search over descriptions (prefix words, best matches first)
+    try:
+        items, next_cursor, total = crud.search_transactions(
+            db,
+            user_id=current_user.id,
+            start_date=start_date,
+            end_date=end_date,
+            categories=category,
+            transaction_type=transaction_type,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            description=description,
+            q=q,
+            cursor=cursor,
+            limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor, "total": total}
+
+@app.get("/transactions/changes", response_model=schemas.TransactionChanges)
+def read_transaction_changes(
+    since: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    # Delta sync: pass the previous watermark back as `since`
+    return crud.get_changes(db, user_id=current_user.id, since=since)
+
+def batch_selection(
+    ids: Optional[list[int]] = Query(None),
+    category: Optional[str] = None,
+    transaction_type: Optional[str] = None,
+    month: Optional[str] = None,
+    start_date: Optional[date] = Query(None, alias="from"),
+    end_date: Optional[date] = Query(None, alias="to")
+):
+    # Shared query parameters of the batch endpoints: explicit ids and/or a filter
+    try:
+        if month is not None:
+            if start_date is not None or end_date is not None:
+                raise ValueError("Use either month or from/to, not both")
+            start_date, end_date = crud.month_range(month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "ids": ids,
+        "category": category,
+        "transaction_type": transaction_type,
+        "start_date": start_date,
+        "end_date": end_date
+    }
+
+# Declared ahead of the /transactions/{transaction_id} routes so "batch" isn't taken for an id
+@app.patch("/transactions/batch", response_model=schemas.BatchWrite)
+def batch_update_transactions(
+    changes: schemas.TransactionBatchUpdate,
+    selection: dict = Depends(batch_selection),
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    try:
+        return crud.batch_update_transactions(
+            db, user_id=current_user.id, changes=changes.dict(exclude_none=True), **selection
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/transactions/batch", response_model=schemas.BatchResult)
+def batch_delete_transactions(
+    selection: dict = Depends(batch_selection),
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    try:
+        affected = crud.batch_delete_transactions(db, user_id=current_user.id, **selection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"affected": affected}
+
+@app.put("/transactions/{transaction_id}", response_model=schemas.TransactionWrite)
 def update_transaction(
     transaction_id: int,
     transaction: schemas.TransactionCreate,
@@ -99,26 +300,133 @@ def delete_transaction(
         raise HTTPException(status_code=403, detail="Not authorized to delete this transaction")
     return crud.delete_transaction(db=db, transaction_id=transaction_id)
 
-@app.get("/transactions/summary")
-def get_transaction_summary(
+@app.get("/rules", response_model=list[schemas.CategoryRule])
+def read_rules(
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    return crud.get_rules(db, user_id=current_user.id)
+
+@app.post("/rules", response_model=schemas.CategoryRule)
+def create_rule(
+    rule: schemas.CategoryRuleCreate,
     db: Session = Depends(get_db),
     current_user: schemas.User = Depends(auth.get_current_user)
 ):
-    transactions = crud.get_transactions(db, user_id=current_user.id)
-    total_income = sum(t.amount for t in transactions if t.transaction_type == "income")
-    total_expenses = abs(sum(t.amount for t in transactions if t.transaction_type == "expense"))
-    net_balance = total_income - total_expenses
-    return {
-        "total_income": total_income,
-        "total_expenses": total_expenses,
-        "net_balance": net_balance
-    }
+    return crud.create_rule(db, rule=rule, user_id=current_user.id)
+
+@app.delete("/rules/{rule_id}", response_model=schemas.CategoryRule)
+def delete_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    db_rule = crud.delete_rule(db, user_id=current_user.id, rule_id=rule_id)
+    if db_rule is None:
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return db_rule
+
+@app.post("/rules/apply", response_model=schemas.BatchWrite)
+def apply_rules(
+    selection: dict = Depends(batch_selection),
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    # Re-run the rules over the ledger (or the rows selected like the batch endpoints)
+    try:
+        return crud.apply_rules(db, user_id=current_user.id, **selection)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/budgets", response_model=list[schemas.Budget])
+def read_budgets(
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    return crud.get_budgets(db, user_id=current_user.id)
+
+@app.post("/budgets", response_model=schemas.Budget)
+def set_budget(
+    budget: schemas.BudgetCreate,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    return crud.set_budget(db, budget=budget, user_id=current_user.id)
+
+@app.get("/budgets/status", response_model=list[schemas.BudgetStatus])
+def read_budget_status(
+    month: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    # Spend against every budget for month (default: the current one), from monthly_rollups
+    try:
+        return crud.get_budget_status(db, user_id=current_user.id, month=month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/budgets/{budget_id}", response_model=schemas.Budget)
+def delete_budget(
+    budget_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    db_budget = crud.delete_budget(db, user_id=current_user.id, budget_id=budget_id)
+    if db_budget is None:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    return db_budget
+
+@app.get("/recurring", response_model=list[schemas.RecurringTransaction])
+def read_recurring_transactions(
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    return crud.get_recurring_transactions(db, user_id=current_user.id)
+
+@app.post("/recurring", response_model=schemas.RecurringTransaction)
+def create_recurring_transaction(
+    template: schemas.RecurringTransactionCreate,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    db_template = crud.create_recurring_transaction(db, template=template, user_id=current_user.id)
+    # Occurrences already due (a start date in the past) are posted right away
+    recurring.materialize_due(db, user_id=current_user.id)
+    db.refresh(db_template)
+    return db_template
+
+@app.delete("/recurring/{template_id}", response_model=schemas.RecurringTransaction)
+def delete_recurring_transaction(
+    template_id: int,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    db_template = crud.delete_recurring_transaction(db, user_id=current_user.id, template_id=template_id)
+    if db_template is None:
+        raise HTTPException(status_code=404, detail="Recurring transaction not found")
+    return db_template
+
+@app.get("/transactions/summary", response_model=schemas.TransactionSummary)
+def get_transaction_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    category: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    return crud.get_transaction_summary(
+        db,
+        user_id=current_user.id,
+        start_date=start_date,
+        end_date=end_date,
+        category=category
+    )
 
 @app.get("/transactions/by-amount/")
 def get_transactions_by_amount(
-    min_amount: float,
-    max_amount: float,
-    db: Session = Depends(get_db),
+    min_amount: Decimal,
+    max_amount: Decimal,
+    db: Session = Depends(get_read_db),
     current_user: schemas.User = Depends(auth.get_current_user)
 ):
     transactions = crud.get_transactions_by_amount_range(
@@ -129,3 +437,59 @@ def get_transactions_by_amount(
     )
     return transactions
 
+
+@app.get("/analytics/timeseries", response_model=list[schemas.TimeseriesBucket])
+def get_timeseries(
+    granularity: str = "month",
+    start_date: Optional[date] = Query(None, alias="from"),
+    end_date: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    try:
+        return crud.get_timeseries(
+            db,
+            user_id=current_user.id,
+            granularity=granularity,
+            start_date=start_date,
+            end_date=end_date
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/health", response_model=schemas.HealthReport)
+def get_health_report(
+    month: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    # Expense ratio, savings rate, month-over-month changes and top categories
+    # from monthly_rollups, cached until a transaction in month or the one before changes
+    try:
+        return crud.get_health_report(db, user_id=current_user.id, month=month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/analytics/categories", response_model=schemas.CategoryBreakdown)
+def get_category_breakdown(
+    month: Optional[str] = None,
+    start_date: Optional[date] = Query(None, alias="from"),
+    end_date: Optional[date] = Query(None, alias="to"),
+    transaction_type: str = "expense",
+    db: Session = Depends(get_read_db),
+    current_user: schemas.User = Depends(auth.get_current_user)
+):
+    try:
+        if month is not None:
+            if start_date is not None or end_date is not None:
+                raise ValueError("Use either month or from/to, not both")
+            start_date, end_date = crud.month_range(month)
+        return crud.get_category_breakdown(
+            db,
+            user_id=current_user.id,
+            start_date=start_date,
+            end_date=end_date,
+            transaction_type=transaction_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,140 @@
+import sys
+from datetime import datetime
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from . import models, rollups
+from .database import Base, engine
+
+# Indexes no longer declared on the models; upgraded databases drop them
+OBSOLETE_INDEXES = ["ix_transactions_user_updated", "ix_deleted_transactions_user_deleted"]
+
+def create_missing_indexes(bind):
+    # create_all only builds indexes together with a new table, so databases
+    # created before an index was declared never get it
+    inspector = inspect(bind)
+    created = []
+    for table in Base.metadata.sorted_tables:
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=bind)
+                created.append(index.name)
+    return created
+
+def add_missing_columns(bind):
+    # create_all never alters an existing table, so new nullable columns are
+    # added in place with ALTER TABLE
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=bind.dialect)
+                with bind.begin() as connection:
+                    connection.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+# Money columns that moved from REAL dollars to integer cents: new column -> legacy column
+CENTS_COLUMNS = {
+    "transactions.amount_cents": "amount",
+}
+# Legacy REAL columns of derived tables: dropped without converting, since the table
+# is rebuilt from the converted rows (rounding a total on its own would drift from
+# the sum of its rounded rows)
+DERIVED_LEGACY_COLUMNS = {
+    "monthly_rollups.total_cents": "total",
+}
+
+def drop_legacy_column(bind, table_name, legacy_column, cents_column=None):
+    # Fill cents_column (if given) from the legacy REAL column, then drop the legacy
+    # column and any index on it (create_missing_indexes rebuilds them over the cents
+    # column). Rounding to two places first keeps 0.285 from landing on 28.4999... cents.
+    inspector = inspect(bind)
+    if legacy_column not in {column["name"] for column in inspector.get_columns(table_name)}:
+        return
+    with bind.begin() as connection:
+        if cents_column is not None:
+            connection.exec_driver_sql(
+                f"UPDATE {table_name} SET {cents_column} = CAST(ROUND(ROUND({legacy_column}, 2) * 100) AS INTEGER)"
+            )
+        for index in inspector.get_indexes(table_name):
+            if legacy_column in index["column_names"]:
+                connection.exec_driver_sql(f"DROP INDEX {index['name']}")
+        connection.exec_driver_sql(f"ALTER TABLE {table_name} DROP COLUMN {legacy_column}")
+
+def backfill_updated_at(bind):
+    # Rows written before updated_at existed count as changed now
+    with bind.begin() as connection:
+        connection.execute(
+            models.Transaction.__table__.update().where(models.Transaction.updated_at.is_(None)),
+            {"updated_at": datetime.utcnow()}
+        )
+
+def backfill_change_seq(bind):
+    # Rows and tombstones from before the change sequence get 0, so a client's
+    # first sync (no watermark) picks them up and every later write sorts after them
+    with bind.begin() as connection:
+        for table in (models.Transaction.__table__, models.DeletedTransaction.__table__):
+            connection.execute(table.update().where(table.c.change_seq.is_(None)), {"change_seq": 0})
+
+def drop_obsolete_indexes(bind):
+    with bind.begin() as connection:
+        for name in OBSOLETE_INDEXES:
+            connection.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+def install_fulltext(bind):
+    # The FTS table and its triggers are created with transactions; older
+    # databases get them here, and the index is filled from existing rows
+    with bind.begin() as connection:
+        for statement in models.TRANSACTIONS_FTS_DDL:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("INSERT INTO transactions_fts(transactions_fts) VALUES ('rebuild')")
+
+def backfill_rollups(bind):
+    # monthly_rollups is derived data: fill it from the raw rows when it is new or
+    # the amounts it sums were converted
+    with Session(bind) as db:
+        rollups.rebuild(db)
+        db.commit()
+
+def upgrade(bind=engine):
+    existing_tables = set(inspect(bind).get_table_names())
+    Base.metadata.create_all(bind=bind)
+    added = add_missing_columns(bind)
+    for name in added:
+        table_name, cents_column = name.split(".")
+        if name in CENTS_COLUMNS:
+            drop_legacy_column(bind, table_name, CENTS_COLUMNS[name], cents_column)
+        elif name in DERIVED_LEGACY_COLUMNS:
+            drop_legacy_column(bind, table_name, DERIVED_LEGACY_COLUMNS[name])
+    if "transactions.updated_at" in added:
+        backfill_updated_at(bind)
+    if {"transactions.change_seq", "deleted_transactions.change_seq"} & set(added):
+        backfill_change_seq(bind)
+    drop_obsolete_indexes(bind)
+    if models.MonthlyRollup.__tablename__ not in existing_tables or set(added) & (CENTS_COLUMNS.keys() | DERIVED_LEGACY_COLUMNS.keys()):
+        backfill_rollups(bind)
+    created = added + create_missing_indexes(bind)
+    if "transactions" in existing_tables and "transactions_fts" not in existing_tables:
+        install_fulltext(bind)
+        created.append("transactions_fts")
+    if created:
+        # Refresh planner statistics so the new indexes are actually picked
+        with bind.begin() as connection:
+            connection.exec_driver_sql("ANALYZE")
+    return created
+
+if __name__ == "__main__":
+    # python -m app.migrations [database_url]
+    if len(sys.argv) > 1:
+        from sqlalchemy import create_engine
+        bind = create_engine(sys.argv[1])
+    else:
+        bind = engine
+    for name in upgrade(bind):
+        print(f"Created {name}")
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Enum
+from sqlalchemy import Boolean, Column, DDL, Integer, String, Date, DateTime, ForeignKey, Enum, Index, event
 from sqlalchemy.orm import relationship
 from .database import Base
+from .money import Money
+from datetime import datetime
 import enum
 
 class TransactionType(str, enum.Enum):
@@ -22,11 +24,148 @@ class Transaction(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date)
-    amount = Column(Float)
+    # Integer cents in the amount_cents column; Decimal on the Python side
+    amount = Column("amount_cents", Money, key="amount")
     transaction_type = Column(String)  # 'income' or 'expense'
     category = Column(String)
     description = Column(String)
     user_id = Column(Integer, ForeignKey("users.id"))
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Sequence of the write transaction that last wrote the row; clients sync deltas
+    # against it (see app.sync and crud.get_changes)
+    change_seq = Column(Integer)
+    # "<template id>:<occurrence date>" on rows posted by app.recurring; the unique
+    # index makes posting the same occurrence twice impossible
+    recurring_key = Column(String)
 
     owner = relationship("User", back_populates="transactions")
 
+    # Every lookup in crud is scoped to one user, so user_id leads each index
+    __table_args__ = (
+        Index("ix_transactions_user_date", "user_id", "date"),
+        Index("ix_transactions_user_category_date", "user_id", "category", "date"),
+        Index("ix_transactions_user_type_amount", "user_id", "transaction_type", "amount"),
+        Index("ix_transactions_user_change_seq", "user_id", "change_seq"),
+        Index("ux_transactions_recurring_key", "recurring_key", unique=True),
+    )
+
+# Full-text index over descriptions: an FTS5 table backed by transactions (external
+# content, so text isn't stored twice) and kept in sync by triggers. user_id is
+# indexed as a token so searches are scoped to one user inside the index.
+TRANSACTIONS_FTS_INSERT_TRIGGER = (
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ai AFTER INSERT ON transactions BEGIN "
+    "INSERT INTO transactions_fts(rowid, description, user_id) VALUES (new.id, new.description, new.user_id); "
+    "END"
+)
+TRANSACTIONS_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS transactions_fts USING fts5("
+    "description, user_id, content='transactions', content_rowid='id')",
+    TRANSACTIONS_FTS_INSERT_TRIGGER,
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_ad AFTER DELETE ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description, user_id) "
+    "VALUES ('delete', old.id, old.description, old.user_id); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS transactions_fts_au AFTER UPDATE OF description, user_id ON transactions BEGIN "
+    "INSERT INTO transactions_fts(transactions_fts, rowid, description, user_id) "
+    "VALUES ('delete', old.id, old.description, old.user_id); "
+    "INSERT INTO transactions_fts(rowid, description, user_id) VALUES (new.id, new.description, new.user_id); "
+    "END",
+]
+
+for statement in TRANSACTIONS_FTS_DDL:
+    event.listen(Transaction.__table__, "after_create", DDL(statement))
+event.listen(Transaction.__table__, "before_drop", DDL("DROP TABLE IF EXISTS transactions_fts"))
+
+class DeletedTransaction(Base):
+    __tablename__ = "deleted_transactions"
+
+    # Tombstones so delta sync can tell clients which ids to drop
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+    change_seq = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_deleted_transactions_user_change_seq", "user_id", "change_seq"),
+    )
+
+class ChangeCounter(Base):
+    __tablename__ = "change_counter"
+
+    # A single row: the last sequence handed to a write transaction (see app.sync)
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+event.listen(ChangeCounter.__table__, "after_create", DDL("INSERT INTO change_counter (id, value) VALUES (1, 0)"))
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+
+    # Pre-aggregated transactions per user, month ('YYYY-MM'), type and category;
+    # kept in step by crud and reconciled by app.rollups
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    month = Column(String, primary_key=True)
+    transaction_type = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    total = Column("total_cents", Money, key="total", nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+class CategoryRule(Base):
+    __tablename__ = "category_rules"
+
+    # Per-user categorization rule applied at ingest (see app.rules). Every set
+    # condition must hold; the highest-priority matching rule wins.
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    pattern = Column(String, nullable=False, default="")  # substring of the description, or a regex
+    is_regex = Column(Boolean, nullable=False, default=False)
+    transaction_type = Column(String)
+    min_amount = Column(Money)
+    max_amount = Column(Money)
+    category = Column(String, nullable=False)
+    priority = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_category_rules_user_priority", "user_id", "priority"),
+    )
+
+class RecurringTransaction(Base):
+    __tablename__ = "recurring_transactions"
+
+    # Template posted every `interval` days/weeks/months/years from start_date by
+    # app.recurring. occurrences counts the ones already posted; next_date is the
+    # next one due, or None once end_date has passed.
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    amount = Column("amount_cents", Money, key="amount")
+    transaction_type = Column(String)
+    category = Column(String)
+    description = Column(String)
+    frequency = Column(String, nullable=False, default="monthly")
+    interval = Column(Integer, nullable=False, default=1)
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date)
+    occurrences = Column(Integer, nullable=False, default=0)
+    next_date = Column(Date)
+
+    __table_args__ = (
+        Index("ix_recurring_transactions_user", "user_id"),
+        Index("ix_recurring_transactions_next_date", "next_date"),
+        # Ids are part of the posted rows' recurring_key, so they must never be reused
+        {"sqlite_autoincrement": True},
+    )
+
+class Budget(Base):
+    __tablename__ = "budgets"
+
+    # Monthly spending limit for one of a user's expense categories; spend is read
+    # from monthly_rollups (see app.budgets)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    category = Column(String, nullable=False)
+    limit = Column("limit_cents", Money, key="limit", nullable=False)
+    alert_percent = Column(Integer, nullable=False, default=80)
+
+    __table_args__ = (
+        Index("ux_budgets_user_category", "user_id", "category", unique=True),
+    )
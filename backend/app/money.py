@@ -0,0 +1,35 @@
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR, ROUND_HALF_UP
+from sqlalchemy import Integer
+from sqlalchemy.types import TypeDecorator
+
+# Money is stored as integer minor units (cents) so SUM/compare in SQL are exact
+# integer arithmetic, and handed to Python as Decimal with two places.
+
+CENT = Decimal("0.01")
+
+def to_decimal(value, rounding=ROUND_HALF_UP):
+    # Floats go through str() so 0.1 becomes Decimal("0.1"), not its binary expansion
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value))
+    return value.quantize(CENT, rounding=rounding)
+
+def to_cents(value):
+    return int(to_decimal(value) / CENT)
+
+def to_cents_many(values):
+    # Bulk inserts convert a whole chunk here and bind the ints straight to an Integer
+    # parameter, instead of going through Money's bind processor row by row
+    return [to_cents(value) for value in values]
+
+def from_cents(cents):
+    return Decimal(cents) * CENT
+
+class Money(TypeDecorator):
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
@@ -0,0 +1,132 @@
+import logging
+import os
+import threading
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from sqlalchemy.orm import Session
+from . import crud, models
+
+logger = logging.getLogger(__name__)
+
+# RECURRING_SCHEDULER=false turns the in-process scheduler off (e.g. when another
+# process already runs it); posting stays idempotent either way
+RECURRING_SCHEDULER = os.getenv("RECURRING_SCHEDULER", "true").lower() in ("1", "true", "yes")
+RECURRING_INTERVAL_SECONDS = int(os.getenv("RECURRING_INTERVAL_SECONDS", "300"))
+# Templates handled per INSERT/commit; a catch-up after downtime posts every missed
+# occurrence of a batch in one executemany
+RECURRING_BATCH_SIZE = 500
+# Keys checked per SELECT, well under SQLite's bound-parameter limit
+KEY_CHUNK_SIZE = 500
+
+FREQUENCIES = {
+    "daily": lambda n: relativedelta(days=n),
+    "weekly": lambda n: relativedelta(weeks=n),
+    "monthly": lambda n: relativedelta(months=n),
+    "yearly": lambda n: relativedelta(years=n),
+}
+
+def occurrence(template: models.RecurringTransaction, index: int):
+    # Always counted from start_date, so a template on the 31st lands on the last
+    # day of shorter months and goes back to the 31st afterwards
+    return template.start_date + FREQUENCIES[template.frequency](index * template.interval)
+
+def recurring_key(template: models.RecurringTransaction, day: date):
+    return f"{template.id}:{day.isoformat()}"
+
+def due_dates(template: models.RecurringTransaction, today: date):
+    # Dates due up to today, advancing the template past them
+    last = today if template.end_date is None else min(today, template.end_date)
+    dates = []
+    index = template.occurrences
+    while True:
+        day = occurrence(template, index)
+        if day > last:
+            break
+        dates.append(day)
+        index += 1
+    template.occurrences = index
+    if template.end_date is not None and day > template.end_date:
+        template.next_date = None
+    else:
+        template.next_date = day
+    return dates
+
+def existing_keys(db: Session, keys: list[str]):
+    found = set()
+    for start in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = keys[start:start + KEY_CHUNK_SIZE]
+        found.update(key for (key,) in db.query(models.Transaction.recurring_key).filter(
+            models.Transaction.recurring_key.in_(chunk)
+        ))
+    return found
+
+def materialize_due(db: Session, today: date = None, user_id: int = None, batch_size: int = RECURRING_BATCH_SIZE):
+    # Posts every occurrence due up to today through the bulk insert path: one
+    # executemany INSERT, rollup update and commit per batch of templates, together
+    # with the templates' advanced next_date. Occurrences already posted (by an earlier
+    # run or another process) are skipped by key; the unique index backs that up.
+    today = today or date.today()
+    posted = 0
+    while True:
+        query = db.query(models.RecurringTransaction).filter(models.RecurringTransaction.next_date <= today)
+        if user_id is not None:
+            query = query.filter(models.RecurringTransaction.user_id == user_id)
+        templates = query.order_by(models.RecurringTransaction.id).limit(batch_size).all()
+        if not templates:
+            return posted
+        rows = []
+        for template in templates:
+            for day in due_dates(template, today):
+                rows.append({
+                    "date": day,
+                    "amount": template.amount,
+                    "transaction_type": template.transaction_type,
+                    "category": template.category,
+                    "description": template.description,
+                    "user_id": template.user_id,
+                    "recurring_key": recurring_key(template, day)
+                })
+        seen = existing_keys(db, [row["recurring_key"] for row in rows])
+        rows = [row for row in rows if row["recurring_key"] not in seen]
+        if rows:
+            crud.insert_transaction_rows(db, rows)
+        db.commit()
+        posted += len(rows)
+
+class RecurringScheduler:
+    # Background thread that calls materialize_due every interval seconds, starting
+    # right away so anything missed while the server was down is posted on startup
+    def __init__(self, session_factory, interval: int = RECURRING_INTERVAL_SECONDS):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def run_once(self):
+        with self.session_factory() as db:
+            try:
+                posted = materialize_due(db)
+            except Exception:
+                db.rollback()
+                logger.exception("Posting recurring transactions failed")
+                return 0
+        if posted:
+            logger.info("Posted %d recurring transaction(s)", posted)
+        return posted
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.run_once()
+            self.stopped.wait(self.interval)
+
+    def start(self):
+        if self.thread is None:
+            self.stopped.clear()
+            self.thread = threading.Thread(target=self.run, name="recurring-scheduler", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
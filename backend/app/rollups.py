@@ -0,0 +1,152 @@
+import sys
+from collections import defaultdict
+from datetime import date, timedelta
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert
+from . import models
+
+# monthly_rollups holds SUM(amount) and COUNT(*) per (user_id, month,
+# transaction_type, category). The crud write paths keep it in step by applying
+# deltas inside the same transaction as the row change; rebuild/verify reconcile
+# it against the raw transactions table.
+
+KEY_COLUMNS = ("user_id", "month", "transaction_type", "category")
+# Session.info key collecting the (user_id, month) pairs whose buckets changed, for
+# caches built on the rollup (see app.health) to drop once the session commits
+CHANGED_MONTHS = "rollup_changed_months"
+
+def month_key(day: date):
+    return day.strftime("%Y-%m")
+
+def row_key(user_id: int, values: dict):
+    return (user_id, month_key(values["date"]), values["transaction_type"], values["category"])
+
+def new_deltas():
+    # key -> [total, count]
+    return defaultdict(lambda: [0, 0])
+
+def add_delta(deltas, user_id: int, values: dict, sign: int = 1):
+    delta = deltas[row_key(user_id, values)]
+    delta[0] += sign * values["amount"]
+    delta[1] += sign
+
+def add_bucket(deltas, key, total, count):
+    delta = deltas[key]
+    delta[0] += total
+    delta[1] += count
+
+def apply_deltas(db, deltas):
+    # Upsert every touched bucket, then drop buckets that no longer hold rows.
+    # Does not commit: callers apply deltas in the transaction of the row change.
+    rows = [
+        {"user_id": key[0], "month": key[1], "transaction_type": key[2], "category": key[3],
+         "total": total, "count": count}
+        for key, (total, count) in deltas.items()
+        if count or total
+    ]
+    if not rows:
+        return
+    db.info.setdefault(CHANGED_MONTHS, set()).update((row["user_id"], row["month"]) for row in rows)
+    table = models.MonthlyRollup.__table__
+    statement = insert(table)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={
+            "total": table.c.total + statement.excluded.total,
+            "count": table.c.count + statement.excluded.count
+        }
+    ), rows)
+    if any(row["count"] < 0 for row in rows):
+        user_ids = {row["user_id"] for row in rows}
+        db.execute(delete(table).where(table.c.user_id.in_(user_ids), table.c.count <= 0))
+
+def month_span(start_date: date = None, end_date: date = None):
+    # (first_month, last_month) when the range covers whole months, else None.
+    # Open ends are aligned by definition.
+    if start_date is not None and start_date.day != 1:
+        return None
+    if end_date is not None and (end_date + timedelta(days=1)).day != 1:
+        return None
+    return (
+        month_key(start_date) if start_date is not None else None,
+        month_key(end_date) if end_date is not None else None
+    )
+
+def filter_months(query, first_month: str = None, last_month: str = None):
+    if first_month is not None:
+        query = query.filter(models.MonthlyRollup.month >= first_month)
+    if last_month is not None:
+        query = query.filter(models.MonthlyRollup.month <= last_month)
+    return query
+
+def _raw_totals(user_id: int = None):
+    month = func.strftime("%Y-%m", models.Transaction.date)
+    query = select(
+        models.Transaction.user_id,
+        month.label("month"),
+        models.Transaction.transaction_type,
+        models.Transaction.category,
+        func.sum(models.Transaction.amount).label("total"),
+        func.count().label("count")
+    )
+    if user_id is not None:
+        query = query.where(models.Transaction.user_id == user_id)
+    return query.group_by(
+        models.Transaction.user_id, month, models.Transaction.transaction_type, models.Transaction.category
+    )
+
+def bucket_totals(db, conditions):
+    # (user_id, month, transaction_type, category, total, count) for the rows matching
+    # conditions; batch writes move these whole buckets instead of row-by-row deltas
+    return db.execute(_raw_totals().where(*conditions)).all()
+
+def rebuild(db, user_id: int = None):
+    # Recompute the rollup (for one user or everyone) from the raw rows. Does not commit.
+    table = models.MonthlyRollup.__table__
+    statement = delete(table)
+    if user_id is not None:
+        statement = statement.where(table.c.user_id == user_id)
+    db.execute(statement)
+    db.execute(table.insert().from_select([*KEY_COLUMNS, "total", "count"], _raw_totals(user_id)))
+
+def verify(db, user_id: int = None):
+    # Returns [(key, expected (total, count), stored (total, count))] for every bucket that disagrees.
+    # Totals are integer cents, so they must match exactly.
+    expected = {tuple(row[:4]): (row.total, row.count) for row in db.execute(_raw_totals(user_id))}
+    table = models.MonthlyRollup.__table__
+    query = select(table)
+    if user_id is not None:
+        query = query.where(table.c.user_id == user_id)
+    stored = {
+        (row.user_id, row.month, row.transaction_type, row.category): (row.total, row.count)
+        for row in db.execute(query)
+    }
+    mismatches = []
+    for key in sorted(expected.keys() | stored.keys(), key=lambda k: tuple(str(part) for part in k)):
+        want = expected.get(key, (0, 0))
+        have = stored.get(key, (0, 0))
+        if want[1] != have[1] or (want[0] or 0) != (have[0] or 0):
+            mismatches.append((key, want, have))
+    return mismatches
+
+if __name__ == "__main__":
+    # python -m app.rollups verify|rebuild [database_url]
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from .database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    bind = create_engine(sys.argv[2]) if len(sys.argv) > 2 else engine
+    with Session(bind) as db:
+        if command == "rebuild":
+            rebuild(db)
+            db.commit()
+            print("Rebuilt monthly_rollups")
+        elif command == "verify":
+            mismatches = verify(db)
+            for key, want, have in mismatches:
+                print(f"{key}: expected {want}, stored {have}")
+            print(f"{len(mismatches)} mismatched bucket(s)")
+            sys.exit(1 if mismatches else 0)
+        else:
+            sys.exit(f"Unknown command: {command}. Use verify or rebuild")
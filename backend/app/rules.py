@@ -0,0 +1,156 @@
+import re
+from collections import deque, namedtuple
+from functools import lru_cache
+from . import models
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# A user's categorization rules are compiled once per distinct rule set into a
+# single Aho-Corasick automaton over lower-cased text: substring rules add their
+# pattern, regex rules add the literal(s) any match must contain. A description is
+# scanned once however many rules there are; only regexes whose literal occurred
+# (or that have none) are then run. Candidates are checked in rule order (priority,
+# highest first) and the first whose type and amount range also fit picks the category.
+
+RuleSpec = namedtuple("RuleSpec", "pattern is_regex transaction_type min_amount max_amount category")
+
+class Automaton:
+    def __init__(self, words):
+        # words: (lower-cased word, rule index) pairs
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [set()]
+        for word, index in words:
+            node = 0
+            for char in word:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(set())
+                    self.goto[node][char] = child
+                node = child
+            self.out[node].add(index)
+        # Breadth-first, so a node's failure link is final before its children need it
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.out[child] |= self.out[self.fail[child]]
+
+    def search(self, text):
+        # Indexes of every word occurring anywhere in text
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+def required_literals(items):
+    # Strings of which at least one occurs in every match of a parsed regex, or None
+    # when there is no such set. Only mandatory top-level literal runs, groups and
+    # alternations are followed; the option with the longest shortest string is kept.
+    best = None
+
+    def consider(option):
+        nonlocal best
+        if option and all(option) and (best is None or min(map(len, option)) > min(map(len, best))):
+            best = option
+
+    run = []
+    for op, arg in list(items) + [(None, None)]:
+        if op is sre_parse.LITERAL:
+            run.append(chr(arg))
+            continue
+        consider(["".join(run).lower()] if run else None)
+        run = []
+        if op is sre_parse.SUBPATTERN:
+            consider(required_literals(arg[-1]))
+        elif op is sre_parse.BRANCH:
+            options = [required_literals(branch) for branch in arg[1]]
+            if all(options):
+                consider([literal for option in options for literal in option])
+    return best
+
+class Matcher:
+    def __init__(self, specs):
+        self.rules = specs
+        self.patterns = {}
+        self.always = set()
+        words = []
+        for index, spec in enumerate(specs):
+            if not spec.pattern:
+                self.always.add(index)
+            elif not spec.is_regex:
+                words.append((spec.pattern.lower(), index))
+            else:
+                self.patterns[index] = re.compile(spec.pattern, re.IGNORECASE)
+                literals = required_literals(sre_parse.parse(spec.pattern, re.IGNORECASE))
+                if literals is None:
+                    self.always.add(index)
+                else:
+                    words.extend((literal, index) for literal in literals)
+        self.automaton = Automaton(words)
+
+    def candidates(self, description):
+        # Rules that may match; regex rules among them still need their pattern run
+        return self.automaton.search((description or "").lower()) | self.always
+
+    def match(self, description, amount, transaction_type):
+        # Amount bounds apply to the magnitude, as clients see amounts
+        magnitude = abs(amount)
+        for index in sorted(self.candidates(description)):
+            rule = self.rules[index]
+            if index in self.patterns and not self.patterns[index].search(description or ""):
+                continue
+            if rule.transaction_type is not None and rule.transaction_type != transaction_type:
+                continue
+            if rule.min_amount is not None and magnitude < rule.min_amount:
+                continue
+            if rule.max_amount is not None and magnitude > rule.max_amount:
+                continue
+            return rule.category
+        return None
+
+    def apply(self, values):
+        # Sets values["category"] when a rule matches; returns whether it changed
+        category = self.match(values["description"], values["amount"], values["transaction_type"])
+        if category is None or category == values["category"]:
+            return False
+        values["category"] = category
+        return True
+
+@lru_cache(maxsize=128)
+def compile_rules(specs):
+    return Matcher(specs)
+
+def matcher_for(db, user_id: int):
+    # The user's rules in priority order, compiled (or taken from the cache when
+    # the rule set hasn't changed); None when the user has no rules
+    rows = db.query(
+        models.CategoryRule.pattern,
+        models.CategoryRule.is_regex,
+        models.CategoryRule.transaction_type,
+        models.CategoryRule.min_amount,
+        models.CategoryRule.max_amount,
+        models.CategoryRule.category
+    ).filter(models.CategoryRule.user_id == user_id).order_by(
+        models.CategoryRule.priority.desc(), models.CategoryRule.id
+    ).all()
+    if not rows:
+        return None
+    return compile_rules(tuple(RuleSpec(*row) for row in rows))
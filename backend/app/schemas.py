@@ -1,7 +1,10 @@
 from pydantic import BaseModel, validator
-from datetime import date
+import datetime as dt
+from datetime import date, datetime
+from decimal import Decimal
 from typing import Optional
 import re
+from . import money
 
 class UserBase(BaseModel):
     username: str
@@ -32,23 +35,31 @@ class User(UserBase):
     class Config:
         orm_mode = True
 
-class TransactionBase(BaseModel):
+class MoneyModel(BaseModel):
+    # Amounts are exact Decimals in Python but still plain numbers in JSON
+    class Config:
+        json_encoders = {Decimal: float}
+
+class TransactionBase(MoneyModel):
     date: date
-    amount: float
+    amount: Decimal
     transaction_type: str  # 'income' or 'expense'
     category: str
     description: str
 
     @validator('amount')
     def validate_and_adjust_amount(cls, v, values):
+        # Stored as whole cents, so round half up to two places first
+        v = money.to_decimal(v)
+
         # Check for zero amount
         if v == 0:
             raise ValueError("Transaction amount cannot be zero")
             
         # Adjust amount based on transaction type
         if 'transaction_type' in values and values['transaction_type'] == 'expense':
-            return -abs(float(v))  # Make sure expense is negative
-        return abs(float(v))  # Make sure income is positive
+            return -abs(v)  # Make sure expense is negative
+        return abs(v)  # Make sure income is positive
 
 class TransactionCreate(TransactionBase):
     pass
@@ -56,10 +67,220 @@ class TransactionCreate(TransactionBase):
 class Transaction(TransactionBase):
     id: int
     user_id: int
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
+
+class TransactionBatchUpdate(BaseModel):
+    # Fields a batch edit may set; omitted fields are left as they are.
+    # dt.date because a bare `date` would resolve to this field's own default.
+    date: Optional[dt.date] = None
+    category: Optional[str] = None
+    description: Optional[str] = None
+
+class BatchResult(BaseModel):
+    affected: int
+
+class TransactionPage(BaseModel):
+    items: list[Transaction]
+    next_cursor: Optional[str] = None
+
+class TransactionSearchPage(TransactionPage):
+    total: int
+
+class TransactionChanges(BaseModel):
+    changed: list[Transaction]
+    deleted: list[int]
+    watermark: int
+
+class BulkImportError(BaseModel):
+    row: int
+    error: str
+
+class BulkImportResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: list[BulkImportError]
+
+class TransactionSummary(MoneyModel):
+    total_income: Decimal
+    total_expenses: Decimal
+    net_balance: Decimal
+
+class TimeseriesBucket(MoneyModel):
+    period: str
+    income: Decimal
+    expenses: Decimal
+    net: Decimal
+
+class CategoryTotal(MoneyModel):
+    category: str
+    total: Decimal
+    count: int
+
+class CategoryDayTotal(MoneyModel):
+    category: str
+    date: date
+    total: Decimal
+
+class CategoryBreakdown(BaseModel):
+    categories: list[CategoryTotal]
+    daily: list[CategoryDayTotal]
+
+class CategoryShare(MoneyModel):
+    category: str
+    total: Decimal
+    share: Optional[float] = None  # percent of the month's expenses
+
+class HealthReport(MoneyModel):
+    month: str
+    income: Decimal
+    expenses: Decimal
+    net: Decimal
+    expense_ratio: Optional[float] = None  # percent of income; None without income
+    savings_rate: Optional[float] = None
+    tier: str  # 'excellent', 'caution', 'alert' or 'no_income'
+    previous_month: str
+    income_change: Decimal
+    expenses_change: Decimal
+    net_change: Decimal
+    expense_ratio_change: Optional[float] = None  # percentage points
+    top_categories: list[CategoryShare]
+
+class CategoryRuleBase(MoneyModel):
+    pattern: str = ""
+    is_regex: bool = False
+    transaction_type: Optional[str] = None
+    min_amount: Optional[Decimal] = None
+    max_amount: Optional[Decimal] = None
+    category: str
+    priority: int = 0
+
+class CategoryRuleCreate(CategoryRuleBase):
+    @validator('transaction_type')
+    def validate_transaction_type(cls, v):
+        if v is not None and v not in ("income", "expense"):
+            raise ValueError("Transaction type must be income or expense")
+        return v
+
+    @validator('max_amount', always=True)
+    def validate_rule(cls, v, values):
+        # A rule without any condition would recategorize every transaction
+        if not values.get('pattern') and values.get('transaction_type') is None \
+                and values.get('min_amount') is None and v is None:
+            raise ValueError("A rule needs a pattern, a transaction type or an amount range")
+        if values.get('is_regex'):
+            try:
+                re.compile(values.get('pattern', ''))
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression: {e}")
+        return v
+
+class CategoryRule(CategoryRuleBase):
+    id: int
+    user_id: int
 
     class Config:
         orm_mode = True
 
+RECURRING_FREQUENCIES = ("daily", "weekly", "monthly", "yearly")
+
+class RecurringTransactionBase(MoneyModel):
+    amount: Decimal
+    transaction_type: str
+    category: str
+    description: str
+    frequency: str = "monthly"
+    interval: int = 1
+    start_date: date
+    end_date: Optional[date] = None
+
+    @validator('amount')
+    def validate_amount(cls, v):
+        # Reported as a magnitude like transaction amounts; the sign comes from the type
+        v = money.to_decimal(v)
+        if v == 0:
+            raise ValueError("Transaction amount cannot be zero")
+        return abs(v)
+
+class RecurringTransactionCreate(RecurringTransactionBase):
+    @validator('transaction_type')
+    def validate_transaction_type(cls, v):
+        if v not in ("income", "expense"):
+            raise ValueError("Transaction type must be income or expense")
+        return v
+
+    @validator('frequency')
+    def validate_frequency(cls, v):
+        if v not in RECURRING_FREQUENCIES:
+            raise ValueError(f"Frequency must be one of: {', '.join(RECURRING_FREQUENCIES)}")
+        return v
+
+    @validator('interval')
+    def validate_interval(cls, v):
+        if v < 1:
+            raise ValueError("Interval must be at least 1")
+        return v
+
+    @validator('end_date')
+    def validate_end_date(cls, v, values):
+        if v is not None and 'start_date' in values and v < values['start_date']:
+            raise ValueError("End date must not be before the start date")
+        return v
+
+class RecurringTransaction(RecurringTransactionBase):
+    id: int
+    user_id: int
+    occurrences: int
+    next_date: Optional[date] = None
+
+    class Config:
+        orm_mode = True
+
+class BudgetBase(MoneyModel):
+    category: str
+    limit: Decimal
+    alert_percent: int = 80
+
+class BudgetCreate(BudgetBase):
+    @validator('limit')
+    def validate_limit(cls, v):
+        v = money.to_decimal(v)
+        if v <= 0:
+            raise ValueError("Budget limit must be positive")
+        return v
+
+    @validator('alert_percent')
+    def validate_alert_percent(cls, v):
+        if not 1 <= v <= 100:
+            raise ValueError("Alert percent must be between 1 and 100")
+        return v
+
+class Budget(BudgetBase):
+    id: int
+    user_id: int
+
+    class Config:
+        orm_mode = True
+
+class BudgetStatus(MoneyModel):
+    category: str
+    month: str
+    limit: Decimal
+    spent: Decimal
+    remaining: Decimal
+    percent: float
+    status: str  # 'ok', 'warning' (at alert_percent) or 'exceeded'
+
+class TransactionWrite(Transaction):
+    # Budgets this create/update pushed past their alert level or limit
+    budget_alerts: list[BudgetStatus] = []
+
+class BatchWrite(BatchResult):
+    # Budgets this batch update or rules run pushed past their alert level or limit
+    budget_alerts: list[BudgetStatus] = []
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -0,0 +1,43 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from . import models
+
+# Change sequence for delta sync. A write transaction takes the next value of the
+# one-row change_counter on its first write and stamps it on every transaction row
+# and tombstone it writes. Taking it is an UPDATE, so it happens under SQLite's write
+# lock, which is held until commit: transactions commit in sequence order, and a row
+# committed after a reader saw sequence N always carries a higher one. A clock
+# watermark has no such order, since rows can be stamped before the lock is taken
+# (apply_rules stamps a batch before writing it) and commit after a later stamp.
+
+SEQUENCE = "change_seq"
+
+def sequence(db):
+    # The sequence of db's current write transaction, taken on first use
+    seq = db.info.get(SEQUENCE)
+    if seq is None:
+        counter = models.ChangeCounter.__table__
+        seq = db.execute(
+            counter.update().values(value=counter.c.value + 1).returning(counter.c.value)
+        ).scalar_one()
+        db.info[SEQUENCE] = seq
+    return seq
+
+def last_sequence(db):
+    # The highest sequence committed so far
+    return db.query(models.ChangeCounter.value).scalar() or 0
+
+@event.listens_for(Session, "before_flush")
+def _stamp_flushed_rows(session, flush_context, instances):
+    # ORM writes (single creates, updates, tombstones) are stamped here; crud stamps
+    # the rows of its bulk and batch statements itself
+    for instance in list(session.new) + list(session.dirty):
+        if isinstance(instance, (models.Transaction, models.DeletedTransaction)) and (
+            instance in session.new or session.is_modified(instance)
+        ):
+            instance.change_seq = sequence(session)
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _end_sequence(session):
+    session.info.pop(SEQUENCE, None)
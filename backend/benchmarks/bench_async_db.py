@@ -0,0 +1,80 @@
+"""Request throughput of the async (aiosqlite) endpoints vs the threadpool-backed sync ones.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_async_db [--rows 100000] [--concurrency 1 4 8 16]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app import async_api, auth, schemas
+from app.database import create_async_session_factory, get_async_db, get_db, get_read_db
+from app.main import app as sync_app
+from .common import make_engine, seed_transactions, seed_user
+
+async def drive(app, concurrency, requests_per_worker):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for i in range(requests_per_worker):
+                path = "/transactions/summary" if i % 2 else "/transactions/?cursor=&limit=50"
+                response = await client.get(path)
+                assert response.status_code == 200, response.text
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--requests", type=int, default=20, help="requests per concurrent client")
+    args = parser.parse_args()
+
+    engine, session_factory, path = make_engine()
+    try:
+        user_id = seed_user(session_factory)
+        seed_transactions(engine, user_id, args.rows)
+        user = schemas.User(id=user_id, username="bench", email="bench@example.com")
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async_engine, async_session_factory = create_async_session_factory(f"sqlite+aiosqlite:///{path}")
+
+        async def override_get_async_db():
+            async with async_session_factory() as db:
+                yield db
+
+        sync_app.dependency_overrides[get_db] = override_get_db
+        sync_app.dependency_overrides[get_read_db] = override_get_db
+        sync_app.dependency_overrides[auth.get_current_user] = lambda: user
+        async_app = FastAPI()
+        async_app.include_router(async_api.router)
+        async_app.dependency_overrides[get_async_db] = override_get_async_db
+        async_app.dependency_overrides[auth.get_current_user_async] = lambda: user
+
+        print(f"--- {args.rows} transactions, {args.requests} requests per client")
+        for concurrency in args.concurrency:
+            total = concurrency * args.requests
+            for label, app in [("sync + threadpool", sync_app), ("async + aiosqlite", async_app)]:
+                seconds = asyncio.run(drive(app, concurrency, args.requests))
+                print(f"{label:<20} concurrency {concurrency:3d}: {total / seconds:8.1f} req/s")
+        sync_app.dependency_overrides.clear()
+        asyncio.run(async_engine.dispose())
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Authenticated request throughput with and without the token cache.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_auth [--requests 2000]
+"""
+import argparse
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from app import auth, crud, schemas
+from app.database import get_db, get_read_db
+from app.main import app
+from .common import make_engine
+
+MODES = [
+    ("no cache (lookup per request)", 0, False),
+    ("token cache", 1024, False),
+    ("trusted token claims, no cache", 0, True),
+]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    engine, session_factory, path = make_engine()
+    try:
+        db = session_factory()
+        user = crud.create_user(db, schemas.UserCreate(username="bench", email="bench@example.com", password="BenchPass1!"))
+        token = auth.create_access_token({"sub": user.username, "uid": user.id, "email": user.email})
+        db.close()
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_read_db] = override_get_db
+        client = TestClient(app)
+        headers = {"Authorization": f"Bearer {token}"}
+
+        for label, cache_size, trust_claims in MODES:
+            auth.token_cache = auth.TokenCache(cache_size, auth.AUTH_CACHE_TTL_SECONDS)
+            auth.AUTH_TRUST_TOKEN_CLAIMS = trust_claims
+            client.get("/users/me", headers=headers)
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                client.get("/users/me", headers=headers)
+            seconds = time.perf_counter() - started
+            print(f"{label:<40} {args.requests / seconds:10.0f} req/s")
+        app.dependency_overrides.clear()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Budget-vs-actual status: rollup lookups vs summing the month's transactions.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_budgets [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+
+from sqlalchemy import func
+
+from app import crud, models, schemas
+from .common import EXPENSE_CATEGORIES, make_engine, measure, report, seed_transactions, seed_user
+
+def summed_status(db, user_id, month):
+    # Baseline: re-sum each budgeted category's expenses for the month
+    start, end = crud.month_range(month)
+    spent = {}
+    for budget in crud.get_budgets(db, user_id):
+        spent[budget.category] = -(db.query(func.sum(models.Transaction.amount)).filter(
+            models.Transaction.user_id == user_id,
+            models.Transaction.transaction_type == "expense",
+            models.Transaction.category == budget.category,
+            models.Transaction.date >= start,
+            models.Transaction.date <= end
+        ).scalar() or 0)
+    return spent
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        engine, session_factory, path = make_engine()
+        try:
+            user_id = seed_user(session_factory)
+            seed_transactions(engine, user_id, size)
+            db = session_factory()
+            for category in EXPENSE_CATEGORIES:
+                crud.set_budget(db, schemas.BudgetCreate(category=category, limit=1000), user_id)
+            print(f"--- {size} transactions, {len(EXPENSE_CATEGORIES)} budgets")
+            seconds, status = measure(lambda: crud.get_budget_status(db, user_id, "2020-06"), args.repeat)
+            report("budget status from rollups", seconds)
+            seconds, spent = measure(lambda: summed_status(db, user_id, "2020-06"), args.repeat)
+            report("sum transactions per budget", seconds)
+            assert {s["category"]: s["spent"] for s in status} == spent
+            seconds, _ = measure(lambda: crud.create_user_transaction(db, schemas.TransactionCreate(
+                date="2020-06-15", amount=12.5, transaction_type="expense", category="Food", description="Lunch"
+            ), user_id), args.repeat)
+            report("create transaction (with budget check)", seconds)
+            db.close()
+        finally:
+            engine.dispose()
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Bulk import throughput: per-row POST /transactions/ vs POST /transactions/bulk.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_bulk_import [--rows 100000]
+"""
+import argparse
+import json
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+from app import auth, crud, importers, schemas
+from app.database import get_db
+from app.main import app
+from .common import make_engine, report, seed_user, transaction_rows
+
+def as_payload(row):
+    return {
+        "date": row["date"].isoformat(),
+        "amount": abs(row["amount"]),
+        "transaction_type": row["transaction_type"],
+        "category": row["category"],
+        "description": row["description"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--single-rows", type=int, default=1000, help="rows to time through the per-row endpoint")
+    args = parser.parse_args()
+
+    engine, session_factory, path = make_engine()
+    try:
+        user_id = seed_user(session_factory)
+        payload = [as_payload(row) for row in transaction_rows(user_id, args.rows)]
+        print(f"--- {args.rows} rows")
+
+        # crud layer only: validation + executemany
+        db = session_factory()
+        started = time.perf_counter()
+        for start in range(0, len(payload), importers.CHUNK_SIZE):
+            transactions = [schemas.TransactionCreate(**row) for row in payload[start:start + importers.CHUNK_SIZE]]
+            crud.bulk_create_user_transactions(db, transactions, user_id)
+        seconds = time.perf_counter() - started
+        db.close()
+        report("crud validate + bulk insert", seconds)
+        print(f"{'':<48} {args.rows / seconds:10.0f} rows/s")
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[auth.get_current_user] = lambda: schemas.User(
+            id=user_id, username="bench", email="bench@example.com"
+        )
+        client = TestClient(app)
+
+        body = "\n".join(json.dumps(row) for row in payload)
+        started = time.perf_counter()
+        response = client.post(
+            "/transactions/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}
+        )
+        seconds = time.perf_counter() - started
+        assert response.json()["inserted"] == args.rows, response.text
+        report("POST /transactions/bulk (ndjson)", seconds)
+        print(f"{'':<48} {args.rows / seconds:10.0f} rows/s")
+
+        rows = payload[:args.single_rows]
+        started = time.perf_counter()
+        for row in rows:
+            client.post("/transactions/", json=row)
+        seconds = time.perf_counter() - started
+        report(f"POST /transactions/ x {len(rows)}", seconds)
+        print(f"{'':<48} {len(rows) / seconds:10.0f} rows/s")
+        app.dependency_overrides.clear()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
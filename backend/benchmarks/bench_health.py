@@ -0,0 +1,51 @@
+"""GET /analytics/health: cached report vs computing it from rollups vs from raw rows.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_health [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+
+from app import crud, health, models
+from .common import make_engine, measure, report, seed_transactions, seed_user
+
+def ledger_report(db, user_id, month):
+    # Baseline: what the Analysis page did, load the user's rows and total the month in Python
+    rows = db.query(models.Transaction.date, models.Transaction.amount, models.Transaction.transaction_type).filter(
+        models.Transaction.user_id == user_id
+    ).all()
+    income = sum(amount for day, amount, kind in rows if kind == "income" and day.strftime("%Y-%m") == month)
+    expenses = -sum(amount for day, amount, kind in rows if kind == "expense" and day.strftime("%Y-%m") == month)
+    return health.tier(health.percent(expenses, income))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    month = "2020-06"
+    for size in args.sizes:
+        engine, session_factory, path = make_engine()
+        try:
+            user_id = seed_user(session_factory)
+            seed_transactions(engine, user_id, size)
+            db = session_factory()
+            print(f"--- {size} transactions")
+            seconds, computed = measure(lambda: health.compute(db, user_id, month), args.repeat)
+            report("computed from rollups", seconds)
+            health.health_cache.clear()
+            crud.get_health_report(db, user_id, month)
+            seconds, _ = measure(lambda: crud.get_health_report(db, user_id, month), args.repeat)
+            report("cached", seconds)
+            seconds, tier = measure(lambda: ledger_report(db, user_id, month), 1)
+            report("raw rows + python (tier only)", seconds)
+            assert tier == computed["tier"]
+            db.close()
+        finally:
+            engine.dispose()
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Latency of an unrelated endpoint while a burst of logins is in flight.
+
+Compares /token verifying bcrypt inline on the event loop with the
+bounded password-hash executor. Run from the backend directory:
+
+    python -m benchmarks.bench_login_concurrency [--logins 12]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import httpx
+
+from app import auth, crud, schemas
+from app.database import get_db
+from app.main import app
+from .common import make_engine
+
+async def inline_authenticate(db, username, password):
+    # The pre-offload behaviour: bcrypt runs directly on the event loop
+    return auth.authenticate_user(db, username, password)
+
+async def run_burst(logins):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login():
+            response = await client.post("/token", data={"username": "bench", "password": "BenchPass1!"})
+            assert response.status_code == 200, response.text
+
+        async def ping_until(done):
+            latencies = []
+            while not done.done():
+                started = time.perf_counter()
+                await client.get("/")
+                latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+            return latencies
+
+        started = time.perf_counter()
+        logins_done = asyncio.ensure_future(asyncio.gather(*[login() for _ in range(logins)]))
+        latencies = await ping_until(logins_done)
+        await logins_done
+        return time.perf_counter() - started, latencies
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=12)
+    args = parser.parse_args()
+
+    engine, session_factory, path = make_engine()
+    try:
+        db = session_factory()
+        crud.create_user(db, schemas.UserCreate(username="bench", email="bench@example.com", password="BenchPass1!"))
+        db.close()
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        offloaded = auth.authenticate_user_async
+        for label, authenticate in [("inline bcrypt", inline_authenticate), ("executor bcrypt", offloaded)]:
+            auth.authenticate_user_async = authenticate
+            total, latencies = asyncio.run(run_burst(args.logins))
+            print(
+                f"{label:<18} {args.logins} logins in {total:6.2f}s | {len(latencies):4d} x GET / "
+                f"p50 {statistics.median(latencies) * 1000:8.2f} ms, max {max(latencies) * 1000:8.2f} ms"
+            )
+        auth.authenticate_user_async = offloaded
+        app.dependency_overrides.clear()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Per-page latency of OFFSET vs keyset pagination at increasing depth.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_pagination [--rows 1000000] [--pages 1 100 1000 10000]
+"""
+import argparse
+import os
+
+from app import crud
+from .common import make_engine, measure, report, seed_transactions, seed_user
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, session_factory, path = make_engine()
+    try:
+        user_id = seed_user(session_factory)
+        seed_transactions(engine, user_id, args.rows)
+        db = session_factory()
+        print(f"--- {args.rows} transactions, {args.page_size} per page")
+        for page in args.pages:
+            skip = (page - 1) * args.page_size
+            if skip >= args.rows:
+                continue
+            seconds, _ = measure(
+                lambda: crud.get_transactions(db, user_id, skip=skip, limit=args.page_size), args.repeat
+            )
+            report(f"offset page {page}", seconds)
+
+            # The cursor a client would hold after reading the previous page
+            cursor = None
+            if skip:
+                previous = crud.get_transactions(db, user_id, skip=skip - 1, limit=1)[0]
+                cursor = crud.encode_cursor(previous)
+            seconds, _ = measure(
+                lambda: crud.get_transactions_page(db, user_id, cursor=cursor, limit=args.page_size), args.repeat
+            )
+            report(f"keyset page {page}", seconds)
+        db.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Catching up on recurring transactions after downtime: batched vs one commit per occurrence.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_recurring [--templates 1000] [--months 24]
+"""
+import argparse
+import os
+import time
+from datetime import date
+
+from app import crud, models, recurring, schemas
+from .common import make_engine, seed_user
+
+def seed_templates(session_factory, user_id, count, months):
+    db = session_factory()
+    start = date(2024, 1, 1)
+    for i in range(count):
+        crud.create_recurring_transaction(db, schemas.RecurringTransactionCreate(
+            amount=10 + i % 90, transaction_type="expense", category="Utilities",
+            description=f"Subscription {i}", frequency="monthly", start_date=start
+        ), user_id)
+    db.close()
+    return date(start.year + (months - 1) // 12, (months - 1) % 12 + 1, 1)
+
+def one_by_one(db, today):
+    # Baseline: post each due occurrence through create_user_transaction (a commit each)
+    posted = 0
+    templates = db.query(models.RecurringTransaction).filter(models.RecurringTransaction.next_date <= today).all()
+    for template in templates:
+        for day in recurring.due_dates(template, today):
+            crud.create_user_transaction(db, schemas.TransactionCreate(
+                date=day, amount=template.amount, transaction_type=template.transaction_type,
+                category=template.category, description=template.description
+            ), template.user_id)
+            posted += 1
+    db.commit()
+    return posted
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--templates", type=int, default=1000)
+    parser.add_argument("--months", type=int, default=24)
+    args = parser.parse_args()
+
+    print(f"--- {args.templates} monthly templates, {args.months} months of downtime")
+    for label, post in [("batched materialize_due", recurring.materialize_due), ("one commit per occurrence", one_by_one)]:
+        engine, session_factory, path = make_engine()
+        try:
+            user_id = seed_user(session_factory)
+            today = seed_templates(session_factory, user_id, args.templates, args.months)
+            db = session_factory()
+            started = time.perf_counter()
+            posted = post(db, today)
+            seconds = time.perf_counter() - started
+            print(f"{label:<32} {posted:8d} posted {seconds:10.2f} s")
+            db.close()
+        finally:
+            engine.dispose()
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
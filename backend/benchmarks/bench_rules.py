@@ -0,0 +1,70 @@
+"""Categorization rule matching: combined matcher vs checking rules one by one.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_rules [--rows 10000] [--rules 10 100 1000]
+"""
+import argparse
+import random
+import re
+from decimal import Decimal
+
+from app.rules import Matcher, RuleSpec
+from .common import measure, report
+from .bench_search import COMMON_MERCHANTS, WORDS, merchant_names
+
+def make_rules(merchants, count, rng):
+    # Mostly substrings, every tenth rule a regex, a few with amount bounds
+    specs = []
+    for index, merchant in enumerate(merchants[:count]):
+        if index % 10 == 9:
+            specs.append(RuleSpec(rf"\b{merchant.lower()}\b", True, None, None, None, f"Category {index}"))
+        else:
+            low = Decimal(rng.randrange(100)) if index % 7 == 0 else None
+            specs.append(RuleSpec(merchant.lower(), False, "expense", low, None, f"Category {index}"))
+    return tuple(specs)
+
+def naive_match(specs, compiled, description, amount, transaction_type):
+    # Baseline: test every rule in order against the description
+    text = description.lower()
+    magnitude = abs(amount)
+    for spec, pattern in zip(specs, compiled):
+        if pattern is not None:
+            if not pattern.search(description):
+                continue
+        elif spec.pattern not in text:
+            continue
+        if spec.transaction_type is not None and spec.transaction_type != transaction_type:
+            continue
+        if spec.min_amount is not None and magnitude < spec.min_amount:
+            continue
+        return spec.category
+    return None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    merchants = merchant_names(max(args.rules) + 2000, rng)
+    rows = [
+        (f"{rng.choice(COMMON_MERCHANTS + merchants)} {rng.choice(WORDS)} #{rng.randrange(100000)}",
+         Decimal(-rng.randrange(1, 50000)) / 100, "expense")
+        for _ in range(args.rows)
+    ]
+    for count in args.rules:
+        specs = make_rules(merchants, count, rng)
+        print(f"--- {count} rules, {args.rows} descriptions")
+        seconds, matcher = measure(lambda: Matcher(specs), 1)
+        report("compile combined matcher", seconds)
+        seconds, hits = measure(lambda: sum(matcher.match(*row) is not None for row in rows), args.repeat)
+        report(f"combined matcher ({hits} matched)", seconds)
+        compiled = [re.compile(spec.pattern, re.IGNORECASE) if spec.is_regex else None for spec in specs]
+        seconds, hits = measure(lambda: sum(naive_match(specs, compiled, *row) is not None for row in rows), args.repeat)
+        report(f"rule-by-rule ({hits} matched)", seconds)
+
+if __name__ == "__main__":
+    main()
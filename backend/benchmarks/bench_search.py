@@ -0,0 +1,78 @@
+"""Full-text (FTS5) search vs LIKE substring search over transaction descriptions.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_search [--rows 1000000] [--users 10]
+"""
+import argparse
+import os
+import random
+
+from app import crud, models, rollups
+from .common import make_engine, measure, report, seed_user, transaction_rows
+
+# A long tail of merchants, a few of them very common, plus free-form reference numbers
+COMMON_MERCHANTS = ["Amazon", "Walmart", "Starbucks", "Uber", "Netflix"]
+SYLLABLES = ["ka", "lo", "mi", "ter", "zon", "bra", "vel", "qui", "dor", "sen", "pha", "rix"]
+WORDS = ["order", "payment", "refund", "subscription", "store", "market", "online", "ride", "coffee", "fuel"]
+
+def merchant_names(count, rng):
+    names = set()
+    while len(names) < count:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(names)
+
+def seed_descriptions(engine, user_ids, rows, seed=7, batch_size=50000):
+    rng = random.Random(seed)
+    merchants = merchant_names(2000, rng)
+    table = models.Transaction.__table__
+    per_user = rows // len(user_ids)
+    with engine.begin() as connection:
+        for user_id in user_ids:
+            batch = []
+            for row in transaction_rows(user_id, per_user, seed=user_id):
+                merchant = rng.choice(COMMON_MERCHANTS) if rng.random() < 0.2 else rng.choice(merchants)
+                row["description"] = f"{merchant} {rng.choice(WORDS)} #{rng.randrange(100000)}"
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    connection.execute(table.insert(), batch)
+                    batch = []
+            if batch:
+                connection.execute(table.insert(), batch)
+        rollups.rebuild(connection)
+    return merchants
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine, session_factory, path = make_engine()
+    try:
+        user_ids = [seed_user(session_factory, f"bench{i}") for i in range(args.users)]
+        merchants = seed_descriptions(engine, user_ids, args.rows)
+        db = session_factory()
+        user_id = user_ids[0]
+        rare = merchants[len(merchants) // 2]
+        print(f"--- {args.rows} transactions across {args.users} users, first page of 100")
+        for label, text in [
+            (f"rare merchant '{rare}'", rare),
+            (f"prefix '{rare[:4].lower()}'", rare[:4].lower()),
+            ("common merchant 'amazon'", "amazon"),
+            ("two words 'amazon refund'", "amazon refund"),
+        ]:
+            seconds, (items, _, total) = measure(lambda: crud.search_transactions(db, user_id, q=text), args.repeat)
+            report(f"fts {label} ({total} hits)", seconds)
+            seconds, (items, _, total) = measure(
+                lambda: crud.search_transactions(db, user_id, description=text), args.repeat
+            )
+            report(f"like {label} ({total} hits)", seconds)
+        db.close()
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Mixed read/write throughput with the default SQLite settings vs the performance profile.
+
+Writers add single transactions (one commit each, like POST /transactions/),
+readers fetch the first page and the summary (like the dashboard). Run from
+the backend directory:
+
+    python -m benchmarks.bench_sqlite_profile [--rows 100000] [--seconds 5]
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, database, schemas
+from app.database import Base
+from .common import seed_transactions, seed_user
+
+def build(profile, path):
+    url = f"sqlite:///{path}"
+    if profile == "baseline":
+        # What database.py used to create: default journal, pool and pragmas
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        return engine, engine
+    engine = database.create_sqlite_engine(url, profile="performance")
+    Base.metadata.create_all(bind=engine)
+    return engine, database.create_sqlite_engine(url, profile="performance", read_only=True)
+
+def run(profile, rows, seconds, writers, readers):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    setup_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=setup_engine)
+    setup_sessions = sessionmaker(bind=setup_engine)
+    user_id = seed_user(setup_sessions)
+    seed_transactions(setup_engine, user_id, rows)
+    setup_engine.dispose()
+
+    write_engine, read_engine = build(profile, path)
+    WriteSession = sessionmaker(autocommit=False, autoflush=False, bind=write_engine)
+    ReadSession = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        transaction = schemas.TransactionCreate(
+            date=date(2024, 1, 1), amount=12.5, transaction_type="expense", category="Food", description="Bench"
+        )
+        while time.perf_counter() < deadline:
+            db = WriteSession()
+            try:
+                crud.create_user_transaction(db, transaction, user_id)
+                bump("writes")
+            except OperationalError:
+                bump("errors")
+            finally:
+                db.close()
+
+    def reader():
+        i = 0
+        while time.perf_counter() < deadline:
+            db = ReadSession()
+            try:
+                if i % 2:
+                    crud.get_transaction_summary(db, user_id, start_date=date(2023, 1, 1), end_date=date(2023, 12, 31))
+                else:
+                    crud.get_transactions_page(db, user_id, limit=50)
+                bump("reads")
+            except OperationalError:
+                bump("errors")
+            finally:
+                db.close()
+            i += 1
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    write_engine.dispose()
+    if read_engine is not write_engine:
+        read_engine.dispose()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    print(
+        f"{profile:<12} reads {counts['reads'] / seconds:8.1f}/s  writes {counts['writes'] / seconds:8.1f}/s  "
+        f"errors {counts['errors']}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"--- {args.rows} rows, {args.writers} writers, {args.readers} readers, {args.seconds}s")
+    for profile in ("baseline", "performance"):
+        run(profile, args.rows, args.seconds, args.writers, args.readers)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Latency of /transactions/summary aggregation at 10k, 100k and 1M rows per user.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_summary [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+from datetime import date
+
+from app import crud, models
+from .common import make_engine, measure, report, seed_transactions, seed_user
+
+def python_summary(db, user_id):
+    # What the endpoint used to do, minus the 100 row cap
+    transactions = db.query(models.Transaction).filter(models.Transaction.user_id == user_id).all()
+    total_income = sum(t.amount for t in transactions if t.transaction_type == "income")
+    total_expenses = abs(sum(t.amount for t in transactions if t.transaction_type == "expense"))
+    return total_income, total_expenses
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-python", action="store_true", help="skip the ORM + Python sum baseline")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        engine, session_factory, path = make_engine()
+        try:
+            user_id = seed_user(session_factory)
+            seed_transactions(engine, user_id, size)
+            db = session_factory()
+            print(f"--- {size} transactions")
+            seconds, _ = measure(lambda: crud.get_transaction_summary(db, user_id), args.repeat)
+            report("sql summary (all rows)", seconds)
+            seconds, _ = measure(
+                lambda: crud.get_transaction_summary(db, user_id, start_date=date(2020, 1, 1), end_date=date(2020, 12, 31)),
+                args.repeat
+            )
+            report("sql summary (one year)", seconds)
+            seconds, _ = measure(lambda: crud.get_transaction_summary(db, user_id, category="Food"), args.repeat)
+            report("sql summary (one category)", seconds)
+            if not args.skip_python:
+                seconds, _ = measure(lambda: python_summary(db, user_id), 1)
+                report("orm rows + python sum", seconds)
+            db.close()
+        finally:
+            engine.dispose()
+            os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models, rollups
+from app.database import Base
+
+INCOME_CATEGORIES = ["Salary", "Freelance", "Investments"]
+EXPENSE_CATEGORIES = ["Food", "Transportation", "Housing", "Utilities", "Shopping", "Entertainment"]
+DESCRIPTIONS = ["Amazon order", "Grocery store", "Monthly rent", "Coffee", "Uber ride", "Netflix", "Paycheck"]
+
+def make_engine(path=None):
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine), path
+
+def seed_user(session_factory, username="bench"):
+    db = session_factory()
+    try:
+        user = models.User(username=username, email=f"{username}@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        return user.id
+    finally:
+        db.close()
+
+def transaction_rows(user_id, count, seed=42, start=date(2015, 1, 1), days=3650):
+    rng = random.Random(seed)
+    for _ in range(count):
+        is_income = rng.random() < 0.2
+        amount = round(rng.uniform(1, 5000 if is_income else 500), 2)
+        yield {
+            "user_id": user_id,
+            "date": start + timedelta(days=rng.randrange(days)),
+            "amount": amount if is_income else -amount,
+            "transaction_type": "income" if is_income else "expense",
+            "category": rng.choice(INCOME_CATEGORIES if is_income else EXPENSE_CATEGORIES),
+            "description": rng.choice(DESCRIPTIONS),
+        }
+
+def seed_transactions(engine, user_id, count, batch_size=50000, seed=42):
+    table = models.Transaction.__table__
+    batch = []
+    with engine.begin() as connection:
+        for row in transaction_rows(user_id, count, seed=seed):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                connection.execute(table.insert(), batch)
+                batch = []
+        if batch:
+            connection.execute(table.insert(), batch)
+        rollups.rebuild(connection, user_id)
+
+def measure(fn, repeat=5):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), result
+
+def report(label, seconds):
+    print(f"{label:<48} {seconds * 1000:10.2f} ms")
@@ -3,12 +3,15 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy.orm import Session
-from app import crud, models, schemas
+from app import crud, health, models, money, rollups, schemas
 from app.database import Base
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
+import itertools
 import pytest
 from datetime import date, datetime, timedelta
+from decimal import Decimal
+from hypothesis import HealthCheck, given, settings, strategies as st
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
@@ -17,6 +20,7 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 @pytest.fixture(autouse=True)
 def setup_database():
     Base.metadata.create_all(bind=engine)
+    health.health_cache.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -215,3 +219,640 @@ def test_password_validation(db: Session):
     )
     assert user.password == "Password1!"
 
+
+def test_get_transaction_summary_covers_all_rows(db: Session, test_user):
+    # More rows than the default page size of get_transactions
+    for i in range(150):
+        transaction = schemas.TransactionCreate(
+            date=date.today() - timedelta(days=i % 30),
+            amount=10.0,
+            transaction_type="income" if i % 3 == 0 else "expense",
+            category="Salary" if i % 3 == 0 else "Food",
+            description="Test"
+        )
+        crud.create_user_transaction(db, transaction, test_user.id)
+
+    summary = crud.get_transaction_summary(db, test_user.id)
+    assert summary["total_income"] == 500.0
+    assert summary["total_expenses"] == 1000.0
+    assert summary["net_balance"] == -500.0
+
+def test_get_transaction_summary_filters(db: Session, test_user):
+    rows = [
+        (date.today(), 1000.0, "income", "Salary"),
+        (date.today(), 200.0, "expense", "Food"),
+        (date.today(), 50.0, "expense", "Transport"),
+        (date.today() - timedelta(days=40), 300.0, "expense", "Food"),
+    ]
+    for d, amount, transaction_type, category in rows:
+        transaction = schemas.TransactionCreate(
+            date=d,
+            amount=amount,
+            transaction_type=transaction_type,
+            category=category,
+            description="Test"
+        )
+        crud.create_user_transaction(db, transaction, test_user.id)
+
+    recent = crud.get_transaction_summary(db, test_user.id, start_date=date.today() - timedelta(days=7))
+    assert recent["total_income"] == 1000.0
+    assert recent["total_expenses"] == 250.0
+
+    food = crud.get_transaction_summary(db, test_user.id, category="Food")
+    assert food["total_income"] == 0
+    assert food["total_expenses"] == 500.0
+    assert food["net_balance"] == -500.0
+
+    old = crud.get_transaction_summary(db, test_user.id, end_date=date.today() - timedelta(days=30))
+    assert old["total_expenses"] == 300.0
+
+def test_bulk_create_user_transactions(db: Session, test_user):
+    transactions = [
+        schemas.TransactionCreate(date=date(2024, 1, i), amount=amount, transaction_type=transaction_type,
+                                  category="Test", description="Bulk")
+        for i, (amount, transaction_type) in enumerate([(20.0, "expense"), (-30.0, "income"), (5.0, "expense")], start=1)
+    ]
+    assert crud.bulk_create_user_transactions(db, transactions, test_user.id) == 3
+    assert crud.bulk_create_user_transactions(db, [], test_user.id) == 0
+
+    amounts = sorted(t.amount for t in crud.get_transactions(db, test_user.id))
+    assert amounts == [-20.0, -5.0, 30.0]
+
+    # The bulk path binds precomputed cents, rounded like the Money column
+    crud.insert_transaction_rows(db, [{
+        "date": date(2024, 2, 1), "amount": Decimal("-0.285"), "transaction_type": "expense",
+        "category": "Test", "description": "Half cent", "user_id": test_user.id
+    }])
+    db.commit()
+    assert db.execute(text("SELECT amount_cents FROM transactions WHERE description = 'Half cent'")).scalar_one() == -29
+
+# Money Tests
+property_users = itertools.count()
+cents = st.decimals(min_value=Decimal("0.01"), max_value=Decimal("10000000"), places=2)
+
+@given(cents)
+def test_money_round_trips_through_cents(amount):
+    assert money.from_cents(money.to_cents(amount)) == amount
+    assert money.from_cents(money.to_cents(-amount)) == -amount
+    assert money.to_cents(float(amount)) == money.to_cents(amount)
+
+def test_amounts_are_rounded_to_cents(db: Session, test_user):
+    transaction = schemas.TransactionCreate(
+        date=date(2024, 1, 1), amount=0.285, transaction_type="expense", category="Food", description="Half cent"
+    )
+    assert transaction.amount == Decimal("0.29")
+    db_transaction = crud.create_user_transaction(db, transaction, test_user.id)
+    assert db_transaction.amount == Decimal("-0.29")
+
+    # Bounds are rounded inwards: nothing lies strictly between 0.28 and 0.29
+    assert crud.get_transactions_by_amount_range(db, test_user.id, 0.285, 1) == [db_transaction]
+    assert crud.get_transactions_by_amount_range(db, test_user.id, 0.281, 0.289) == []
+
+@settings(max_examples=25, deadline=None, suppress_health_check=[HealthCheck.function_scoped_fixture])
+@given(st.lists(st.tuples(cents, st.sampled_from(["income", "expense"])), min_size=1, max_size=200))
+def test_summary_is_exact(db: Session, rows):
+    # Examples share one db session, so each gets a fresh user
+    name = f"prop{next(property_users)}"
+    user = models.User(username=name, email=f"{name}@example.com", hashed_password="x")
+    db.add(user)
+    db.flush()
+    transactions = [
+        schemas.TransactionCreate(date=date(2024, 1, 1 + i % 28), amount=amount, transaction_type=transaction_type,
+                                  category="Test", description="Property")
+        for i, (amount, transaction_type) in enumerate(rows)
+    ]
+    crud.bulk_create_user_transactions(db, transactions, user.id)
+
+    income = sum((amount for amount, transaction_type in rows if transaction_type == "income"), Decimal(0))
+    expenses = sum((amount for amount, transaction_type in rows if transaction_type == "expense"), Decimal(0))
+    # Whole month (rollup) and partial range (raw rows) must both be exact
+    for start_date, end_date in [(None, None), (date(2024, 1, 1), date(2024, 1, 30))]:
+        summary = crud.get_transaction_summary(db, user.id, start_date=start_date, end_date=end_date)
+        assert summary["total_income"] == income
+        assert summary["total_expenses"] == expenses
+        assert summary["net_balance"] == income - expenses
+
+def test_summary_does_not_drift_at_scale(db: Session, test_user):
+    # Summing 0.10 as floats 100k times ends up at 10000.000000018848
+    transactions = [
+        schemas.TransactionCreate(date=date(2024, 1, 1 + i % 28), amount=0.1, transaction_type="income",
+                                  category="Test", description="Dime")
+        for i in range(100000)
+    ]
+    crud.bulk_create_user_transactions(db, transactions, test_user.id)
+    assert crud.get_transaction_summary(db, test_user.id)["total_income"] == Decimal("10000.00")
+    assert crud.get_transaction_summary(db, test_user.id, end_date=date(2024, 1, 30))["total_income"] == Decimal("10000.00")
+    assert rollups.verify(db, test_user.id) == []
+
+def test_get_timeseries_buckets(db: Session, test_user):
+    rows = [
+        (date(2024, 3, 4), 1000.0, "income"),   # Monday
+        (date(2024, 3, 10), 40.0, "expense"),   # Sunday, same week
+        (date(2024, 3, 11), 60.0, "expense"),   # next Monday
+        (date(2024, 4, 1), 25.0, "expense"),
+    ]
+    for d, amount, transaction_type in rows:
+        transaction = schemas.TransactionCreate(
+            date=d, amount=amount, transaction_type=transaction_type, category="Test", description="Test"
+        )
+        crud.create_user_transaction(db, transaction, test_user.id)
+
+    months = crud.get_timeseries(db, test_user.id, "month")
+    assert months == [
+        {"period": "2024-03", "income": 1000.0, "expenses": 100.0, "net": 900.0},
+        {"period": "2024-04", "income": 0, "expenses": 25.0, "net": -25.0},
+    ]
+
+    weeks = crud.get_timeseries(db, test_user.id, "week")
+    assert [(b["period"], b["expenses"]) for b in weeks] == [
+        ("2024-03-04", 40.0), ("2024-03-11", 60.0), ("2024-04-01", 25.0)
+    ]
+
+    days = crud.get_timeseries(db, test_user.id, "day", start_date=date(2024, 3, 5), end_date=date(2024, 3, 31))
+    assert [b["period"] for b in days] == ["2024-03-10", "2024-03-11"]
+
+    with pytest.raises(ValueError):
+        crud.get_timeseries(db, test_user.id, "year")
+
+def test_get_category_breakdown(db: Session, test_user):
+    rows = [
+        (date(2024, 3, 1), 20.0, "expense", "Food"),
+        (date(2024, 3, 1), 5.0, "expense", "Food"),
+        (date(2024, 3, 2), 30.0, "expense", "Food"),
+        (date(2024, 3, 2), 100.0, "expense", "Housing"),
+        (date(2024, 3, 3), 1000.0, "income", "Salary"),
+        (date(2024, 4, 1), 70.0, "expense", "Food"),
+    ]
+    for d, amount, transaction_type, category in rows:
+        transaction = schemas.TransactionCreate(
+            date=d, amount=amount, transaction_type=transaction_type, category=category, description="Test"
+        )
+        crud.create_user_transaction(db, transaction, test_user.id)
+
+    start, end = crud.month_range("2024-03")
+    assert (start, end) == (date(2024, 3, 1), date(2024, 3, 31))
+    assert crud.month_range("2024-12")[1] == date(2024, 12, 31)
+
+    breakdown = crud.get_category_breakdown(db, test_user.id, start, end)
+    assert breakdown["categories"] == [
+        {"category": "Housing", "total": 100.0, "count": 1},
+        {"category": "Food", "total": 55.0, "count": 3},
+    ]
+    assert breakdown["daily"] == [
+        {"category": "Food", "date": date(2024, 3, 1), "total": 25.0},
+        {"category": "Food", "date": date(2024, 3, 2), "total": 30.0},
+        {"category": "Housing", "date": date(2024, 3, 2), "total": 100.0},
+    ]
+
+    income = crud.get_category_breakdown(db, test_user.id, transaction_type="income")
+    assert income["categories"] == [{"category": "Salary", "total": 1000.0, "count": 1}]
+
+    with pytest.raises(ValueError):
+        crud.month_range("March")
+
+# Rollup Tests
+def rollup_rows(db: Session, user_id: int):
+    rows = db.query(models.MonthlyRollup).filter(models.MonthlyRollup.user_id == user_id).all()
+    return sorted((row.month, row.transaction_type, row.category, row.total, row.count) for row in rows)
+
+def test_monthly_rollups_follow_writes(db: Session, test_user):
+    def create(d, amount, transaction_type, category):
+        return crud.create_user_transaction(db, schemas.TransactionCreate(
+            date=d, amount=amount, transaction_type=transaction_type, category=category, description="Test"
+        ), test_user.id)
+
+    lunch = create(date(2024, 3, 5), 20.0, "expense", "Food")
+    create(date(2024, 3, 9), 30.0, "expense", "Food")
+    create(date(2024, 3, 1), 1000.0, "income", "Salary")
+    assert rollup_rows(db, test_user.id) == [
+        ("2024-03", "expense", "Food", -50.0, 2),
+        ("2024-03", "income", "Salary", 1000.0, 1),
+    ]
+
+    # Moving a row to another month and category moves its amount between buckets
+    crud.update_transaction(db, lunch.id, schemas.TransactionCreate(
+        date=date(2024, 4, 2), amount=25.0, transaction_type="expense", category="Transport", description="Test"
+    ))
+    assert rollup_rows(db, test_user.id) == [
+        ("2024-03", "expense", "Food", -30.0, 1),
+        ("2024-03", "income", "Salary", 1000.0, 1),
+        ("2024-04", "expense", "Transport", -25.0, 1),
+    ]
+
+    crud.delete_transaction(db, lunch.id)
+    crud.bulk_create_user_transactions(db, [
+        schemas.TransactionCreate(date=date(2024, 3, 20), amount=5.0, transaction_type="expense", category="Food", description="Bulk"),
+        schemas.TransactionCreate(date=date(2024, 5, 1), amount=500.0, transaction_type="income", category="Salary", description="Bulk"),
+    ], test_user.id)
+    assert rollup_rows(db, test_user.id) == [
+        ("2024-03", "expense", "Food", -35.0, 2),
+        ("2024-03", "income", "Salary", 1000.0, 1),
+        ("2024-05", "income", "Salary", 500.0, 1),
+    ]
+    assert rollups.verify(db, test_user.id) == []
+
+    # Month-aligned summaries come from the rollup and agree with the raw rows
+    assert crud.get_transaction_summary(db, test_user.id, date(2024, 3, 1), date(2024, 3, 31)) == {
+        "total_income": 1000.0, "total_expenses": 35.0, "net_balance": 965.0
+    }
+    assert crud.get_transaction_summary(db, test_user.id, date(2024, 3, 2), date(2024, 3, 31))["total_income"] == 0
+    assert [b["period"] for b in crud.get_timeseries(db, test_user.id, "month")] == ["2024-03", "2024-05"]
+
+def test_rollup_verify_and_rebuild(db: Session, test_user):
+    crud.create_user_transaction(db, schemas.TransactionCreate(
+        date=date(2024, 3, 5), amount=20.0, transaction_type="expense", category="Food", description="Test"
+    ), test_user.id)
+    db.query(models.MonthlyRollup).update({"total": -99.0})
+    db.commit()
+
+    mismatches = rollups.verify(db)
+    assert mismatches == [((test_user.id, "2024-03", "expense", "Food"), (-20.0, 1), (-99.0, 1))]
+
+    rollups.rebuild(db)
+    db.commit()
+    assert rollups.verify(db) == []
+    assert rollup_rows(db, test_user.id) == [("2024-03", "expense", "Food", -20.0, 1)]
+
+def test_batch_writes_keep_rollups_in_step(db: Session, test_user):
+    for day, category in [(5, "Food"), (6, "Food"), (7, "Transport"), (8, "Food")]:
+        crud.create_user_transaction(db, schemas.TransactionCreate(
+            date=date(2024, 1, day), amount=10.0, transaction_type="expense", category=category, description="Test"
+        ), test_user.id)
+
+    statements = []
+    capture = lambda conn, cursor, statement, parameters, context, executemany: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        result = crud.batch_update_transactions(
+            db, test_user.id, {"category": "Dining", "date": date(2024, 2, 1)}, category="Food", end_date=date(2024, 1, 6)
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert result == {"affected": 2, "budget_alerts": []}
+    assert len([s for s in statements if s.lstrip().startswith("UPDATE transactions")]) == 1
+    assert rollups.verify(db, test_user.id) == []
+    assert rollup_rows(db, test_user.id) == [
+        ("2024-01", "expense", "Food", -10.0, 1),
+        ("2024-01", "expense", "Transport", -10.0, 1),
+        ("2024-02", "expense", "Dining", -20.0, 2),
+    ]
+
+    assert crud.batch_delete_transactions(db, test_user.id, transaction_type="expense", start_date=date(2024, 1, 1)) == 4
+    assert rollup_rows(db, test_user.id) == []
+    assert len(crud.get_changes(db, test_user.id, since=0)["deleted"]) == 4
+
+    with pytest.raises(ValueError):
+        crud.batch_delete_transactions(db, test_user.id)
+
+def test_month_span():
+    assert rollups.month_span() == (None, None)
+    assert rollups.month_span(date(2024, 2, 1), date(2024, 2, 29)) == ("2024-02", "2024-02")
+    assert rollups.month_span(date(2024, 2, 2)) is None
+    assert rollups.month_span(end_date=date(2024, 2, 28)) is None
+
+# Rules Tests
+def test_rules_apply_at_ingest_and_rerun(db: Session, test_user):
+    def transaction(description, amount=10.0, category="Other"):
+        return schemas.TransactionCreate(date=date(2024, 1, 5), amount=amount, transaction_type="expense",
+                                         category=category, description=description)
+
+    existing = crud.create_user_transaction(db, transaction("UBER trip"), test_user.id)
+    crud.create_rule(db, schemas.CategoryRuleCreate(pattern="uber", category="Transport"), test_user.id)
+    crud.create_rule(db, schemas.CategoryRuleCreate(pattern="^(netflix|hulu)", is_regex=True, category="Subscriptions"), test_user.id)
+    crud.create_rule(db, schemas.CategoryRuleCreate(pattern="uber eats", category="Food", priority=1), test_user.id)
+
+    assert crud.create_user_transaction(db, transaction("Uber Eats dinner"), test_user.id).category == "Food"
+    crud.bulk_create_user_transactions(db, [transaction("Netflix"), transaction("Corner shop", category="Food")], test_user.id)
+    categories = {t.description: t.category for t in crud.get_transactions(db, test_user.id)}
+    assert categories == {"UBER trip": "Other", "Uber Eats dinner": "Food", "Netflix": "Subscriptions", "Corner shop": "Food"}
+
+    assert crud.apply_rules(db, test_user.id, batch_size=2)["affected"] == 1
+    db.refresh(existing)
+    assert existing.category == "Transport"
+    assert crud.apply_rules(db, test_user.id)["affected"] == 0
+    assert rollups.verify(db, test_user.id) == []
+
+def test_budget_status_follows_writes(db: Session, test_user):
+    def expense(amount, category="Food", day=date(2024, 3, 5)):
+        return schemas.TransactionCreate(date=day, amount=amount, transaction_type="expense",
+                                         category=category, description="Shop")
+
+    crud.set_budget(db, schemas.BudgetCreate(category="Food", limit=100), test_user.id)
+    crud.set_budget(db, schemas.BudgetCreate(category="Dining", limit=50, alert_percent=50), test_user.id)
+    crud.set_budget(db, schemas.BudgetCreate(category="Food", limit=120), test_user.id)
+    assert [(b.category, b.limit) for b in crud.get_budgets(db, test_user.id)] == [("Dining", 50), ("Food", 120)]
+
+    crud.bulk_create_user_transactions(db, [expense(30), expense(30), expense(30, day=date(2024, 4, 1))], test_user.id)
+    first = crud.create_user_transaction(db, expense(40), test_user.id)
+    assert [(a["category"], a["status"]) for a in first.budget_alerts] == [("Food", "warning")]
+    status = {s["category"]: s for s in crud.get_budget_status(db, test_user.id, "2024-03")}
+    assert (status["Food"]["spent"], status["Food"]["remaining"], status["Food"]["percent"]) == (100, 20, 83.3)
+    assert status["Dining"]["spent"] == 0
+
+    # Moving spend to another category can only alert for that one
+    moved = crud.update_transaction(db, first.id, expense(60, category="Dining"))
+    assert [(a["category"], a["status"]) for a in moved.budget_alerts] == [("Dining", "exceeded")]
+    crud.delete_transaction(db, first.id)
+    assert [s["spent"] for s in crud.get_budget_status(db, test_user.id, "2024-03")] == [0, 60]
+    assert crud.get_budget_status(db, test_user.id, "2024-3") == crud.get_budget_status(db, test_user.id, "2024-03")
+    assert crud.get_budget_status(db, test_user.id, "2024-3")[1]["month"] == "2024-03"
+    with pytest.raises(ValueError):
+        crud.get_budget_status(db, test_user.id, "2024-13")
+
+    assert crud.delete_budget(db, test_user.id, crud.get_budgets(db, test_user.id)[0].id) is not None
+    assert [s["category"] for s in crud.get_budget_status(db, test_user.id, "2024-04")] == ["Food"]
+
+def test_health_report_is_cached_until_its_months_change(db: Session, test_user):
+    def transaction(day, amount, transaction_type="expense", category="Food"):
+        return crud.create_user_transaction(db, schemas.TransactionCreate(
+            date=day, amount=amount, transaction_type=transaction_type, category=category, description="Row"
+        ), test_user.id)
+
+    transaction(date(2024, 2, 1), 1000, "income", "Salary")
+    transaction(date(2024, 2, 10), 400)
+    transaction(date(2024, 3, 1), 2000, "income", "Salary")
+    transaction(date(2024, 3, 5), 300)
+    rent = transaction(date(2024, 3, 6), 900, category="Housing")
+
+    report = crud.get_health_report(db, test_user.id, "2024-03")
+    assert (report["income"], report["expenses"], report["net"]) == (2000, 1200, 800)
+    assert (report["expense_ratio"], report["savings_rate"], report["tier"]) == (60.0, 40.0, "caution")
+    assert (report["income_change"], report["expenses_change"], report["expense_ratio_change"]) == (1000, 800, 20.0)
+    assert [(c["category"], c["total"], c["share"]) for c in report["top_categories"]] == [("Housing", 900, 75.0), ("Food", 300, 25.0)]
+    assert crud.get_health_report(db, test_user.id, "2024-03") is report
+
+    # Later and earlier months don't feed March's report
+    transaction(date(2024, 4, 2), 50)
+    transaction(date(2024, 1, 2), 50)
+    assert crud.get_health_report(db, test_user.id, "2024-03") is report
+
+    # February's totals are March's month-over-month baseline
+    transaction(date(2024, 2, 11), 100)
+    report = crud.get_health_report(db, test_user.id, "2024-03")
+    assert (report["expenses_change"], report["expense_ratio_change"]) == (700, 10.0)
+
+    crud.delete_transaction(db, rent.id)
+    report = crud.get_health_report(db, test_user.id, "2024-03")
+    assert (report["expense_ratio"], report["tier"]) == (15.0, "excellent")
+    assert crud.get_health_report(db, test_user.id, "2024-05")["tier"] == "no_income"
+    assert crud.get_health_report(db, test_user.id, "2024-3") is report
+    with pytest.raises(ValueError):
+        crud.get_health_report(db, test_user.id, "March")
+
+# Delta sync Tests
+def test_get_changes_since_watermark(db: Session, test_user):
+    def create(description):
+        return crud.create_user_transaction(db, schemas.TransactionCreate(
+            date=date(2024, 3, 1), amount=10.0, transaction_type="expense", category="Food", description=description
+        ), test_user.id)
+
+    first = create("First")
+    second = create("Second")
+    initial = crud.get_changes(db, test_user.id)
+    assert [t.id for t in initial["changed"]] == [first.id, second.id]
+    assert initial["deleted"] == []
+    assert initial["watermark"] == second.change_seq > first.change_seq
+
+    third = create("Third")
+    crud.update_transaction(db, first.id, schemas.TransactionCreate(
+        date=date(2024, 3, 2), amount=12.0, transaction_type="expense", category="Food", description="First, edited"
+    ))
+    crud.delete_transaction(db, second.id)
+
+    delta = crud.get_changes(db, test_user.id, since=initial["watermark"])
+    assert {t.id for t in delta["changed"]} == {first.id, third.id}
+    assert delta["deleted"] == [second.id]
+    assert delta["watermark"] >= initial["watermark"]
+
+    # Nothing new: the watermark stays put
+    later = crud.get_changes(db, test_user.id, since=delta["watermark"])
+    assert later == {"changed": [], "deleted": [], "watermark": delta["watermark"]}
+
+def test_get_changes_sees_writes_committed_after_a_sync():
+    # A row stamped before its session takes the write lock commits after another
+    # session's later write and a sync in between: a clock watermark skips it, the
+    # change sequence (taken under the lock) does not
+    setup, writer, other = TestingSessionLocal(), TestingSessionLocal(), TestingSessionLocal()
+    try:
+        user = crud.create_user(setup, schemas.UserCreate(username="syncer", email="syncer@example.com", password="Password1!"))
+
+        def row(description):
+            return schemas.TransactionCreate(
+                date=date(2024, 3, 1), amount=10.0, transaction_type="expense", category="Food", description=description
+            )
+
+        slow = models.Transaction(**crud.transaction_values(row("Slow")), user_id=user.id, updated_at=datetime.utcnow())
+        writer.add(slow)
+        crud.create_user_transaction(other, row("Fast"), user.id)
+        first = crud.get_changes(setup, user.id)
+        assert [t.description for t in first["changed"]] == ["Fast"]
+
+        writer.commit()
+        assert [t.description for t in crud.get_changes(setup, user.id, since=first["watermark"])["changed"]] == ["Slow"]
+    finally:
+        for session in (setup, writer, other):
+            session.close()
+
+# Search Tests
+def test_search_transactions_composes_filters(db: Session, test_user):
+    rows = [
+        (date(2024, 3, 1), 1000.0, "income", "Salary", "March pay"),
+        (date(2024, 3, 2), 40.0, "expense", "Food", "Groceries 100%"),
+        (date(2024, 3, 3), 15.0, "expense", "Food", "Coffee"),
+        (date(2024, 3, 4), 60.0, "expense", "Transport", "Train pass"),
+        (date(2024, 4, 1), 45.0, "expense", "Food", "Groceries"),
+    ]
+    for d, amount, transaction_type, category, description in rows:
+        crud.create_user_transaction(db, schemas.TransactionCreate(
+            date=d, amount=amount, transaction_type=transaction_type, category=category, description=description
+        ), test_user.id)
+
+    def search(**filters):
+        items, _, total = crud.search_transactions(db, test_user.id, **filters)
+        return [t.description for t in items], total
+
+    assert search() == (["Groceries", "Train pass", "Coffee", "Groceries 100%", "March pay"], 5)
+    assert search(start_date=date(2024, 3, 2), end_date=date(2024, 3, 31), categories=["Food", "Transport"]) == (
+        ["Train pass", "Coffee", "Groceries 100%"], 3
+    )
+    # Amount bounds are magnitudes, whatever the sign the row is stored with
+    assert search(min_amount=40, max_amount=60) == (["Groceries", "Train pass", "Groceries 100%"], 3)
+    assert search(transaction_type="income", min_amount=500) == (["March pay"], 1)
+    assert search(description="groceries") == (["Groceries", "Groceries 100%"], 2)
+    # LIKE wildcards in the search text are matched literally
+    assert search(description="100%") == (["Groceries 100%"], 1)
+
+    first, cursor, total = crud.search_transactions(db, test_user.id, categories=["Food"], limit=2)
+    rest, last_cursor, _ = crud.search_transactions(db, test_user.id, categories=["Food"], cursor=cursor, limit=2)
+    assert total == 3
+    assert [t.description for t in first + rest] == ["Groceries", "Coffee", "Groceries 100%"]
+    assert last_cursor is None
+
+    with pytest.raises(ValueError):
+        crud.search_transactions(db, test_user.id, transaction_type="refund")
+
+def test_search_transactions_full_text(db: Session, test_user, user_create_data):
+    other_user = crud.create_user(db, schemas.UserCreate(
+        username="otheruser", email="other@example.com", password="Password1!"
+    ))
+    rows = [
+        (test_user.id, date(2024, 3, 1), "Amazon order 1234"),
+        (test_user.id, date(2024, 3, 2), "AMAZON Prime membership"),
+        (test_user.id, date(2024, 3, 3), "Grocery store"),
+        (other_user.id, date(2024, 3, 4), "Amazon order 999"),
+    ]
+    for user_id, d, description in rows:
+        crud.create_user_transaction(db, schemas.TransactionCreate(
+            date=d, amount=10.0, transaction_type="expense", category="Shopping", description=description
+        ), user_id)
+
+    def search(**filters):
+        items, _, total = crud.search_transactions(db, test_user.id, **filters)
+        return [t.description for t in items], total
+
+    # Prefix matching, case-insensitive, scoped to the caller's rows
+    assert sorted(search(q="amaz")[0]) == ["AMAZON Prime membership", "Amazon order 1234"]
+    assert search(q="amazon ord") == (["Amazon order 1234"], 1)
+    assert search(q="amazon", start_date=date(2024, 3, 2)) == (["AMAZON Prime membership"], 1)
+    assert search(q="  ") == ([], 0)
+
+    # The index follows updates and deletes
+    grocery = crud.search_transactions(db, test_user.id, q="grocery")[0][0]
+    crud.update_transaction(db, grocery.id, schemas.TransactionCreate(
+        date=date(2024, 3, 3), amount=10.0, transaction_type="expense", category="Food", description="Farmers market"
+    ))
+    assert search(q="grocery") == ([], 0)
+    assert search(q="farm") == (["Farmers market"], 1)
+    crud.delete_transaction(db, grocery.id)
+    assert search(q="farm") == ([], 0)
+
+    # Ranked results page by offset
+    first, cursor, total = crud.search_transactions(db, test_user.id, q="amazon", limit=1)
+    rest, last_cursor, _ = crud.search_transactions(db, test_user.id, q="amazon", cursor=cursor, limit=1)
+    assert total == 2 and last_cursor is None
+    assert {first[0].id, rest[0].id} == {t.id for t in crud.search_transactions(db, test_user.id, q="amazon")[0]}
+
+def test_bulk_inserts_are_full_text_indexed():
+    # Own sessions rather than the rolled-back db fixture, so the chunk's transaction
+    # really commits or rolls back
+    db = TestingSessionLocal()
+    try:
+        user = crud.create_user(db, schemas.UserCreate(username="bulkfts", email="bulkfts@example.com", password="Password1!"))
+        crud.create_user_transaction(db, schemas.TransactionCreate(
+            date=date(2024, 3, 1), amount=10.0, transaction_type="expense", category="Shopping", description="Amazon order 1"
+        ), user.id)
+
+        def chunk(descriptions):
+            return [
+                schemas.TransactionCreate(date=date(2024, 3, 2), amount=10.0, transaction_type="expense",
+                                          category="Shopping", description=description)
+                for description in descriptions
+            ]
+
+        def trigger_exists():
+            return db.execute(text(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'transactions_fts_ai'"
+            )).scalar() == 1
+
+        def search(q):
+            return sorted(t.description for t in crud.search_transactions(db, user.id, q=q)[0])
+
+        # A chunk that rolls back leaves neither rows nor the dropped trigger behind
+        crud.insert_transaction_rows(db, [
+            dict(crud.transaction_values(transaction), user_id=user.id) for transaction in chunk(["Amazon lost"])
+        ])
+        db.rollback()
+        assert trigger_exists()
+        assert search("amazon") == ["Amazon order 1"]
+
+        assert crud.bulk_create_user_transactions(db, chunk(["Amazon order 2", "Amazon Prime"]), user.id) == 2
+        assert trigger_exists()
+        assert search("amazon") == ["Amazon Prime", "Amazon order 1", "Amazon order 2"]
+        # Rows written one at a time are still indexed by the trigger
+        crud.create_user_transaction(db, chunk(["Amazon order 3"])[0], user.id)
+        assert search("amazon order") == ["Amazon order 1", "Amazon order 2", "Amazon order 3"]
+        db.execute(text("INSERT INTO transactions_fts(transactions_fts) VALUES ('integrity-check')"))
+    finally:
+        db.close()
+
+# Pagination Tests
+def test_get_transactions_page_walks_every_row_once(db: Session, test_user):
+    for i in range(25):
+        transaction = schemas.TransactionCreate(
+            date=date(2024, 1, 1) + timedelta(days=i % 7),
+            amount=10.0 + i,
+            transaction_type="expense",
+            category="Food",
+            description=f"Row {i}"
+        )
+        crud.create_user_transaction(db, transaction, test_user.id)
+
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        items, cursor = crud.get_transactions_page(db, test_user.id, cursor=cursor, limit=10)
+        seen.extend(items)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert len({t.id for t in seen}) == 25
+    keys = [(t.date, t.id) for t in seen]
+    assert keys == sorted(keys, reverse=True)
+
+def test_get_transactions_page_rejects_bad_cursor(db: Session, test_user):
+    with pytest.raises(ValueError):
+        crud.get_transactions_page(db, test_user.id, cursor="not-a-cursor")
+
+# Query plan tests
+@pytest.fixture
+def captured_queries():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and any(f"FROM {table}" in statement for table in ("transactions", "monthly_rollups", "deleted_transactions")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(engine, "before_cursor_execute", capture)
+
+def query_plan(db: Session, statement, parameters):
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return [row[-1] for row in rows]
+
+@pytest.mark.parametrize("run_query", [
+    lambda db, user_id: crud.get_transactions(db, user_id),
+    lambda db, user_id: crud.get_transactions_by_date_range(db, user_id, date(2024, 1, 1), date(2024, 1, 31)),
+    lambda db, user_id: crud.get_transactions_by_category(db, user_id, "Food"),
+    lambda db, user_id: crud.get_transactions_by_amount_range(db, user_id, 10.0, 100.0),
+    lambda db, user_id: crud.get_transaction_summary(db, user_id),
+    lambda db, user_id: crud.get_transaction_summary(db, user_id, category="Food"),
+    lambda db, user_id: crud.get_timeseries(db, user_id, "day", date(2024, 1, 1), date(2024, 1, 31)),
+    lambda db, user_id: crud.get_category_breakdown(db, user_id, date(2024, 1, 1), date(2024, 1, 31)),
+    lambda db, user_id: crud.get_changes(db, user_id, since=0),
+    lambda db, user_id: crud.search_transactions(db, user_id, start_date=date(2024, 1, 1), end_date=date(2024, 1, 31)),
+    lambda db, user_id: crud.search_transactions(db, user_id, categories=["Food", "Housing"], description="coffee"),
+    lambda db, user_id: crud.get_transactions_page(db, user_id, cursor=crud.encode_cursor(
+        models.Transaction(id=10, date=date(2024, 1, 1))
+    )),
+])
+def test_transaction_queries_use_index(db: Session, test_user, captured_queries, run_query):
+    run_query(db, test_user.id)
+    assert captured_queries
+    for statement, parameters in captured_queries:
+        plan = query_plan(db, statement, parameters)
+        # Unfiltered and month-aligned summaries read the monthly_rollups primary key instead
+        assert any(step.startswith("SEARCH") and " USING " in step for step in plan), plan
+        assert not any(step.startswith("SCAN") for step in plan), plan
+
+def test_full_text_search_is_driven_by_fts_index(db: Session, test_user, captured_queries):
+    crud.search_transactions(db, test_user.id, q="coffee", start_date=date(2024, 1, 1), categories=["Food"])
+    assert captured_queries
+    for statement, parameters in captured_queries:
+        plan = query_plan(db, statement, parameters)
+        # The FTS index is the outer loop; transactions is only probed by primary key
+        assert plan[0].startswith("SCAN transactions_fts VIRTUAL TABLE INDEX"), plan
+        assert any(step.startswith("SEARCH transactions USING INTEGER PRIMARY KEY") for step in plan), plan
@@ -0,0 +1,48 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from app import database
+from app.database import Base
+
+@pytest.fixture
+def db_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'profile.db'}"
+
+def test_sqlite_pragmas_overrides_and_read_only():
+    pragmas = database.sqlite_pragmas("performance", overrides="cache_size=-2000, mmap_size=0")
+    assert pragmas["journal_mode"] == "WAL"
+    assert pragmas["cache_size"] == "-2000"
+    assert pragmas["mmap_size"] == "0"
+
+    read_pragmas = database.sqlite_pragmas("performance", read_only=True)
+    assert "journal_mode" not in read_pragmas
+    assert "synchronous" not in read_pragmas
+    assert read_pragmas["busy_timeout"] == 5000
+
+    assert database.sqlite_pragmas("default") == {}
+
+def test_performance_profile_applied_on_connect(db_url):
+    engine = database.create_sqlite_engine(db_url, profile="performance")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert connection.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+        assert connection.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+    engine.dispose()
+
+def test_read_only_engine_rejects_writes(db_url):
+    engine = database.create_sqlite_engine(db_url)
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO users (username, email, hashed_password) VALUES ('a', 'a@example.com', 'x')")
+
+    read_engine = database.create_sqlite_engine(db_url, read_only=True)
+    with read_engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM users").scalar() == 1
+        with pytest.raises(OperationalError, match="readonly"):
+            connection.exec_driver_sql("INSERT INTO users (username, email, hashed_password) VALUES ('b', 'b@example.com', 'x')")
+    read_engine.dispose()
+    engine.dispose()
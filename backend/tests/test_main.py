@@ -3,11 +3,19 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from app.database import Base
-from app.main import app, get_db
+from app.main import app, get_db, get_read_db
+from app import auth, health, models, schemas
 import pytest
+import asyncio
+import threading
+import httpx
+import csv
+import io
+import json
+from decimal import Decimal
 from datetime import date
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -17,6 +25,8 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 @pytest.fixture(autouse=True)
 def setup_database():
     Base.metadata.create_all(bind=engine)
+    auth.token_cache.clear()
+    health.health_cache.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -28,6 +38,7 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 client = TestClient(app)
 
 # Authentication Tests
@@ -132,3 +143,583 @@ def test_get_transactions_by_amount_range(auth_headers):
     filtered_transactions = response.json()
     assert len(filtered_transactions) == 2
 
+
+def test_get_summary_with_filters(auth_headers):
+    transactions = [
+        {"date": "2024-03-05", "amount": 1000.0, "transaction_type": "income", "category": "Salary", "description": "Test"},
+        {"date": "2024-03-10", "amount": 120.0, "transaction_type": "expense", "category": "Food", "description": "Test"},
+        {"date": "2024-04-02", "amount": 80.0, "transaction_type": "expense", "category": "Food", "description": "Test"}
+    ]
+    for transaction in transactions:
+        client.post("/transactions/", json=transaction, headers=auth_headers)
+
+    response = client.get("/transactions/summary", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"total_income": 1000.0, "total_expenses": 200.0, "net_balance": 800.0}
+
+    response = client.get(
+        "/transactions/summary?start_date=2024-03-01&end_date=2024-03-31&category=Food",
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {"total_income": 0, "total_expenses": 120.0, "net_balance": -120.0}
+
+def test_get_timeseries(auth_headers):
+    transactions = [
+        {"date": "2024-03-05", "amount": 1000.0, "transaction_type": "income", "category": "Salary", "description": "Test"},
+        {"date": "2024-03-10", "amount": 120.0, "transaction_type": "expense", "category": "Food", "description": "Test"},
+        {"date": "2024-04-02", "amount": 80.0, "transaction_type": "expense", "category": "Food", "description": "Test"}
+    ]
+    for transaction in transactions:
+        client.post("/transactions/", json=transaction, headers=auth_headers)
+
+    response = client.get("/analytics/timeseries?granularity=month", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"period": "2024-03", "income": 1000.0, "expenses": 120.0, "net": 880.0},
+        {"period": "2024-04", "income": 0, "expenses": 80.0, "net": -80.0}
+    ]
+
+    response = client.get("/analytics/timeseries?granularity=day&from=2024-03-06&to=2024-04-30", headers=auth_headers)
+    assert [bucket["period"] for bucket in response.json()] == ["2024-03-10", "2024-04-02"]
+
+    response = client.get("/analytics/timeseries?granularity=year", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_get_category_breakdown(auth_headers):
+    transactions = [
+        {"date": "2024-03-05", "amount": 1000.0, "transaction_type": "income", "category": "Salary", "description": "Test"},
+        {"date": "2024-03-10", "amount": 120.0, "transaction_type": "expense", "category": "Food", "description": "Test"},
+        {"date": "2024-04-02", "amount": 80.0, "transaction_type": "expense", "category": "Food", "description": "Test"}
+    ]
+    for transaction in transactions:
+        client.post("/transactions/", json=transaction, headers=auth_headers)
+
+    response = client.get("/analytics/categories?month=2024-03", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "categories": [{"category": "Food", "total": 120.0, "count": 1}],
+        "daily": [{"category": "Food", "date": "2024-03-10", "total": 120.0}]
+    }
+
+    response = client.get("/analytics/categories?from=2024-03-01&to=2024-04-30", headers=auth_headers)
+    assert response.json()["categories"] == [{"category": "Food", "total": 200.0, "count": 2}]
+
+    response = client.get("/analytics/categories?month=2024-03&transaction_type=income", headers=auth_headers)
+    assert response.json()["categories"] == [{"category": "Salary", "total": 1000.0, "count": 1}]
+
+    assert client.get("/analytics/categories?month=2024-13", headers=auth_headers).status_code == 400
+    assert client.get("/analytics/categories?month=2024-03&from=2024-03-01", headers=auth_headers).status_code == 400
+
+def test_transaction_changes_delta_sync(auth_headers):
+    transaction = {"date": "2024-03-05", "amount": 10.0, "transaction_type": "expense", "category": "Food", "description": "Test"}
+    first = client.post("/transactions/", json=transaction, headers=auth_headers).json()
+    second = client.post("/transactions/", json=transaction, headers=auth_headers).json()
+
+    response = client.get("/transactions/changes", headers=auth_headers)
+    assert response.status_code == 200
+    initial = response.json()
+    assert [t["id"] for t in initial["changed"]] == [first["id"], second["id"]]
+    assert initial["deleted"] == []
+
+    client.put(f"/transactions/{first['id']}", json=dict(transaction, description="Edited"), headers=auth_headers)
+    client.delete(f"/transactions/{second['id']}", headers=auth_headers)
+
+    delta = client.get("/transactions/changes", params={"since": initial["watermark"]}, headers=auth_headers).json()
+    assert [t["description"] for t in delta["changed"]] == ["Edited"]
+    assert delta["deleted"] == [second["id"]]
+    assert delta["watermark"] >= initial["watermark"]
+
+def test_batch_update_and_delete(auth_headers):
+    rows = [
+        ("2024-03-05", "Food", "Lunch"),
+        ("2024-03-06", "Food", "Dinner"),
+        ("2024-03-07", "Transport", "Bus"),
+        ("2024-04-01", "Food", "Lunch"),
+    ]
+    ids = [
+        client.post("/transactions/", json={"date": d, "amount": 10.0, "transaction_type": "expense",
+                                            "category": category, "description": description}, headers=auth_headers).json()["id"]
+        for d, category, description in rows
+    ]
+    client.post("/users/", json={"email": "other@example.com", "password": "TestPass123!", "username": "other"})
+    token = client.post("/token", data={"username": "other", "password": "TestPass123!"}).json()["access_token"]
+    other_headers = {"Authorization": f"Bearer {token}"}
+
+    # Someone else's ids match nothing
+    response = client.patch("/transactions/batch", params={"ids": ids[:2]}, json={"category": "Dining"}, headers=other_headers)
+    assert response.json() == {"affected": 0, "budget_alerts": []}
+
+    response = client.patch("/transactions/batch", params={"ids": ids[:2]}, json={"category": "Dining"}, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"affected": 2, "budget_alerts": []}
+    summary = client.get("/transactions/summary", params={"category": "Dining"}, headers=auth_headers).json()
+    assert summary["total_expenses"] == 20.0
+
+    response = client.delete("/transactions/batch", params={"category": "Food", "month": "2024-04"}, headers=auth_headers)
+    assert response.json() == {"affected": 1}
+    remaining = client.get("/transactions/", headers=auth_headers).json()
+    assert sorted(t["id"] for t in remaining) == sorted(ids[:3])
+    assert ids[3] in client.get("/transactions/changes", params={"since": 0}, headers=auth_headers).json()["deleted"]
+
+    assert client.delete("/transactions/batch", headers=auth_headers).status_code == 400
+    assert client.patch("/transactions/batch", params={"ids": ids[:1]}, json={}, headers=auth_headers).status_code == 400
+    assert client.delete("/transactions/batch", params={"month": "2024-03", "from": "2024-03-01"}, headers=auth_headers).status_code == 400
+
+def test_category_rules(auth_headers):
+    transaction = {"date": "2024-03-05", "amount": 10.0, "transaction_type": "expense", "category": "Other", "description": "Uber trip"}
+    before = client.post("/transactions/", json=transaction, headers=auth_headers).json()
+
+    response = client.post("/rules", json={"pattern": "uber", "category": "Transport"}, headers=auth_headers)
+    assert response.status_code == 200
+    rule = response.json()
+    assert client.post("/rules", json={"category": "Anything"}, headers=auth_headers).status_code == 422
+    assert client.post("/rules", json={"pattern": "(", "is_regex": True, "category": "X"}, headers=auth_headers).status_code == 422
+    assert [r["id"] for r in client.get("/rules", headers=auth_headers).json()] == [rule["id"]]
+
+    assert client.post("/transactions/", json=transaction, headers=auth_headers).json()["category"] == "Transport"
+    assert client.post("/rules/apply", headers=auth_headers).json() == {"affected": 1, "budget_alerts": []}
+    assert client.get("/transactions/", headers=auth_headers).json()[0]["category"] == "Transport"
+    assert before["category"] == "Other"
+
+    assert client.delete(f"/rules/{rule['id']}", headers=auth_headers).status_code == 200
+    assert client.delete(f"/rules/{rule['id']}", headers=auth_headers).status_code == 404
+    assert client.get("/rules", headers=auth_headers).json() == []
+
+def test_recurring_transactions(auth_headers):
+    template = {"amount": 1200, "transaction_type": "expense", "category": "Housing", "description": "Rent",
+                "frequency": "monthly", "start_date": "2024-01-01", "end_date": "2024-03-31"}
+    response = client.post("/recurring", json=template, headers=auth_headers)
+    assert response.status_code == 200
+    created = response.json()
+    assert created["occurrences"] == 3
+    assert created["next_date"] is None
+    assert created["amount"] == 1200.0
+    assert sorted(t["date"] for t in client.get("/transactions/", headers=auth_headers).json()) == [
+        "2024-01-01", "2024-02-01", "2024-03-01"
+    ]
+    assert [t["id"] for t in client.get("/recurring", headers=auth_headers).json()] == [created["id"]]
+
+    assert client.post("/recurring", json=dict(template, frequency="hourly"), headers=auth_headers).status_code == 422
+    assert client.post("/recurring", json=dict(template, end_date="2023-12-31"), headers=auth_headers).status_code == 422
+
+    assert client.delete(f"/recurring/{created['id']}", headers=auth_headers).status_code == 200
+    assert client.delete(f"/recurring/{created['id']}", headers=auth_headers).status_code == 404
+    assert len(client.get("/transactions/", headers=auth_headers).json()) == 3
+
+def test_budgets(auth_headers):
+    response = client.post("/budgets", json={"category": "Food", "limit": 200, "alert_percent": 75}, headers=auth_headers)
+    assert response.status_code == 200
+    budget = response.json()
+    assert client.post("/budgets", json={"category": "Food", "limit": 0}, headers=auth_headers).status_code == 422
+    assert client.post("/budgets", json={"category": "Food", "limit": 100, "alert_percent": 120}, headers=auth_headers).status_code == 422
+
+    expense = {"date": "2024-03-05", "amount": 100.0, "transaction_type": "expense", "category": "Food", "description": "Groceries"}
+    response = client.post("/transactions/", json=expense, headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["budget_alerts"] == []
+
+    response = client.post("/transactions/", json=dict(expense, amount=60.0), headers=auth_headers)
+    alerts = response.json()["budget_alerts"]
+    assert [(a["category"], a["month"], a["spent"], a["status"]) for a in alerts] == [("Food", "2024-03", 160.0, "warning")]
+
+    response = client.put(f"/transactions/{response.json()['id']}", json=dict(expense, amount=150.0), headers=auth_headers)
+    assert [a["status"] for a in response.json()["budget_alerts"]] == ["exceeded"]
+
+    response = client.get("/budgets/status?month=2024-03", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == [{"category": "Food", "month": "2024-03", "limit": 200.0, "spent": 250.0,
+                                "remaining": -50.0, "percent": 125.0, "status": "exceeded"}]
+    assert client.get("/budgets/status?month=2024-04", headers=auth_headers).json()[0]["spent"] == 0.0
+    assert client.get("/budgets/status?month=March", headers=auth_headers).status_code == 400
+
+    # Batch edits and rule runs that move spend into a budgeted category alert too
+    client.post("/budgets", json={"category": "Dining", "limit": 120}, headers=auth_headers)
+    response = client.patch("/transactions/batch", params={"category": "Food", "month": "2024-03"},
+                            json={"category": "Dining"}, headers=auth_headers)
+    assert response.json()["affected"] == 2
+    assert [(a["category"], a["spent"], a["status"]) for a in response.json()["budget_alerts"]] == [("Dining", 250.0, "exceeded")]
+
+    client.post("/budgets", json={"category": "Transport", "limit": 100}, headers=auth_headers)
+    client.post("/transactions/", json=dict(expense, category="Other", description="Uber", amount=90.0), headers=auth_headers)
+    client.post("/rules", json={"pattern": "uber", "category": "Transport"}, headers=auth_headers)
+    alerts = client.post("/rules/apply", headers=auth_headers).json()["budget_alerts"]
+    assert [(a["category"], a["spent"], a["status"]) for a in alerts] == [("Transport", 90.0, "warning")]
+
+    assert client.delete(f"/budgets/{budget['id']}", headers=auth_headers).status_code == 200
+    assert client.delete(f"/budgets/{budget['id']}", headers=auth_headers).status_code == 404
+    assert [b["category"] for b in client.get("/budgets", headers=auth_headers).json()] == ["Dining", "Transport"]
+
+def test_health_report(auth_headers):
+    rows = [
+        {"date": "2024-02-01", "amount": 1000.0, "transaction_type": "income", "category": "Salary", "description": "Pay"},
+        {"date": "2024-03-01", "amount": 1000.0, "transaction_type": "income", "category": "Salary", "description": "Pay"},
+        {"date": "2024-03-05", "amount": 450.0, "transaction_type": "expense", "category": "Food", "description": "Groceries"}
+    ]
+    client.post("/transactions/bulk", json=rows, headers=auth_headers)
+
+    response = client.get("/analytics/health?month=2024-03", headers=auth_headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["expense_ratio"], report["savings_rate"], report["tier"]) == (45.0, 55.0, "excellent")
+    assert (report["previous_month"], report["expenses_change"], report["net_change"]) == ("2024-02", 450.0, -450.0)
+    assert report["top_categories"] == [{"category": "Food", "total": 450.0, "share": 100.0}]
+
+    client.post("/transactions/", json=dict(rows[2], amount=400.0), headers=auth_headers)
+    report = client.get("/analytics/health?month=2024-03", headers=auth_headers).json()
+    assert (report["expense_ratio"], report["tier"]) == (85.0, "alert")
+    assert client.get("/analytics/health?month=2024-13", headers=auth_headers).status_code == 400
+
+def test_large_responses_are_gzipped(auth_headers):
+    rows = [
+        {"date": "2024-03-05", "amount": 10.0, "transaction_type": "expense", "category": "Food", "description": f"Row {i}"}
+        for i in range(50)
+    ]
+    client.post("/transactions/bulk", json=rows, headers=auth_headers)
+
+    response = client.get("/transactions/changes", headers=dict(auth_headers, **{"Accept-Encoding": "gzip"}))
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["changed"]) == 50
+
+    response = client.get("/users/me", headers=dict(auth_headers, **{"Accept-Encoding": "gzip"}))
+    assert "content-encoding" not in response.headers
+
+def test_search_transactions(auth_headers):
+    transactions = [
+        {"date": "2024-03-05", "amount": 1000.0, "transaction_type": "income", "category": "Salary", "description": "Pay"},
+        {"date": "2024-03-10", "amount": 120.0, "transaction_type": "expense", "category": "Food", "description": "Groceries"},
+        {"date": "2024-03-12", "amount": 30.0, "transaction_type": "expense", "category": "Transport", "description": "Bus"},
+        {"date": "2024-04-02", "amount": 80.0, "transaction_type": "expense", "category": "Food", "description": "Groceries"}
+    ]
+    for transaction in transactions:
+        client.post("/transactions/", json=transaction, headers=auth_headers)
+
+    response = client.get(
+        "/transactions/search",
+        params={"category": ["Food", "Transport"], "start_date": "2024-03-01", "end_date": "2024-03-31", "limit": 1},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert page["total"] == 2
+    assert [t["description"] for t in page["items"]] == ["Bus"]
+
+    page = client.get(
+        "/transactions/search",
+        params={"category": ["Food", "Transport"], "start_date": "2024-03-01", "end_date": "2024-03-31", "cursor": page["next_cursor"]},
+        headers=auth_headers
+    ).json()
+    assert [t["description"] for t in page["items"]] == ["Groceries"]
+    assert page["next_cursor"] is None
+
+    page = client.get(
+        "/transactions/search",
+        params={"description": "grocer", "min_amount": 100, "transaction_type": "expense"},
+        headers=auth_headers
+    ).json()
+    assert (page["total"], page["items"][0]["date"]) == (1, "2024-03-10")
+
+    assert client.get("/transactions/search?transaction_type=refund", headers=auth_headers).status_code == 400
+
+    page = client.get("/transactions/search", params={"q": "groc"}, headers=auth_headers).json()
+    assert page["total"] == 2
+    assert {t["date"] for t in page["items"]} == {"2024-03-10", "2024-04-02"}
+    assert client.get("/transactions/search", params={"q": "groc", "cursor": "bad"}, headers=auth_headers).status_code == 400
+
+def test_read_transactions_cursor_pagination(auth_headers):
+    for day in range(1, 6):
+        client.post(
+            "/transactions/",
+            json={"date": f"2024-03-0{day}", "amount": 10.0, "transaction_type": "expense", "category": "Food", "description": "Test"},
+            headers=auth_headers
+        )
+
+    response = client.get("/transactions/?cursor=&limit=2", headers=auth_headers)
+    assert response.status_code == 200
+    page = response.json()
+    assert [t["date"] for t in page["items"]] == ["2024-03-05", "2024-03-04"]
+    assert page["next_cursor"]
+
+    dates = [t["date"] for t in page["items"]]
+    while page["next_cursor"]:
+        page = client.get(f"/transactions/?cursor={page['next_cursor']}&limit=2", headers=auth_headers).json()
+        dates.extend(t["date"] for t in page["items"])
+    assert dates == ["2024-03-05", "2024-03-04", "2024-03-03", "2024-03-02", "2024-03-01"]
+
+    # Old clients still get a plain list
+    response = client.get("/transactions/?skip=1&limit=2", headers=auth_headers)
+    assert [t["date"] for t in response.json()] == ["2024-03-04", "2024-03-03"]
+
+    # An empty page would still hand back a cursor past a row it never returned
+    for url in ("/transactions/?cursor=&limit=0", "/transactions/?limit=0",
+                "/transactions/search?limit=0", "/transactions/?cursor=&limit=1001"):
+        assert client.get(url, headers=auth_headers).status_code == 422
+
+def test_read_transactions_invalid_cursor(auth_headers):
+    response = client.get("/transactions/?cursor=garbage", headers=auth_headers)
+    assert response.status_code == 400
+
+def test_bulk_import_json_array_reports_row_errors(auth_headers):
+    rows = [
+        {"date": "2024-03-01", "amount": 2500.0, "transaction_type": "income", "category": "Salary", "description": "Pay"},
+        {"date": "2024-03-02", "amount": 0, "transaction_type": "expense", "category": "Food", "description": "Zero"},
+        {"date": "not-a-date", "amount": 10.0, "transaction_type": "expense", "category": "Food", "description": "Bad"},
+        {"date": "2024-03-03", "amount": 40.0, "transaction_type": "expense", "category": "Food", "description": "Lunch"}
+    ]
+    response = client.post("/transactions/bulk", json=rows, headers=auth_headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["inserted"] == 2
+    assert result["failed"] == 2
+    assert [error["row"] for error in result["errors"]] == [2, 3]
+    assert "Transaction amount cannot be zero" in result["errors"][0]["error"]
+
+    summary = client.get("/transactions/summary", headers=auth_headers).json()
+    assert summary["total_income"] == 2500.0
+    assert summary["total_expenses"] == 40.0
+
+def test_bulk_import_json_array_is_streamed(auth_headers):
+    body = json.dumps([
+        {"date": "2024-03-01", "amount": 12.5, "transaction_type": "expense", "category": "Food", "description": "A, ]"},
+        {"date": "2024-03-02", "amount": 7.5, "transaction_type": "expense", "category": "Food", "description": "B"}
+    ]).encode()
+
+    def chunks(data):
+        for start in range(0, len(data), 5):
+            yield data[start:start + 5]
+    headers = {**auth_headers, "Content-Type": "application/json"}
+    response = client.post("/transactions/bulk", content=chunks(body), headers=headers)
+    assert response.json()["inserted"] == 2
+
+    response = client.post("/transactions/bulk", content=chunks(body[:-1] + b", {]"), headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid JSON body")
+
+def test_bulk_import_ndjson_and_csv(auth_headers):
+    ndjson = "\n".join([
+        '{"date": "2024-03-01", "amount": 12.5, "transaction_type": "expense", "category": "Food", "description": "A"}',
+        '{not json}',
+        '{"date": "2024-03-02", "amount": 7.5, "transaction_type": "expense", "category": "Food", "description": "B"}'
+    ])
+    response = client.post(
+        "/transactions/bulk",
+        content=ndjson,
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.json()["inserted"] == 2
+    assert response.json()["errors"][0]["row"] == 2
+
+    csv_body = (
+        "date,amount,transaction_type,category,description\r\n"
+        "2024-03-05,100,income,Freelance,\"Invoice, March\"\r\n"
+        "2024-03-06,30,expense,Transport\r\n"
+    )
+    response = client.post(
+        "/transactions/bulk",
+        content=csv_body,
+        headers={**auth_headers, "Content-Type": "text/csv"}
+    )
+    result = response.json()
+    assert result["inserted"] == 1
+    assert result["errors"] == [{"row": 2, "error": "Expected 5 columns, got 4"}]
+
+    transactions = client.get("/transactions/", headers=auth_headers).json()
+    assert {t["description"] for t in transactions} == {"A", "B", "Invoice, March"}
+
+def test_bulk_import_unsupported_content_type(auth_headers):
+    response = client.post(
+        "/transactions/bulk",
+        content="<xml/>",
+        headers={**auth_headers, "Content-Type": "application/xml"}
+    )
+    assert response.status_code == 415
+
+@pytest.fixture
+def export_ledger(auth_headers):
+    transactions = [
+        {"date": "2024-02-28", "amount": 15.0, "transaction_type": "expense", "category": "Food", "description": "Old"},
+        {"date": "2024-03-01", "amount": 2000.0, "transaction_type": "income", "category": "Salary", "description": "Pay, March"},
+        {"date": "2024-03-02", "amount": 45.5, "transaction_type": "expense", "category": "Food", "description": "Groceries"}
+    ]
+    client.post("/transactions/bulk", json=transactions, headers=auth_headers)
+    return auth_headers
+
+def test_export_csv(export_ledger):
+    response = client.get("/transactions/export?format=csv", headers=export_ledger)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["description"] for row in rows] == ["Old", "Pay, March", "Groceries"]
+    assert rows[2]["amount"] == "-45.50"
+
+def test_csv_export_round_trips_through_bulk_import(auth_headers):
+    description = "Dinner, team\r\nsecond line with \"quotes\"\n\nand a gap"
+    client.post("/transactions/", json={
+        "date": "2024-03-01", "amount": 60.0, "transaction_type": "expense", "category": "Food",
+        "description": description
+    }, headers=auth_headers)
+    exported = client.get("/transactions/export?format=csv", headers=auth_headers).content
+
+    # Split the upload mid-field so a quoted record arrives across stream chunks
+    def chunks():
+        for start in range(0, len(exported), 7):
+            yield exported[start:start + 7]
+    response = client.post(
+        "/transactions/bulk", content=chunks(), headers={**auth_headers, "Content-Type": "text/csv"}
+    )
+    assert response.json() == {"inserted": 1, "failed": 0, "errors": []}
+    transactions = client.get("/transactions/", headers=auth_headers).json()
+    assert [t["description"] for t in transactions] == [description] * 2
+    assert {t["amount"] for t in transactions} == {60.0}
+
+def test_export_ndjson_with_date_range(export_ledger):
+    response = client.get(
+        "/transactions/export?format=ndjson&start_date=2024-03-01&end_date=2024-03-31",
+        headers=export_ledger
+    )
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["date"] for row in rows] == ["2024-03-01", "2024-03-02"]
+    assert rows[0]["amount"] == 2000.0
+
+def test_export_parquet(export_ledger):
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = client.get("/transactions/export?format=parquet", headers=export_ledger)
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 3
+    assert table.column("category").to_pylist() == ["Food", "Salary", "Food"]
+    assert table.column("amount").to_pylist()[2] == Decimal("-45.50")
+
+def test_export_unknown_format(auth_headers):
+    response = client.get("/transactions/export?format=xlsx", headers=auth_headers)
+    assert response.status_code == 400
+
+# Auth cache tests
+@pytest.fixture
+def user_lookups():
+    lookups = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            lookups.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    yield lookups
+    event.remove(engine, "before_cursor_execute", capture)
+
+def test_authenticated_requests_reuse_cached_user(auth_headers, user_lookups):
+    for _ in range(3):
+        response = client.get("/users/me", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json()["username"] == "testuser"
+    assert len(user_lookups) == 1
+
+def test_user_lookup_runs_off_the_event_loop(auth_headers):
+    on_event_loop = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            try:
+                asyncio.get_running_loop()
+                on_event_loop.append(True)
+            except RuntimeError:
+                on_event_loop.append(False)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        assert client.get("/users/me", headers=auth_headers).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert on_event_loop == [False]
+
+def test_user_update_invalidates_cached_tokens(auth_headers):
+    client.get("/users/me", headers=auth_headers)
+    assert len(auth.token_cache) == 1
+
+    db = TestingSessionLocal()
+    user = db.query(models.User).filter(models.User.username == "testuser").first()
+    user.email = "changed@example.com"
+    db.commit()
+    db.close()
+
+    assert len(auth.token_cache) == 0
+    assert client.get("/users/me", headers=auth_headers).json()["email"] == "changed@example.com"
+
+def test_trusted_token_claims_skip_lookup(auth_headers, user_lookups, monkeypatch):
+    monkeypatch.setattr(auth, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    response = client.get("/users/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json() == {"username": "testuser", "email": "test@example.com", "id": 1}
+    assert user_lookups == []
+
+def test_token_cache_is_bounded_lru():
+    cache = auth.TokenCache(maxsize=2, ttl=60)
+    expires = 2 ** 40
+    for user_id in (1, 2, 3):
+        cache.set(f"token-{user_id}", schemas.User(id=user_id, username=f"user{user_id}", email="u@example.com"), expires)
+    assert len(cache) == 2
+    assert cache.get("token-1") is None
+    assert cache.get("token-3").id == 3
+
+    expired = auth.TokenCache(maxsize=2, ttl=60)
+    expired.set("old", schemas.User(id=1, username="user1", email="u@example.com"), token_expires_at=0)
+    assert expired.get("old") is None
+
+# Password hashing tests
+def test_signup_hashes_on_password_pool(monkeypatch):
+    hashing_threads = []
+    get_password_hash = auth.get_password_hash
+
+    def recording_hash(password):
+        hashing_threads.append(threading.current_thread().name)
+        return get_password_hash(password)
+
+    monkeypatch.setattr(auth, "get_password_hash", recording_hash)
+    response = client.post("/users/", json={"username": "newuser", "email": "new@example.com", "password": "NewPass123!"})
+    assert response.status_code == 200
+    assert len(hashing_threads) == 1 and hashing_threads[0].startswith("password-hash")
+    assert client.post("/token", data={"username": "newuser", "password": "NewPass123!"}).status_code == 200
+
+def test_login_rehashes_weak_password_hash():
+    weak_hash = auth.pwd_context.hash("TestPass123!", rounds=4)
+    db = TestingSessionLocal()
+    db.add(models.User(username="legacy", email="legacy@example.com", hashed_password=weak_hash))
+    db.commit()
+    db.close()
+
+    response = client.post("/token", data={"username": "legacy", "password": "TestPass123!"})
+    assert response.status_code == 200
+
+    db = TestingSessionLocal()
+    stored_hash = db.query(models.User).filter(models.User.username == "legacy").first().hashed_password
+    db.close()
+    assert stored_hash != weak_hash
+    assert stored_hash.startswith(f"$2b${auth.BCRYPT_ROUNDS:02d}$")
+    assert client.post("/token", data={"username": "legacy", "password": "TestPass123!"}).status_code == 200
+
+def test_login_does_not_block_other_requests():
+    client.post("/users/", json={"email": "slow@example.com", "password": "TestPass123!", "username": "slow"})
+    finished = []
+
+    async def login():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+            response = await async_client.post("/token", data={"username": "slow", "password": "TestPass123!"})
+            finished.append("login")
+            return response
+
+    async def ping():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as async_client:
+            await asyncio.sleep(0.01)
+            response = await async_client.get("/")
+            finished.append("ping")
+            return response
+
+    async def run():
+        return await asyncio.gather(login(), ping())
+
+    login_response, ping_response = asyncio.run(run())
+    assert login_response.status_code == 200
+    assert ping_response.status_code == 200
+    assert finished == ["ping", "login"]
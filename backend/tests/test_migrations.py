@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+from app import migrations, rollups
+import pytest
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, username VARCHAR, email VARCHAR, hashed_password VARCHAR)",
+    "CREATE TABLE transactions (id INTEGER PRIMARY KEY, date DATE, amount FLOAT, transaction_type VARCHAR, "
+    "category VARCHAR, description VARCHAR, user_id INTEGER REFERENCES users (id))",
+    "CREATE INDEX ix_transactions_id ON transactions (id)",
+]
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'finance_tracker.db'}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'old', 'old@example.com', 'x')")
+        connection.exec_driver_sql(
+            "INSERT INTO transactions (date, amount, transaction_type, category, description, user_id) "
+            "VALUES ('2024-01-05', -12.5, 'expense', 'Food', 'Lunch', 1)"
+        )
+    yield engine
+    engine.dispose()
+
+def test_upgrade_adds_composite_indexes(legacy_engine):
+    created = migrations.upgrade(legacy_engine)
+    assert set(created) >= {
+        "ix_transactions_user_date",
+        "ix_transactions_user_category_date",
+        "ix_transactions_user_type_amount",
+        "ux_transactions_recurring_key",
+    }
+
+    indexes = {index["name"]: index["column_names"] for index in inspect(legacy_engine).get_indexes("transactions")}
+    assert indexes["ix_transactions_user_category_date"] == ["user_id", "category", "date"]
+
+    with legacy_engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM transactions").scalar() == 1
+
+def test_upgrade_is_idempotent(legacy_engine):
+    migrations.upgrade(legacy_engine)
+    assert migrations.upgrade(legacy_engine) == []
+
+def test_upgrade_backfills_monthly_rollups(legacy_engine):
+    migrations.upgrade(legacy_engine)
+    with legacy_engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "SELECT user_id, month, transaction_type, category, total_cents, count FROM monthly_rollups"
+        ).fetchall()
+    assert rows == [(1, "2024-01", "expense", "Food", -1250, 1)]
+
+def test_upgrade_adds_updated_at(legacy_engine):
+    created = migrations.upgrade(legacy_engine)
+    assert "transactions.updated_at" in created
+    assert "transactions.change_seq" in created
+    assert "ix_transactions_user_change_seq" in created
+
+    with legacy_engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT COUNT(*) FROM transactions WHERE updated_at IS NULL").scalar() == 0
+        # Existing rows sort before every later write, which starts from the seeded counter
+        assert connection.exec_driver_sql("SELECT DISTINCT change_seq FROM transactions").scalars().all() == [0]
+        assert connection.exec_driver_sql("SELECT value FROM change_counter").scalars().all() == [0]
+
+def test_upgrade_builds_fulltext_index(legacy_engine):
+    assert "transactions_fts" in migrations.upgrade(legacy_engine)
+    with legacy_engine.connect() as connection:
+        rows = connection.exec_driver_sql(
+            "SELECT rowid FROM transactions_fts WHERE transactions_fts MATCH 'lunch*'"
+        ).fetchall()
+    assert len(rows) == 1
+
+def test_upgrade_moves_amounts_to_cents(legacy_engine):
+    with legacy_engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO transactions (date, amount, transaction_type, category, description, user_id) "
+            "VALUES ('2024-01-06', 0.285, 'income', 'Refund', 'Half cent', 1)"
+        )
+    created = migrations.upgrade(legacy_engine)
+    assert "transactions.amount_cents" in created
+    assert "ix_transactions_user_type_amount" in created
+
+    inspector = inspect(legacy_engine)
+    assert "amount" not in {column["name"] for column in inspector.get_columns("transactions")}
+    indexes = {index["name"]: index["column_names"] for index in inspector.get_indexes("transactions")}
+    assert indexes["ix_transactions_user_type_amount"] == ["user_id", "transaction_type", "amount_cents"]
+    with legacy_engine.connect() as connection:
+        amounts = connection.exec_driver_sql("SELECT amount_cents FROM transactions ORDER BY id").scalars().all()
+    assert amounts == [-1250, 29]
+
+def test_upgrade_rebuilds_rollups_from_cents(legacy_engine):
+    # A pre-cents rollup total of 0.01 for two half-cent rows: each row rounds to a
+    # cent, so the rollup must become 2 cents rather than its own total rounded
+    with legacy_engine.begin() as connection:
+        connection.exec_driver_sql("DELETE FROM transactions")
+        for _ in range(2):
+            connection.exec_driver_sql(
+                "INSERT INTO transactions (date, amount, transaction_type, category, description, user_id) "
+                "VALUES ('2024-01-06', 0.005, 'income', 'Interest', 'Half cent', 1)"
+            )
+        connection.exec_driver_sql(
+            "CREATE TABLE monthly_rollups (user_id INTEGER, month VARCHAR, transaction_type VARCHAR, category VARCHAR, "
+            "total FLOAT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (user_id, month, transaction_type, category))"
+        )
+        connection.exec_driver_sql("INSERT INTO monthly_rollups VALUES (1, '2024-01', 'income', 'Interest', 0.01, 2)")
+
+    created = migrations.upgrade(legacy_engine)
+    assert "monthly_rollups.total_cents" in created
+    assert "total" not in {column["name"] for column in inspect(legacy_engine).get_columns("monthly_rollups")}
+    with legacy_engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT amount_cents FROM transactions").scalars().all() == [1, 1]
+        assert connection.exec_driver_sql("SELECT total_cents, count FROM monthly_rollups").fetchall() == [(2, 2)]
+    with Session(legacy_engine) as db:
+        assert rollups.verify(db) == []
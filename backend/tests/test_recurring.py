@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from app import crud, models, recurring, rollups, schemas
+from app.database import Base
+import pytest
+
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(autouse=True)
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    yield session
+    session.close()
+
+@pytest.fixture
+def user(db):
+    user = models.User(username="recurring", email="recurring@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+def template(db, user, **overrides):
+    values = dict(amount=1500, transaction_type="expense", category="Housing", description="Rent",
+                  frequency="monthly", start_date=date(2023, 1, 31))
+    values.update(overrides)
+    return crud.create_recurring_transaction(db, schemas.RecurringTransactionCreate(**values), user.id)
+
+def test_monthly_occurrences_follow_month_ends(db, user):
+    rent = template(db, user)
+    assert [recurring.occurrence(rent, i) for i in range(4)] == [
+        date(2023, 1, 31), date(2023, 2, 28), date(2023, 3, 31), date(2023, 4, 30)
+    ]
+
+def test_catch_up_posts_missed_occurrences_in_one_commit(db, user):
+    rent = template(db, user)
+    salary = template(db, user, amount=3000, transaction_type="income", category="Salary",
+                      description="Paycheck", frequency="weekly", interval=2, start_date=date(2024, 1, 5))
+    commits = []
+    record = lambda session: commits.append(session)
+    event.listen(db, "after_commit", record)
+    posted = recurring.materialize_due(db, today=date(2024, 3, 15))
+    event.remove(db, "after_commit", record)
+
+    assert posted == 14 + 6
+    assert len(commits) == 1
+    db.refresh(rent)
+    assert (rent.occurrences, rent.next_date) == (14, date(2024, 3, 31))
+    amounts = {t.amount for t in crud.get_transactions(db, user.id, limit=100)}
+    assert amounts == {Decimal("-1500.00"), Decimal("3000.00")}
+    assert rollups.verify(db, user.id) == []
+
+def test_posting_is_idempotent(db, user):
+    rent = template(db, user, start_date=date(2024, 1, 1))
+    assert recurring.materialize_due(db, today=date(2024, 3, 1)) == 3
+    assert recurring.materialize_due(db, today=date(2024, 3, 1)) == 0
+
+    # A second process that still sees the old template state posts nothing new
+    rent.occurrences = 0
+    rent.next_date = rent.start_date
+    db.commit()
+    assert recurring.materialize_due(db, today=date(2024, 3, 1)) == 0
+    assert len(crud.get_transactions(db, user.id)) == 3
+
+    db.add(models.Transaction(date=date(2024, 1, 1), amount=1, transaction_type="income", category="X",
+                              description="Dup", user_id=user.id, recurring_key=recurring.recurring_key(rent, date(2024, 1, 1))))
+    with pytest.raises(IntegrityError):
+        db.commit()
+
+def test_end_date_stops_template(db, user):
+    gym = template(db, user, frequency="weekly", start_date=date(2024, 1, 1), end_date=date(2024, 1, 20))
+    assert recurring.materialize_due(db, today=date(2024, 6, 1)) == 3
+    db.refresh(gym)
+    assert gym.next_date is None
+    assert recurring.materialize_due(db, today=date(2024, 12, 1)) == 0
+
+def test_scheduler_run_once(db, user):
+    template(db, user, start_date=date.today())
+    scheduler = recurring.RecurringScheduler(TestingSessionLocal, interval=60)
+    assert scheduler.run_once() == 1
+    assert scheduler.run_once() == 0
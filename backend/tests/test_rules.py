@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decimal import Decimal
+from app.rules import Automaton, Matcher, RuleSpec
+
+def rule(pattern="", category="X", is_regex=False, transaction_type=None, min_amount=None, max_amount=None):
+    return RuleSpec(pattern, is_regex, transaction_type, min_amount, max_amount, category)
+
+def test_automaton_finds_overlapping_words():
+    automaton = Automaton([("he", 0), ("she", 1), ("his", 2), ("hers", 3)])
+    assert automaton.search("ushers") == {0, 1, 3}
+    assert automaton.search("this") == {2}
+    assert automaton.search("xyz") == set()
+
+def test_first_matching_rule_wins():
+    matcher = Matcher((
+        rule("uber eats", "Food"),
+        rule("uber", "Transport"),
+        rule(r"\bnetflix|spotify\b", "Subscriptions", is_regex=True),
+    ))
+    assert matcher.match("UBER EATS order", Decimal("-12"), "expense") == "Food"
+    assert matcher.match("Uber trip", Decimal("-12"), "expense") == "Transport"
+    assert matcher.match("Spotify premium", Decimal("-9.99"), "expense") == "Subscriptions"
+    assert matcher.match("Groceries", Decimal("-9.99"), "expense") is None
+
+def test_type_and_amount_conditions():
+    matcher = Matcher((
+        rule("amazon", "Electronics", min_amount=Decimal("100")),
+        rule("amazon", "Shopping", transaction_type="expense"),
+        rule("", "Salary", transaction_type="income", min_amount=Decimal("1000")),
+    ))
+    assert matcher.match("Amazon order", Decimal("-250"), "expense") == "Electronics"
+    assert matcher.match("Amazon order", Decimal("-25"), "expense") == "Shopping"
+    assert matcher.match("Amazon refund", Decimal("25"), "income") is None
+    assert matcher.match("ACME payroll", Decimal("3000"), "income") == "Salary"
+
+    values = {"description": "amazon", "amount": Decimal("-25"), "transaction_type": "expense", "category": "Other"}
+    assert matcher.apply(values)
+    assert values["category"] == "Shopping"
+    assert not matcher.apply(values)
+
+def test_regex_rules_are_prefiltered_by_literals():
+    matcher = Matcher((
+        rule(r"^(netflix|hulu)\b", "Streaming", is_regex=True),
+        rule(r"[0-9]+ refund", "Refunds", is_regex=True),
+        rule(r"a|b", "Letters", is_regex=True),
+    ))
+    assert matcher.candidates("hulu plus") == {0, 2}
+    assert matcher.candidates("order 12 REFUND") == {1, 2}
+    assert matcher.match("Hulu plus", Decimal("-5"), "expense") == "Streaming"
+    assert matcher.match("my hulu tab", Decimal("-5"), "expense") == "Letters"
+    assert matcher.match("refund at bank", Decimal("5"), "income") == "Letters"
+    assert matcher.match("xyz", Decimal("5"), "income") is None
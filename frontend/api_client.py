@@ -0,0 +1,59 @@
+import logging
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+## (connect, read) seconds; the hosted backend can take a while to wake up
+DEFAULT_TIMEOUT = (5, 30)
+
+## keep-alive connections kept open to the backend
+POOL_SIZE = 10
+
+## only idempotent reads are retried; writes are sent exactly once
+RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 502, 503, 504),
+    allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+    raise_on_status=False
+)
+
+class ApiClient:
+    ## one requests.Session per client, so TCP/TLS connections are reused across calls
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT, pool_size=POOL_SIZE, retry=RETRY):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = "gzip, deflate"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+        except requests.RequestException as e:
+            logger.warning("%s %s failed after %.1f ms: %s", method, path, (time.perf_counter() - started) * 1000, e)
+            raise
+        logger.info("%s %s -> %s in %.1f ms", method, path, response.status_code, (time.perf_counter() - started) * 1000)
+        return response
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.request("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def close(self):
+        self.session.close()
@@ -1,10 +1,11 @@
 import streamlit as st
-import requests
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import time
+from concurrent.futures import ThreadPoolExecutor
+from api_client import ApiClient
 # import os
 # from dotenv import load_dotenv
 
@@ -40,6 +41,14 @@ EXPENSE_CATEGORIES = [
     "Other Expenses"
 ]
 
+## one pooled client per browser session; rebuilt if API_URL changes
+def get_client():
+    client = getattr(st.session_state, 'api_client', None)
+    if client is None or client.base_url != API_URL.rstrip("/"):
+        client = ApiClient(API_URL)
+        st.session_state.api_client = client
+    return client
+
 ## let's check if user is already logged in
 def init_session():
     if 'access_token' in st.session_state:
@@ -48,7 +57,7 @@ def init_session():
 
 def login(username, password):
     print(f"Attempting login for user: {username}")
-    response = requests.post(f"{API_URL}/token", data={"username": username, "password": password})
+    response = get_client().post("/token", data={"username": username, "password": password})
     print(f"Login response status: {response.status_code}")
     print(f"Login response content: {response.text}")
     if response.status_code == 200:
@@ -58,8 +67,8 @@ def login(username, password):
 
 def signup(username, email, password):
     try:
-        response = requests.post(
-            f"{API_URL}/users/", 
+        response = get_client().post(
+            "/users/", 
             json={"username": username, "email": email, "password": password}
         )
         
@@ -82,18 +91,73 @@ def signup(username, email, password):
 
 def get_transaction(transaction_id):
     headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
-    response = requests.get(f"{API_URL}/transactions/{transaction_id}", headers=headers)
+    response = get_client().get(f"/transactions/{transaction_id}", headers=headers)
+    if response.status_code == 200:
+        return response.json()
+    return None
+
+## a synced ledger is reused for this many seconds before asking the backend for changes again
+SYNC_INTERVAL_SECONDS = 5
+
+## drop the per-session ledger cache when the user changes (login/logout)
+def reset_transactions_cache():
+    st.session_state.transactions_cache_token = st.session_state.access_token
+    st.session_state.transactions_cache = {}
+    st.session_state.transactions_watermark = None
+    st.session_state.transactions_frame = None
+    st.session_state.transactions_synced_at = None
+
+## our own writes force a delta sync on the next read
+def invalidate_transactions_cache():
+    st.session_state.transactions_synced_at = None
+
+## rows changed or deleted since the watermark; plain HTTP, safe to run on a worker thread
+def fetch_changes(client, token, since=None):
+    params = {"since": since} if since is not None else {}
+    response = client.get("/transactions/changes", headers={"Authorization": f"Bearer {token}"}, params=params)
     if response.status_code == 200:
         return response.json()
     return None
 
+## is the cached ledger older than the sync interval (or invalidated by a write)?
+def transactions_sync_due():
+    if getattr(st.session_state, 'transactions_cache_token', None) != st.session_state.access_token:
+        reset_transactions_cache()
+    synced_at = st.session_state.transactions_synced_at
+    return synced_at is None or time.time() - synced_at >= SYNC_INTERVAL_SECONDS
+
+## merge a delta into the cached ledger
+def apply_transaction_changes(changes):
+    if changes is None:
+        return  ## keep showing what we have
+    cache = dict(st.session_state.transactions_cache)
+    for transaction_id in changes['deleted']:
+        cache.pop(transaction_id, None)
+    for transaction in changes['changed']:
+        cache[transaction['id']] = transaction
+    if changes['deleted'] or changes['changed']:
+        st.session_state.transactions_frame = None  ## rebuilt on next use
+    st.session_state.transactions_cache = cache
+    st.session_state.transactions_watermark = changes['watermark']
+    st.session_state.transactions_synced_at = time.time()
+
+## delta sync: only rows changed or deleted since the last watermark are downloaded
+def sync_transactions():
+    if transactions_sync_due():
+        with st.spinner('Loading transactions...'):
+            changes = fetch_changes(get_client(), st.session_state.access_token, st.session_state.transactions_watermark)
+        apply_transaction_changes(changes)
+    return st.session_state.transactions_cache
+
 def get_transactions():
-    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
-    with st.spinner('Loading transactions...'):
-        response = requests.get(f"{API_URL}/transactions/", headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        return []
+    return sorted(sync_transactions().values(), key=lambda t: (t['date'], t['id']), reverse=True)
+
+## cached DataFrame of the ledger, only rebuilt when a sync brought changes
+def get_transactions_frame():
+    transactions = get_transactions()
+    if st.session_state.transactions_frame is None:
+        st.session_state.transactions_frame = pd.DataFrame(transactions)
+    return st.session_state.transactions_frame.copy()
 
 def add_transaction(date, amount, transaction_type, category, description):
     if amount == 0:
@@ -108,9 +172,11 @@ def add_transaction(date, amount, transaction_type, category, description):
         "category": category,
         "description": description
     }
-    response = requests.post(f"{API_URL}/transactions/", json=data, headers=headers)
+    response = get_client().post("/transactions/", json=data, headers=headers)
     if response.status_code == 200:
+        invalidate_transactions_cache()
         st.success("Transaction added successfully.")
+        show_budget_alerts(response.json().get("budget_alerts", []))
         return True
     else:
         error_detail = response.json().get("detail", "Failed to add transaction. Please try again.")
@@ -126,9 +192,11 @@ def update_transaction(transaction_id, date, amount, transaction_type, category,
         "category": category,
         "description": description
     }
-    response = requests.put(f"{API_URL}/transactions/{transaction_id}", json=data, headers=headers)
+    response = get_client().put(f"/transactions/{transaction_id}", json=data, headers=headers)
     if response.status_code == 200:
+        invalidate_transactions_cache()
         #st.success("Transaction updated successfully.")
+        show_budget_alerts(response.json().get("budget_alerts", []))
         return True
     else:
         error_detail = response.json().get("detail", "Failed to update transaction. Please try again.")
@@ -138,8 +206,9 @@ def update_transaction(transaction_id, date, amount, transaction_type, category,
 def delete_transaction(transaction_id):
     headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
     try:
-        response = requests.delete(f"{API_URL}/transactions/{transaction_id}", headers=headers)
+        response = get_client().delete(f"/transactions/{transaction_id}", headers=headers)
         if response.status_code == 200:
+            invalidate_transactions_cache()
             st.success("Transaction deleted successfully.")
             return True
         elif response.status_code == 404:
@@ -156,13 +225,426 @@ def delete_transaction(transaction_id):
         st.error(f"An error occurred: {str(e)}")
         return False
 
+## expense ratio, savings rate, month-over-month changes and health tier for a month (YYYY-MM)
+def fetch_health_report(client, token, month=None):
+    params = {"month": month} if month else {}
+    response = client.get("/analytics/health", headers={"Authorization": f"Bearer {token}"}, params=params)
+    if response.status_code == 200:
+        return response.json()
+    return None
+
+def get_health_report(month=None):
+    return fetch_health_report(get_client(), st.session_state.access_token, month)
+
+## budgets a write pushed past their alert level or limit, as reported in its response
+def show_budget_alerts(alerts):
+    for alert in alerts:
+        message = (f"{alert['category']} budget for {alert['month']}: ${alert['spent']:,.2f} "
+                   f"of ${alert['limit']:,.2f} spent ({alert['percent']:.0f}%)")
+        if alert["status"] == "exceeded":
+            st.error(f"🚨 {message}")
+        else:
+            st.warning(f"⚠️ {message}")
+
+def get_budgets():
+    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+    response = get_client().get("/budgets", headers=headers)
+    if response.status_code == 200:
+        return response.json()
+    return []
+
+## setting a budget for a category that already has one replaces it
+def set_budget(category, limit, alert_percent=80):
+    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+    data = {"category": category, "limit": limit, "alert_percent": alert_percent}
+    response = get_client().post("/budgets", json=data, headers=headers)
+    if response.status_code == 200:
+        st.success("Budget saved.")
+        return True
+    detail = response.json().get("detail", "Failed to save budget. Please try again.")
+    if isinstance(detail, list):
+        detail = "; ".join(error.get("msg", "") for error in detail)
+    st.error(detail)
+    return False
+
+def delete_budget(budget_id):
+    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+    response = get_client().delete(f"/budgets/{budget_id}", headers=headers)
+    if response.status_code == 200:
+        return True
+    st.error("Failed to delete budget. Please try again.")
+    return False
+
+## spend against every budget for a month (YYYY-MM), read from the backend's running totals
+def fetch_budget_status(client, token, month=None):
+    params = {"month": month} if month else {}
+    response = client.get("/budgets/status", headers={"Authorization": f"Bearer {token}"}, params=params)
+    if response.status_code == 200:
+        return response.json()
+    return []
+
+def get_budget_status(month=None):
+    return fetch_budget_status(get_client(), st.session_state.access_token, month)
+
+## categorization rules are stored and applied by the backend on every new transaction
+def get_rules():
+    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+    response = get_client().get("/rules", headers=headers)
+    if response.status_code == 200:
+        return response.json()
+    return []
+
+def add_rule(pattern, is_regex, transaction_type, min_amount, max_amount, category, priority):
+    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+    data = {
+        "pattern": pattern,
+        "is_regex": is_regex,
+        "transaction_type": transaction_type,
+        "min_amount": min_amount,
+        "max_amount": max_amount,
+        "category": category,
+        "priority": priority
+    }
+    response = get_client().post("/rules", json=data, headers=headers)
+    if response.status_code == 200:
+        st.success("Rule added successfully.")
+        return True
+    detail = response.json().get("detail", "Failed to add rule. Please try again.")
+    if isinstance(detail, list):
+        detail = "; ".join(error.get("msg", "") for error in detail)
+    st.error(detail)
+    return False
+
+def delete_rule(rule_id):
+    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+    response = get_client().delete(f"/rules/{rule_id}", headers=headers)
+    if response.status_code == 200:
+        st.success("Rule deleted successfully.")
+        return True
+    st.error("Failed to delete rule. Please try again.")
+    return False
+
+## re-run the rules over existing transactions; returns how many were recategorized
+def apply_rules():
+    headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
+    response = get_client().post("/rules/apply", headers=headers)
+    if response.status_code == 200:
+        invalidate_transactions_cache()
+        show_budget_alerts(response.json().get("budget_alerts", []))
+        return response.json()["affected"]
+    st.error("Failed to apply rules. Please try again.")
+    return None
+
 def get_summary():
     headers = {"Authorization": f"Bearer {st.session_state.access_token}"}
-    response = requests.get(f"{API_URL}/transactions/summary", headers=headers)
+    response = get_client().get("/transactions/summary", headers=headers)
     if response.status_code == 200:
         return response.json()
     return {"total_income": 0, "total_expenses": 0, "net_balance": 0}
 
+## pre-aggregated income/expense buckets from the backend (day, week or month)
+def fetch_timeseries(client, token, granularity="month", start_date=None, end_date=None):
+    params = {"granularity": granularity}
+    if start_date:
+        params["from"] = str(start_date)
+    if end_date:
+        params["to"] = str(end_date)
+    response = client.get("/analytics/timeseries", headers={"Authorization": f"Bearer {token}"}, params=params)
+    if response.status_code == 200:
+        return response.json()
+    return []
+
+def get_timeseries(granularity="month", start_date=None, end_date=None):
+    return fetch_timeseries(get_client(), st.session_state.access_token, granularity, start_date, end_date)
+
+## first and last day of a YYYY-MM month
+def month_bounds(month):
+    period = pd.Period(month, freq='M')
+    return period.start_time.date(), period.end_time.date()
+
+## one row per period with income, expense and net columns
+def timeseries_frame(buckets):
+    frame = pd.DataFrame(buckets, columns=['period', 'income', 'expenses', 'net'])
+    return frame.rename(columns={'expenses': 'expense'}).set_index('period')
+
+## long format (date, transaction_type, amount) for the daily scatter plot
+def daily_frame(buckets):
+    rows = []
+    for bucket in buckets:
+        if bucket['income']:
+            rows.append({'date': pd.to_datetime(bucket['period']), 'transaction_type': 'income', 'amount': bucket['income']})
+        if bucket['expenses']:
+            rows.append({'date': pd.to_datetime(bucket['period']), 'transaction_type': 'expense', 'amount': bucket['expenses']})
+    return pd.DataFrame(rows, columns=['date', 'transaction_type', 'amount'])
+
+## per-category and per-category-per-day totals for a month (YYYY-MM) or a date range
+def fetch_category_breakdown(client, token, month=None, start_date=None, end_date=None, transaction_type="expense"):
+    params = {"transaction_type": transaction_type}
+    if month:
+        params["month"] = month
+    if start_date:
+        params["from"] = str(start_date)
+    if end_date:
+        params["to"] = str(end_date)
+    response = client.get("/analytics/categories", headers={"Authorization": f"Bearer {token}"}, params=params)
+    if response.status_code == 200:
+        return response.json()
+    return {"categories": [], "daily": []}
+
+def get_category_breakdown(month=None, start_date=None, end_date=None, transaction_type="expense"):
+    return fetch_category_breakdown(
+        get_client(), st.session_state.access_token, month, start_date, end_date, transaction_type
+    )
+
+## rows per page on the Transaction List page
+SEARCH_PAGE_SIZE = 100
+
+## one page of server-side search results; filters map onto /transactions/search params
+def fetch_transaction_page(client, token, filters, cursor=None, limit=SEARCH_PAGE_SIZE):
+    params = {name: str(value) if hasattr(value, 'isoformat') else value
+              for name, value in filters.items() if value not in (None, "", [])}
+    params["limit"] = limit
+    if cursor:
+        params["cursor"] = cursor
+    response = client.get("/transactions/search", headers={"Authorization": f"Bearer {token}"}, params=params)
+    if response.status_code == 200:
+        return response.json()
+    return {"items": [], "next_cursor": None, "total": 0}
+
+def get_transaction_page(filters, cursor=None, limit=SEARCH_PAGE_SIZE):
+    return fetch_transaction_page(get_client(), st.session_state.access_token, filters, cursor, limit)
+
+## DataFrame of a result page with parsed dates (and the expected columns even when empty)
+def transaction_page_frame(page):
+    frame = pd.DataFrame(page['items'], columns=['id', 'date', 'amount', 'transaction_type', 'category', 'description'])
+    frame['date'] = pd.to_datetime(frame['date'])
+    return frame
+
+## upper bound on concurrent backend calls while loading a page
+FETCH_WORKERS = 6
+
+## run {name: (function, args)} on a thread pool and wait for all of them, so a page
+## waits for its slowest call instead of the sum; workers only do HTTP, never st.*
+def fetch_parallel(calls):
+    def timed(function, args):
+        started = time.perf_counter()
+        result = function(*args)
+        return result, time.perf_counter() - started
+
+    results, timings = {}, {}
+    if not calls:
+        return results, timings
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(calls))) as executor:
+        futures = {name: executor.submit(timed, function, args) for name, (function, args) in calls.items()}
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+    return results, timings
+
+## sidebar debug panel with per-call and total load time for the current page
+def show_timings(page, timings, total):
+    with st.sidebar.expander(f"⏱️ {page} load time", expanded=True):
+        for name, seconds in timings.items():
+            st.write(f"{name}: {seconds * 1000:.0f} ms")
+        st.write(f"**total: {total * 1000:.0f} ms** (sum of calls: {sum(timings.values()) * 1000:.0f} ms)")
+
+## category totals (ascending, for horizontal bars) and the (category, date, amount) frame for the sunburst
+def category_frames(breakdown):
+    by_category = pd.Series(
+        {row['category']: row['total'] for row in breakdown['categories']}, dtype=float
+    ).sort_values(ascending=True)
+    daily = pd.DataFrame(breakdown['daily'], columns=['category', 'date', 'total'])
+    return by_category, daily.rename(columns={'total': 'amount'})
+
+## figure builders are pure functions of their (already aggregated) inputs; st.cache_data
+## keys them on a hash of those inputs, so unchanged charts are reused across reruns and
+## across months the user toggles between
+FIGURE_CACHE_ENTRIES = 64
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def monthly_overview_figure(monthly_summary):
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=monthly_summary.index,
+        y=monthly_summary['income'],
+        name='Income',
+        marker_color='lightgreen'
+    ))
+    fig.add_trace(go.Bar(
+        x=monthly_summary.index,
+        y=-monthly_summary['expense'],
+        name='Expenses',
+        marker_color='lightblue'
+    ))
+    fig.add_trace(go.Scatter(
+        x=monthly_summary.index,
+        y=monthly_summary['net'],
+        name='Net',
+        line=dict(color='blue', width=2),
+        mode='lines+markers'
+    ))
+
+    fig.update_layout(
+        title='Monthly Financial Overview',
+        barmode='relative',
+        height=400,
+        hovermode='x unified',
+        yaxis_title='Amount ($)',
+        xaxis_title='Month'
+    )
+    return fig
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def daily_transactions_figure(daily_summary, selected_month):
+    fig = px.scatter(daily_summary, 
+                    x='date', 
+                    y='amount',
+                    color='transaction_type',
+                    size='amount',
+                    title=f'Daily Transactions for {selected_month}',
+                    labels={'date': 'Date', 'amount': 'Amount ($)', 'transaction_type': 'Type'})
+    fig.update_layout(
+        height=500,  # Increased height for full-page feel
+        hovermode='x unified',
+        yaxis_title='Amount ($)',
+        xaxis_title='Date'
+    )
+    return fig
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def category_pie_figure(by_category, title):
+    fig = px.pie(
+        values=by_category.values, 
+        names=by_category.index, 
+        title=title,
+        hole=0.4
+    )
+    fig.update_layout(height=400)
+    return fig
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def expense_ratio_figure(expense_ratio):
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=expense_ratio,
+        domain={'x': [0, 1], 'y': [0, 1]},
+        delta={'reference': 50},
+        title={'text': "Expense to Income Ratio (%)"},
+        gauge={
+            'axis': {'range': [0, 100]},
+            'bar': {'color': "darkblue"},
+            'steps': [
+                {'range': [0, 50], 'color': "lightgreen"},
+                {'range': [50, 70], 'color': "yellow"},
+                {'range': [70, 100], 'color': "red"}
+            ],
+            'threshold': {
+                'line': {'color': "red", 'width': 4},
+                'thickness': 0.75,
+                'value': 70
+            }
+        }
+    ))
+    fig.update_layout(height=300)
+    return fig
+
+## headline numbers of a health report, with the change since the previous month
+def show_health_metrics(health):
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Income", f"${health['income']:,.2f}", f"{health['income_change']:+,.2f}")
+    col2.metric("Expenses", f"${health['expenses']:,.2f}", f"{health['expenses_change']:+,.2f}", delta_color="inverse")
+    col3.metric("Savings Rate", f"{health['savings_rate']:.1f}%")
+    ratio_change = health["expense_ratio_change"]
+    col4.metric("Expense Ratio", f"{health['expense_ratio']:.1f}%",
+                None if ratio_change is None else f"{ratio_change:+.1f} pts", delta_color="inverse")
+
+## one progress bar per budget, colored message once a budget warns or is exceeded
+def show_budget_status(budget_status):
+    if not budget_status:
+        st.info("No budgets set. Add one under Manage budgets to track spending per category.")
+        return
+    for budget in budget_status:
+        label = (f"**{budget['category']}**: ${budget['spent']:,.2f} of ${budget['limit']:,.2f} "
+                 f"({budget['percent']:.0f}%)")
+        st.progress(min(budget["percent"] / 100, 1.0), text=label)
+        if budget["status"] == "exceeded":
+            st.error(f"Over budget by ${-budget['remaining']:,.2f}")
+        elif budget["status"] == "warning":
+            st.warning(f"${budget['remaining']:,.2f} left this month")
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def expenses_by_category_figure(expense_by_category, selected_month):
+    fig = px.bar(
+        x=expense_by_category.values,
+        y=expense_by_category.index,
+        orientation='h',
+        title=f'Expenses by Category for {selected_month}',
+        labels={'x': 'Amount ($)', 'y': 'Category'}
+    )
+    fig.update_layout(height=400)
+    return fig
+
+@st.cache_data(max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def daily_spending_figure(daily_spending, selected_month):
+    fig = px.sunburst(
+        daily_spending,
+        path=['category', 'date'],
+        values='amount',
+        title=f'Daily Spending Pattern for {selected_month}',
+    )
+    fig.update_layout(height=400)
+    return fig
+
+## rows per page in the transaction pickers
+PICKER_PAGE_SIZE = 50
+
+## selectbox labels built with whole-column string ops instead of a per-row apply
+def delete_option_labels(frame):
+    labels = (
+        frame['description'].astype(str) + " (" + frame['category'].astype(str) + ") - ID: "
+        + (frame['id'] - 1).astype(str)
+    )
+    return labels.tolist()
+
+def update_option_labels(frame):
+    labels = (
+        frame['date'].dt.strftime('%Y-%m-%d') + " - " + frame['description'].astype(str)
+        + " (" + frame['category'].astype(str) + ") - $" + frame['amount'].abs().astype(str)
+    )
+    return labels.tolist()
+
+## case-insensitive match on description or category
+def search_transactions(frame, search):
+    if not search:
+        return frame
+    matches = (
+        frame['description'].astype(str).str.contains(search, case=False, regex=False)
+        | frame['category'].astype(str).str.contains(search, case=False, regex=False)
+    )
+    return frame[matches]
+
+## searchable, paged selectbox; labels are only built for the rows on the visible page
+def transaction_picker(label, frame, make_labels, key, page_size=PICKER_PAGE_SIZE):
+    search = st.text_input("Search by description or category", key=f"{key}_search")
+    matches = search_transactions(frame, search)
+    if matches.empty:
+        st.info("No transactions match your search")
+        return None
+
+    pages = -(-len(matches) // page_size)
+    page = 1
+    if pages > 1:
+        page_key = f"{key}_page"
+        st.session_state.setdefault(page_key, 1)  ## seeded here, so the widget takes no value= of its own
+        if st.session_state[page_key] > pages:
+            st.session_state[page_key] = 1  ## the search shrank the result set
+        page = st.number_input("Page", min_value=1, max_value=pages, step=1, key=page_key)
+    visible = matches.iloc[(page - 1) * page_size:page * page_size]
+
+    options = make_labels(visible)
+    index = st.selectbox(label, range(len(options)), format_func=lambda x: options[x], key=f"{key}_select")
+    st.caption(f"Showing {len(visible)} of {len(matches)} transactions (page {page} of {pages})")
+    return visible.iloc[index]
+
 def update_transaction_ui(transaction_id, date, amount, transaction_type, category, description):
     st.subheader("Update Transaction")
     
@@ -268,18 +750,34 @@ def main():
         st.sidebar.title("Menu")
         menu = st.sidebar.selectbox(
             "Navigation",
-            ["Dashboard", "Analysis", "Add Transaction", "Transaction List", "User Manual"]
+            ["Dashboard", "Analysis", "Add Transaction", "Transaction List", "Rules", "User Manual"]
         )
+        debug_timings = st.sidebar.checkbox("Show load times", value=False)
 
         if menu == "Dashboard":
             col1, col2 = st.columns([0.65, 0.35])
             with col1:
                 st.header("Dashboard")
             
+            ## fetch everything the dashboard needs at once; the daily chart is fetched for the
+            ## month picked on the previous run (or the current month) and refetched if that changes
+            page_started = time.perf_counter()
+            client, token = get_client(), st.session_state.access_token
+            guessed_month = getattr(st.session_state, 'dashboard_month_selector', None) or datetime.now().strftime('%Y-%m')
+            calls = {
+                "monthly timeseries": (fetch_timeseries, (client, token, "month")),
+                "daily timeseries": (fetch_timeseries, (client, token, "day", *month_bounds(guessed_month)))
+            }
+            if transactions_sync_due():
+                calls["transaction changes"] = (fetch_changes, (client, token, st.session_state.transactions_watermark))
+            with st.spinner('Loading dashboard...'):
+                results, timings = fetch_parallel(calls)
+            if "transaction changes" in calls:
+                apply_transaction_changes(results["transaction changes"])
+
             ## add month selector
-            transactions = get_transactions()
-            if transactions:
-                df = pd.DataFrame(transactions)
+            df = get_transactions_frame()
+            if not df.empty:
                 df['date'] = pd.to_datetime(df['date'])
                 df['month'] = df['date'].dt.strftime('%Y-%m')
                 available_months = sorted(df['month'].unique(), reverse=True)
@@ -330,66 +828,23 @@ def main():
 
                 ## Add Monthly Overview plot
                 st.subheader("Monthly Overview")
-                monthly_summary = df.groupby(['month', 'transaction_type'])['amount'].sum().unstack().fillna(0)
-
-                if 'income' not in monthly_summary.columns:
-                    monthly_summary['income'] = 0  ## no income yet? start with zero
-                if 'expense' not in monthly_summary.columns:
-                    monthly_summary['expense'] = 0  ## same for expenses
-
-                monthly_summary['net'] = monthly_summary['income'] - abs(monthly_summary['expense'])
-
-                fig = go.Figure()
-                fig.add_trace(go.Bar(
-                    x=monthly_summary.index,
-                    y=monthly_summary['income'],
-                    name='Income',
-                    marker_color='lightgreen'
-                ))
-                fig.add_trace(go.Bar(
-                    x=monthly_summary.index,
-                    y=-monthly_summary['expense'],
-                    name='Expenses',
-                    marker_color='lightblue'
-                ))
-                fig.add_trace(go.Scatter(
-                    x=monthly_summary.index,
-                    y=monthly_summary['net'],
-                    name='Net',
-                    line=dict(color='blue', width=2),
-                    mode='lines+markers'
-                ))
-
-                fig.update_layout(
-                    title='Monthly Financial Overview',
-                    barmode='relative',
-                    height=400,
-                    hovermode='x unified',
-                    yaxis_title='Amount ($)',
-                    xaxis_title='Month'
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                ## monthly totals are aggregated by the backend
+                monthly_summary = timeseries_frame(results["monthly timeseries"])
+
+                st.plotly_chart(monthly_overview_figure(monthly_summary), use_container_width=True)
 
                 if monthly_summary['expense'].sum() == 0:
                     st.info("No expenses recorded yet. Add some expense transactions to see the complete analysis.")
 
                 ## Daily Transactions (Full Width)
                 st.subheader("Daily Transactions")
-                daily_summary = monthly_df.groupby(['date', 'transaction_type'])['amount'].sum().reset_index()
-                fig = px.scatter(daily_summary, 
-                                x='date', 
-                                y='amount',
-                                color='transaction_type',
-                                size='amount',
-                                title=f'Daily Transactions for {selected_month}',
-                                labels={'date': 'Date', 'amount': 'Amount ($)', 'transaction_type': 'Type'})
-                fig.update_layout(
-                    height=500,  # Increased height for full-page feel
-                    hovermode='x unified',
-                    yaxis_title='Amount ($)',
-                    xaxis_title='Date'
-                )
-                st.plotly_chart(fig, use_container_width=True)
+                daily_buckets = results["daily timeseries"]
+                if selected_month != guessed_month:
+                    started = time.perf_counter()
+                    daily_buckets = get_timeseries("day", *month_bounds(selected_month))
+                    timings["daily timeseries (refetch)"] = time.perf_counter() - started
+                daily_summary = daily_frame(daily_buckets)
+                st.plotly_chart(daily_transactions_figure(daily_summary, selected_month), use_container_width=True)
 
                 ## Category Analysis - Side by Side
                 st.subheader("Category Analysis")
@@ -400,13 +855,7 @@ def main():
                     expense_df = monthly_df[monthly_df['transaction_type'] == 'expense']
                     if not expense_df.empty:
                         expense_by_category = expense_df.groupby('category')['amount'].sum().abs()
-                        fig_expense = px.pie(
-                            values=expense_by_category.values, 
-                            names=expense_by_category.index, 
-                            title=f'Expenses by Category for {selected_month}',
-                            hole=0.4
-                        )
-                        fig_expense.update_layout(height=400)
+                        fig_expense = category_pie_figure(expense_by_category, f'Expenses by Category for {selected_month}')
                         st.plotly_chart(fig_expense, use_container_width=True)
                     else:
                         st.info("No expenses recorded for this month")
@@ -416,13 +865,7 @@ def main():
                     income_df = monthly_df[monthly_df['transaction_type'] == 'income']
                     if not income_df.empty:
                         income_by_category = income_df.groupby('category')['amount'].sum()
-                        fig_income = px.pie(
-                            values=income_by_category.values, 
-                            names=income_by_category.index, 
-                            title=f'Income by Category for {selected_month}',
-                            hole=0.4
-                        )
-                        fig_income.update_layout(height=400)
+                        fig_income = category_pie_figure(income_by_category, f'Income by Category for {selected_month}')
                         st.plotly_chart(fig_income, use_container_width=True)
                     else:
                         st.info("No income recorded for this month")
@@ -440,6 +883,9 @@ def main():
             else:
                 st.info("No transactions found. Add some transactions to see your financial analysis.")
 
+            if debug_timings:
+                show_timings("Dashboard", timings, time.perf_counter() - page_started)
+
         elif menu == "Add Transaction":
             st.header("Transaction Management")
             st.markdown("""
@@ -509,62 +955,81 @@ def main():
                 st.markdown('</div>', unsafe_allow_html=True)
 
             st.subheader("Existing Transactions")
-            transactions = get_transactions()
-            if transactions:
-                df = pd.DataFrame(transactions)
+            df = get_transactions_frame()
+            if not df.empty:
                 df['date'] = pd.to_datetime(df['date'])
                 df = df.sort_values('date', ascending=False)
                 st.dataframe(df[['date', 'amount', 'transaction_type', 'category', 'description']])
 
-                transaction_options = df.apply(lambda row: f"{row['description']} ({row['category']}) - ID: {row['id']-1}", axis=1).tolist()
-                selected_transaction_index = st.selectbox("Select Transaction to Delete", range(len(transaction_options)), format_func=lambda x: transaction_options[x])
+                selected_transaction = transaction_picker(
+                    "Select Transaction to Delete", df, delete_option_labels, key="delete_picker"
+                )
 
-                if st.button("Delete Transaction"):
-                    selected_transaction_id = df.iloc[selected_transaction_index]['id']
-                    delete_transaction(selected_transaction_id)
+                if selected_transaction is not None and st.button("Delete Transaction"):
+                    delete_transaction(selected_transaction['id'])
 
         elif menu == "Transaction List":
             st.header("Transaction List")
-            transactions = get_transactions()
-            df = pd.DataFrame(transactions)
-            if not df.empty:
-                df['date'] = pd.to_datetime(df['date'])
-                df = df.sort_values('date', ascending=False)
 
-                st.subheader("Filters")
-                col1, col2, col3, col4, col5 = st.columns(5)
-                with col1:
-                    start_date = st.date_input("Start Date", df['date'].min())
-                with col2:
-                    end_date = st.date_input("End Date", df['date'].max())
-                with col3:
-                    category_filter = st.multiselect("Category", df['category'].unique())
-                with col4:
-                    min_amount = st.number_input("Min Amount", value=float(df['amount'].min()))
-                with col5:
-                    max_amount = st.number_input("Max Amount", value=float(df['amount'].max()))
-
-                filtered_df = df[(df['date'] >= pd.Timestamp(start_date)) & (df['date'] <= pd.Timestamp(end_date))]
-                if category_filter:
-                    filtered_df = filtered_df[filtered_df['category'].isin(category_filter)]
-                filtered_df = filtered_df[(filtered_df['amount'] >= min_amount) & (filtered_df['amount'] <= max_amount)]
+            ## filters are applied by the backend, which returns one page at a time
+            st.subheader("Filters")
+            col1, col2, col3, col4, col5 = st.columns(5)
+            with col1:
+                start_date = st.date_input("Start Date", value=None)
+            with col2:
+                end_date = st.date_input("End Date", value=None)
+            with col3:
+                category_filter = st.multiselect("Category", INCOME_CATEGORIES + EXPENSE_CATEGORIES)
+            with col4:
+                min_amount = st.number_input("Min Amount", value=None, min_value=0.0)
+            with col5:
+                max_amount = st.number_input("Max Amount", value=None, min_value=0.0)
+            col1, col2 = st.columns([1, 4])
+            with col1:
+                type_filter = st.selectbox("Type", ["All", "income", "expense"])
+            with col2:
+                search_text = st.text_input("Search descriptions", placeholder="e.g. amazon")
+
+            filters = {
+                "start_date": start_date,
+                "end_date": end_date,
+                "category": category_filter,
+                "transaction_type": None if type_filter == "All" else type_filter,
+                "min_amount": min_amount,
+                "max_amount": max_amount,
+                "q": search_text  ## full-text, best matches first
+            }
+            ## cursors of the pages visited so far; reset whenever the filters change
+            filters_key = repr(sorted(filters.items()))
+            if getattr(st.session_state, 'list_filters_key', None) != filters_key:
+                st.session_state.list_filters_key = filters_key
+                st.session_state.list_cursors = [None]
+            cursors = st.session_state.list_cursors
+
+            page = get_transaction_page(filters, cursors[-1])
+            filtered_df = transaction_page_frame(page)
 
+            if page['total']:
+                first_row = (len(cursors) - 1) * SEARCH_PAGE_SIZE + 1
+                st.caption(f"Showing {first_row}-{first_row + len(filtered_df) - 1} of {page['total']} transactions")
                 st.dataframe(filtered_df[['date', 'amount', 'category', 'description']])
 
-                if not filtered_df.empty:
-                    st.subheader("Update Transaction")
-                    transaction_options = filtered_df.apply(
-                        lambda row: f"{row['date'].strftime('%Y-%m-%d')} - {row['description']} ({row['category']}) - ${abs(row['amount'])}", 
-                        axis=1
-                    ).tolist()
-                    
-                    selected_transaction_index = st.selectbox(
-                        "Select Transaction to Update",
-                        range(len(transaction_options)),
-                        format_func=lambda x: transaction_options[x]
-                    )
-                    
-                    selected_transaction = filtered_df.iloc[selected_transaction_index]
+                col1, col2, _ = st.columns([1, 1, 6])
+                with col1:
+                    if st.button("Previous page", disabled=len(cursors) == 1):
+                        cursors.pop()
+                        st.rerun()
+                with col2:
+                    if st.button("Next page", disabled=page['next_cursor'] is None):
+                        cursors.append(page['next_cursor'])
+                        st.rerun()
+
+                st.subheader("Update Transaction")
+                selected_transaction = transaction_picker(
+                    "Select Transaction to Update", filtered_df, update_option_labels, key="update_picker"
+                )
+                
+                if selected_transaction is not None:
                     update_transaction_ui(
                         selected_transaction['id'],
                         selected_transaction['date'],
@@ -573,67 +1038,58 @@ def main():
                         selected_transaction['category'],
                         selected_transaction['description']
                     )
+            elif any(value not in (None, "", []) for value in filters.values()):
+                st.info("No transactions match these filters.")
             else:
                 st.info("No transactions found. Add some transactions to see them here.")
 
         elif menu == "Analysis":
             st.header("Financial Analysis")
-            transactions = get_transactions()
-            if transactions:
-                df = pd.DataFrame(transactions)
-                df['date'] = pd.to_datetime(df['date'])
-                df['month'] = df['date'].dt.strftime('%Y-%m')
-                available_months = sorted(df['month'].unique(), reverse=True)
+            ## monthly totals and category breakdowns come pre-aggregated from the backend and
+            ## are fetched together; the breakdown is for the month picked on the previous run
+            page_started = time.perf_counter()
+            client, token = get_client(), st.session_state.access_token
+            guessed_month = getattr(st.session_state, 'analysis_month_selector', None) or datetime.now().strftime('%Y-%m')
+            with st.spinner('Loading analysis...'):
+                results, timings = fetch_parallel({
+                    "monthly timeseries": (fetch_timeseries, (client, token, "month")),
+                    "category breakdown": (fetch_category_breakdown, (client, token, guessed_month)),
+                    "budget status": (fetch_budget_status, (client, token, guessed_month)),
+                    "health report": (fetch_health_report, (client, token, guessed_month))
+                })
+            monthly_summary = timeseries_frame(results["monthly timeseries"])
+            if not monthly_summary.empty:
+                available_months = sorted(monthly_summary.index, reverse=True)
                 current_month = datetime.now().strftime('%Y-%m')
                 
                 selected_month = st.selectbox(
                     "Select Month",
                     options=available_months,
-                    index=available_months.index(current_month) if current_month in available_months else 0
+                    index=available_months.index(current_month) if current_month in available_months else 0,
+                    key="analysis_month_selector"
                 )
                 
-                ## filter transactions for selected month
-                monthly_df = df[df['month'] == selected_month]
-                
-                ## calculate monthly totals
-                monthly_income = abs(monthly_df[monthly_df['transaction_type'] == 'income']['amount'].sum())
-                monthly_expenses = abs(monthly_df[monthly_df['transaction_type'] == 'expense']['amount'].sum())
+                ## ratios, month-over-month changes and the health tier come from the backend
+                health = results["health report"]
+                if selected_month != guessed_month:
+                    started = time.perf_counter()
+                    health = get_health_report(selected_month)
+                    timings["health report (refetch)"] = time.perf_counter() - started
                 
-                if monthly_income > 0:
-                    expense_ratio = (monthly_expenses / monthly_income) * 100
+                if health and health["tier"] != "no_income":
+                    expense_ratio = health["expense_ratio"]
+                    show_health_metrics(health)
                     
                     col1, col2, col3 = st.columns([2, 1, 2])
                     
                     with col1:
                         st.subheader(f"Expense Ratio for {selected_month}")
                         ## expense ratio gauge chart
-                        fig = go.Figure(go.Indicator(
-                            mode="gauge+number+delta",
-                            value=expense_ratio,
-                            domain={'x': [0, 1], 'y': [0, 1]},
-                            delta={'reference': 50},
-                            title={'text': "Expense to Income Ratio (%)"},
-                            gauge={
-                                'axis': {'range': [0, 100]},
-                                'bar': {'color': "darkblue"},
-                                'steps': [
-                                    {'range': [0, 50], 'color': "lightgreen"},
-                                    {'range': [50, 70], 'color': "yellow"},
-                                    {'range': [70, 100], 'color': "red"}
-                                ],
-                                'threshold': {
-                                    'line': {'color': "red", 'width': 4},
-                                    'thickness': 0.75,
-                                    'value': 70
-                                }
-                            }
-                        ))
-                        fig.update_layout(height=300)
-                        st.plotly_chart(fig, use_container_width=True)
+                        st.plotly_chart(expense_ratio_figure(expense_ratio), use_container_width=True)
 
                     with col3:
                         st.subheader(f"Financial Status for {selected_month}")
-                        if expense_ratio <= 50:
+                        if health["tier"] == "excellent":
                             st.success("🌟 Excellent Financial Health!")
                             st.markdown("""
                                 - You're saving more than 50% of your income
@@ -641,7 +1097,7 @@ def main():
                                 - Consider investing your surplus
                                 - Keep building your emergency fund
                             """)
-                        elif expense_ratio <= 70:
+                        elif health["tier"] == "caution":
                             st.warning("⚠️ Caution Zone")
                             st.markdown("""
                                 - Expenses are getting high
@@ -661,44 +1117,115 @@ def main():
 
                     ## Spending Analysis
                     st.subheader(f"Spending Analysis for {selected_month}")
+                    breakdown = results["category breakdown"]
+                    if selected_month != guessed_month:
+                        started = time.perf_counter()
+                        breakdown = get_category_breakdown(month=selected_month)
+                        timings["category breakdown (refetch)"] = time.perf_counter() - started
+                    expense_by_category, daily_spending = category_frames(breakdown)
                     col1, col2 = st.columns(2)
                     
                     with col1:
                         ## category-wise expenses bar chart
-                        expense_df = monthly_df[monthly_df['transaction_type'] == 'expense']
-                        if not expense_df.empty:
-                            expense_by_category = expense_df.groupby('category')['amount'].sum().abs().sort_values(ascending=True)
-                            fig = px.bar(
-                                x=expense_by_category.values,
-                                y=expense_by_category.index,
-                                orientation='h',
-                                title=f'Expenses by Category for {selected_month}',
-                                labels={'x': 'Amount ($)', 'y': 'Category'}
-                            )
-                            fig.update_layout(height=400)
-                            st.plotly_chart(fig, use_container_width=True)
+                        if not expense_by_category.empty:
+                            st.plotly_chart(expenses_by_category_figure(expense_by_category, selected_month), use_container_width=True)
                         else:
                             st.info("No expenses recorded for this month")
                     
                     with col2:
                         ## monthly spending pattern
-                        if not monthly_df[monthly_df['transaction_type'] == 'expense'].empty:
-                            daily_spending = monthly_df[monthly_df['transaction_type'] == 'expense'].groupby(['date', 'category'])['amount'].sum().abs()
-                            fig = px.sunburst(
-                                daily_spending.reset_index(),
-                                path=['category', 'date'],
-                                values='amount',
-                                title=f'Daily Spending Pattern for {selected_month}',
-                            )
-                            fig.update_layout(height=400)
-                            st.plotly_chart(fig, use_container_width=True)
+                        if not daily_spending.empty:
+                            st.plotly_chart(daily_spending_figure(daily_spending, selected_month), use_container_width=True)
                         else:
                             st.info("No spending data available for this month")
                 else:
                     st.info(f"Please add some income transactions for {selected_month} to see financial health analysis.")
+
+                ## Budgets
+                st.subheader(f"Budgets for {selected_month}")
+                budget_status = results["budget status"]
+                if selected_month != guessed_month:
+                    started = time.perf_counter()
+                    budget_status = get_budget_status(selected_month)
+                    timings["budget status (refetch)"] = time.perf_counter() - started
+                show_budget_status(budget_status)
             else:
                 st.info("No transactions found. Add some transactions to see your financial analysis.")
 
+            with st.expander("Manage budgets"):
+                with st.form("set_budget_form"):
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        budget_category = st.selectbox("Category", EXPENSE_CATEGORIES)
+                    with col2:
+                        budget_limit = st.number_input("Monthly limit", min_value=0.01, value=500.0, format="%.2f")
+                    with col3:
+                        alert_percent = st.number_input("Warn at (% of limit)", min_value=1, max_value=100, value=80, step=5)
+                    if st.form_submit_button("Save Budget"):
+                        if set_budget(budget_category, budget_limit, int(alert_percent)):
+                            st.rerun()
+                for budget in get_budgets():
+                    col1, col2 = st.columns([0.85, 0.15])
+                    with col1:
+                        st.markdown(f"**{budget['category']}**: ${budget['limit']:,.2f} a month, "
+                                    f"warn at {budget['alert_percent']}%")
+                    with col2:
+                        if st.button("Delete", key=f"delete_budget_{budget['id']}"):
+                            if delete_budget(budget["id"]):
+                                st.rerun()
+
+            if debug_timings:
+                show_timings("Analysis", timings, time.perf_counter() - page_started)
+
+        elif menu == "Rules":
+            st.header("Categorization Rules")
+            st.write("New transactions whose description matches a rule are filed under the rule's category. "
+                     "Rules with a higher priority are checked first.")
+
+            with st.form("add_rule_form"):
+                col1, col2 = st.columns(2)
+                with col1:
+                    pattern = st.text_input("Description contains")
+                    is_regex = st.checkbox("Treat as regular expression")
+                    rule_type = st.selectbox("Type", ["Any", "income", "expense"])
+                    category = st.selectbox("Category", INCOME_CATEGORIES + EXPENSE_CATEGORIES)
+                with col2:
+                    min_amount = st.number_input("Minimum amount", min_value=0.0, value=None, format="%.2f")
+                    max_amount = st.number_input("Maximum amount", min_value=0.0, value=None, format="%.2f")
+                    priority = st.number_input("Priority", value=0, step=1)
+                if st.form_submit_button("Add Rule"):
+                    if add_rule(pattern, is_regex, None if rule_type == "Any" else rule_type,
+                                min_amount, max_amount, category, int(priority)):
+                        st.rerun()
+
+            rules = get_rules()
+            if rules:
+                for rule in rules:
+                    col1, col2 = st.columns([0.85, 0.15])
+                    with col1:
+                        conditions = []
+                        if rule["pattern"]:
+                            conditions.append(f"{'matches' if rule['is_regex'] else 'contains'} `{rule['pattern']}`")
+                        if rule["transaction_type"]:
+                            conditions.append(f"type is {rule['transaction_type']}")
+                        if rule["min_amount"] is not None:
+                            conditions.append(f"amount ≥ ${rule['min_amount']:,.2f}")
+                        if rule["max_amount"] is not None:
+                            conditions.append(f"amount ≤ ${rule['max_amount']:,.2f}")
+                        st.markdown(f"**{rule['category']}** (priority {rule['priority']}): {', '.join(conditions)}")
+                    with col2:
+                        if st.button("Delete", key=f"delete_rule_{rule['id']}"):
+                            if delete_rule(rule["id"]):
+                                st.rerun()
+
+                if st.button("Apply rules to existing transactions"):
+                    with st.spinner("Applying rules..."):
+                        affected = apply_rules()
+                    if affected is not None:
+                        st.success(f"Recategorized {affected} transaction(s).")
+            else:
+                st.info("No rules yet. Add one above to categorize transactions automatically.")
+
         elif menu == "User Manual":
             st.header("📚 User Manual")
             
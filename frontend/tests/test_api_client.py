@@ -0,0 +1,40 @@
+import pytest
+import logging
+import streamlit as st
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from api_client import ApiClient, DEFAULT_TIMEOUT
+from app import get_client
+
+@pytest.fixture(autouse=True)
+def setup_test():
+    import app
+    app.API_URL = "http://localhost:8000"
+
+def test_client_is_reused_per_session():
+    client = get_client()
+    assert get_client() is client
+    assert client.base_url == "http://localhost:8000"
+
+    import app
+    app.API_URL = "http://localhost:9000/"
+    assert get_client() is not client
+    assert get_client().base_url == "http://localhost:9000"
+
+def test_request_uses_pool_timeout_and_logs_latency(requests_mock, caplog):
+    requests_mock.get("http://localhost:8000/transactions/summary", json={"total_income": 0})
+    client = ApiClient("http://localhost:8000")
+
+    with caplog.at_level(logging.INFO, logger="api_client"):
+        response = client.get("/transactions/summary")
+
+    assert response.json() == {"total_income": 0}
+    assert requests_mock.last_request.timeout == DEFAULT_TIMEOUT
+    assert "gzip" in requests_mock.last_request.headers["Accept-Encoding"]
+    assert "GET /transactions/summary -> 200" in caplog.text
+
+def test_only_reads_are_retried():
+    adapter = ApiClient("http://localhost:8000").session.get_adapter("http://localhost:8000")
+    assert adapter.max_retries.is_retry("GET", 503)
+    assert not adapter.max_retries.is_retry("POST", 503)
@@ -5,7 +5,14 @@ import streamlit as st
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app import get_transactions, add_transaction, get_summary, update_transaction, delete_transaction
+from app import get_transactions, add_transaction, get_summary, update_transaction, delete_transaction, get_timeseries, get_category_breakdown, get_transactions_frame
+from app import fetch_parallel, fetch_timeseries, fetch_changes, get_client
+from app import delete_option_labels, update_option_labels, search_transactions, transaction_picker
+from app import get_transaction_page, transaction_page_frame
+from app import add_rule, apply_rules
+from app import set_budget, get_budget_status, get_health_report
+from datetime import date
+import time
 
 @pytest.fixture(autouse=True)
 def setup_test():
@@ -15,25 +22,80 @@ def setup_test():
     app.API_URL = "http://localhost:8000"  # Override API URL for tests
 
 def test_get_transactions_success(requests_mock):
-    mock_transactions = [
-        {
-            "id": 1,
-            "date": "2024-03-20",
-            "amount": 1000.0,
-            "transaction_type": "income",
-            "category": "Salary",
-            "description": "Monthly salary"
-        }
-    ]
+    mock_changes = {
+        "changed": [
+            {
+                "id": 1,
+                "date": "2024-03-20",
+                "amount": 1000.0,
+                "transaction_type": "income",
+                "category": "Salary",
+                "description": "Monthly salary"
+            }
+        ],
+        "deleted": [],
+        "watermark": 1
+    }
     requests_mock.get(
-        "http://localhost:8000/transactions/",
-        json=mock_transactions
+        "http://localhost:8000/transactions/changes",
+        json=mock_changes
     )
     
     transactions = get_transactions()
     assert len(transactions) == 1
     assert transactions[0]["amount"] == 1000.0
 
+def test_get_transactions_delta_sync(requests_mock):
+    row = {"id": 1, "date": "2024-03-20", "amount": 50.0, "transaction_type": "expense", "category": "Food", "description": "Lunch"}
+    changes = requests_mock.get(
+        "http://localhost:8000/transactions/changes",
+        [
+            {"json": {"changed": [row, dict(row, id=2)], "deleted": [], "watermark": 0}},
+            {"json": {"changed": [dict(row, id=3, date="2024-03-21")], "deleted": [1], "watermark": 4}}
+        ]
+    )
+    requests_mock.post("http://localhost:8000/transactions/", json=row)
+
+    assert [t["id"] for t in get_transactions()] == [2, 1]
+    ## within the sync interval reruns are served from the cache
+    assert [t["id"] for t in get_transactions()] == [2, 1]
+    assert changes.call_count == 1
+
+    ## a write invalidates the cache; the next read asks only for changes since the watermark
+    add_transaction(pd.Timestamp("2024-03-21"), 50.0, "expense", "Food", "Dinner")
+    assert [t["id"] for t in get_transactions()] == [3, 2]
+    assert changes.call_count == 2
+    assert changes.last_request.qs == {"since": ["0"]}  ## a watermark of 0 is still a watermark
+
+    frame = get_transactions_frame()
+    assert list(frame["id"]) == [3, 2]
+
+def test_get_timeseries_success(requests_mock):
+    mock_buckets = [
+        {"period": "2024-03-01", "income": 1000.0, "expenses": 50.0, "net": 950.0}
+    ]
+    requests_mock.get(
+        "http://localhost:8000/analytics/timeseries",
+        json=mock_buckets
+    )
+
+    buckets = get_timeseries("day", "2024-03-01", "2024-03-31")
+    assert buckets == mock_buckets
+    assert requests_mock.last_request.qs == {"granularity": ["day"], "from": ["2024-03-01"], "to": ["2024-03-31"]}
+
+def test_get_category_breakdown_success(requests_mock):
+    mock_breakdown = {
+        "categories": [{"category": "Food", "total": 50.0, "count": 2}],
+        "daily": [{"category": "Food", "date": "2024-03-02", "total": 50.0}]
+    }
+    requests_mock.get(
+        "http://localhost:8000/analytics/categories",
+        json=mock_breakdown
+    )
+
+    assert get_category_breakdown(month="2024-03") == mock_breakdown
+    assert requests_mock.last_request.qs == {"transaction_type": ["expense"], "month": ["2024-03"]}
+
 def test_add_transaction_success(requests_mock):
     # Mock successful transaction addition
     requests_mock.post(
@@ -121,6 +183,48 @@ def test_delete_transaction_not_found(requests_mock):
     result = delete_transaction(999)
     assert result is False
 
+def test_add_and_apply_rules(requests_mock):
+    rules_mock = requests_mock.post("http://localhost:8000/rules", json={"id": 1})
+    alert = {"category": "Transportation", "month": "2024-03", "limit": 100.0, "spent": 120.0,
+             "remaining": -20.0, "percent": 120.0, "status": "exceeded"}
+    requests_mock.post("http://localhost:8000/rules/apply", json={"affected": 3, "budget_alerts": [alert]})
+
+    assert add_rule("uber", False, "expense", None, 50.0, "Transportation", 1)
+    assert rules_mock.last_request.json() == {
+        "pattern": "uber", "is_regex": False, "transaction_type": "expense",
+        "min_amount": None, "max_amount": 50.0, "category": "Transportation", "priority": 1
+    }
+    st.session_state.transactions_synced_at = time.monotonic()
+    assert apply_rules() == 3
+    assert st.session_state.transactions_synced_at is None
+    assert "Transportation budget for 2024-03" in st.error.call_args.args[0]
+
+def test_budgets_and_write_alerts(requests_mock):
+    budget_mock = requests_mock.post("http://localhost:8000/budgets", json={"id": 1})
+    status_mock = requests_mock.get("http://localhost:8000/budgets/status", json=[{"category": "Food", "status": "ok"}])
+    alert = {"category": "Food", "month": "2024-03", "limit": 200.0, "spent": 250.0,
+             "remaining": -50.0, "percent": 125.0, "status": "exceeded"}
+    requests_mock.post("http://localhost:8000/transactions/", json={"id": 1, "budget_alerts": [alert]})
+
+    assert set_budget("Food", 200.0, 75)
+    assert budget_mock.last_request.json() == {"category": "Food", "limit": 200.0, "alert_percent": 75}
+    assert get_budget_status("2024-03") == [{"category": "Food", "status": "ok"}]
+    assert status_mock.last_request.qs == {"month": ["2024-03"]}
+
+    with patch("streamlit.error") as error:
+        assert add_transaction(date(2024, 3, 5), 150.0, "expense", "Food", "Groceries")
+    error.assert_called_once()
+    assert "Food budget for 2024-03" in error.call_args[0][0]
+
+def test_get_health_report(requests_mock):
+    report = {"month": "2024-03", "expense_ratio": 45.0, "tier": "excellent"}
+    health_mock = requests_mock.get("http://localhost:8000/analytics/health", json=report)
+    assert get_health_report("2024-03") == report
+    assert health_mock.last_request.qs == {"month": ["2024-03"]}
+
+    requests_mock.get("http://localhost:8000/analytics/health", status_code=400, json={"detail": "Invalid month"})
+    assert get_health_report("March") is None
+
 def test_update_transaction_unauthorized(requests_mock):
     requests_mock.put(
         "http://localhost:8000/transactions/1",
@@ -136,4 +240,94 @@ def test_update_transaction_unauthorized(requests_mock):
         "Food",
         "Updated groceries"
     )
-    assert result is False
\ No newline at end of file
+    assert result is False
+
+def test_fetch_parallel_waits_for_slowest_call(requests_mock):
+    requests_mock.get("http://localhost:8000/analytics/timeseries", json=[])
+    requests_mock.get("http://localhost:8000/transactions/changes", json={"changed": [], "deleted": [], "watermark": 0})
+    client = get_client()
+
+    def slow(value):
+        time.sleep(0.2)
+        return value
+
+    started = time.perf_counter()
+    results, timings = fetch_parallel({
+        "a": (slow, ("first",)),
+        "b": (slow, ("second",)),
+        "c": (slow, ("third",)),
+        "monthly": (fetch_timeseries, (client, "test_token", "month")),
+        "changes": (fetch_changes, (client, "test_token")),
+    })
+    elapsed = time.perf_counter() - started
+
+    assert results["a"] == "first" and results["c"] == "third"
+    assert results["monthly"] == []
+    assert results["changes"]["changed"] == []
+    assert set(timings) == {"a", "b", "c", "monthly", "changes"}
+    assert elapsed < 0.5  ## ~max(call), not the 0.6s sum
+
+def test_option_labels_match_row_format():
+    df = pd.DataFrame({
+        "id": [3, 7],
+        "date": pd.to_datetime(["2024-03-20", "2024-03-21"]),
+        "amount": [1000.0, -12.5],
+        "category": ["Salary", "Food"],
+        "description": ["Monthly salary", "Lunch"]
+    })
+    assert delete_option_labels(df) == ["Monthly salary (Salary) - ID: 2", "Lunch (Food) - ID: 6"]
+    assert update_option_labels(df) == [
+        "2024-03-20 - Monthly salary (Salary) - $1000.0",
+        "2024-03-21 - Lunch (Food) - $12.5"
+    ]
+
+    assert list(search_transactions(df, "food")["id"]) == [7]
+    assert list(search_transactions(df, "SALARY")["id"]) == [3]
+    assert len(search_transactions(df, "")) == 2
+
+def test_transaction_picker_pages_through_session_state():
+    df = pd.DataFrame({"id": range(5), "category": ["Food"] * 5, "description": [f"Row {i}" for i in range(5)]})
+    labels = lambda frame: list(frame["description"])
+    with patch("streamlit.text_input", return_value=""), \
+         patch("streamlit.number_input", side_effect=lambda *args, key, **kwargs: st.session_state[key]) as number_input, \
+         patch("streamlit.selectbox", return_value=0), patch("streamlit.caption"):
+        ## the page is seeded in session state, never passed to the widget as value=
+        assert transaction_picker("Pick", df, labels, "pick", page_size=2)["description"] == "Row 0"
+        assert st.session_state["pick_page"] == 1
+        assert "value" not in number_input.call_args.kwargs
+
+        st.session_state["pick_page"] = 3
+        assert transaction_picker("Pick", df, labels, "pick", page_size=2)["description"] == "Row 4"
+        ## a search that leaves fewer pages sends the picker back to the first one
+        assert transaction_picker("Pick", df, labels, "pick", page_size=3)["description"] == "Row 0"
+        assert st.session_state["pick_page"] == 1
+
+def test_get_transaction_page_maps_filters(requests_mock):
+    page = {
+        "items": [{"id": 4, "date": "2024-03-21", "amount": 12.5, "transaction_type": "expense", "category": "Food", "description": "Lunch"}],
+        "next_cursor": "next",
+        "total": 101
+    }
+    search = requests_mock.get("http://localhost:8000/transactions/search", json=page)
+
+    result = get_transaction_page({
+        "start_date": date(2024, 3, 1),
+        "end_date": None,
+        "category": ["Food", "Housing"],
+        "transaction_type": None,
+        "min_amount": 10.0,
+        "max_amount": None,
+        "q": ""
+    }, cursor="prev")
+    assert result == page
+    assert search.last_request.qs == {
+        "start_date": ["2024-03-01"],
+        "category": ["food", "housing"],  ## requests_mock lower-cases query values
+        "min_amount": ["10.0"],
+        "limit": ["100"],
+        "cursor": ["prev"]
+    }
+
+    frame = transaction_page_frame(result)
+    assert frame['date'].iloc[0] == pd.Timestamp("2024-03-21")
+    assert transaction_page_frame({"items": [], "next_cursor": None, "total": 0}).empty
@@ -6,7 +6,9 @@ from unittest.mock import patch, MagicMock
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from app import main
+from app import main, timeseries_frame, daily_frame, category_frames
+from app import category_pie_figure, expenses_by_category_figure, monthly_overview_figure
+import plotly.express as px
 
 @pytest.fixture
 def sample_transactions():
@@ -39,4 +41,70 @@ def test_monthly_overview_chart(mock_plotly_chart, sample_transactions):
     
     monthly_summary = monthly_df.groupby(['month', 'transaction_type'])['amount'].sum().unstack().fillna(0)
     assert monthly_summary['income'].iloc[0] == 1000
-    assert monthly_summary['expense'].iloc[0] == -80
\ No newline at end of file
+    assert monthly_summary['expense'].iloc[0] == -80
+
+def test_timeseries_frames():
+    buckets = [
+        {"period": "2024-03-01", "income": 1000.0, "expenses": 0, "net": 1000.0},
+        {"period": "2024-03-02", "income": 0, "expenses": 50.0, "net": -50.0}
+    ]
+    monthly_summary = timeseries_frame(buckets)
+    assert list(monthly_summary.index) == ["2024-03-01", "2024-03-02"]
+    assert monthly_summary['expense'].sum() == 50.0
+    assert monthly_summary['net'].iloc[1] == -50.0
+
+    daily_summary = daily_frame(buckets)
+    assert list(daily_summary['transaction_type']) == ['income', 'expense']
+    assert list(daily_summary['amount']) == [1000.0, 50.0]
+    assert timeseries_frame([]).empty
+
+def test_category_frames():
+    expense_by_category, daily_spending = category_frames({
+        "categories": [
+            {"category": "Transport", "total": 30.0, "count": 1},
+            {"category": "Food", "total": 50.0, "count": 2}
+        ],
+        "daily": [
+            {"category": "Food", "date": "2024-03-02", "total": 50.0},
+            {"category": "Transport", "date": "2024-03-03", "total": 30.0}
+        ]
+    })
+    assert list(expense_by_category.index) == ['Transport', 'Food']
+    assert expense_by_category['Food'] == 50.0
+    assert list(daily_spending.columns) == ['category', 'date', 'amount']
+
+    expense_by_category, daily_spending = category_frames({"categories": [], "daily": []})
+    assert expense_by_category.empty and daily_spending.empty
+
+def test_figures_are_cached_on_their_inputs():
+    category_pie_figure.clear()
+    by_category = pd.Series({'Food': 50.0, 'Transport': 30.0})
+    with patch('app.px.pie', wraps=px.pie) as pie:
+        first = category_pie_figure(by_category, 'Expenses by Category for 2024-03')
+        ## an equal but distinct series (as rebuilt on every rerun) hits the cache
+        second = category_pie_figure(by_category.copy(), 'Expenses by Category for 2024-03')
+        assert pie.call_count == 1
+        category_pie_figure(pd.Series({'Food': 75.0}), 'Expenses by Category for 2024-04')
+        assert pie.call_count == 2
+    assert second.layout.title.text == first.layout.title.text
+    assert list(second.data[0].labels) == ['Food', 'Transport']
+
+def test_expenses_by_category_figure_is_cached():
+    expenses_by_category_figure.clear()
+    by_category = pd.Series({'Food': 50.0, 'Transport': 30.0})
+    with patch('app.px.bar', wraps=px.bar) as bar:
+        first = expenses_by_category_figure(by_category, '2024-03')
+        second = expenses_by_category_figure(by_category.copy(), '2024-03')
+        assert bar.call_count == 1
+        expenses_by_category_figure(by_category, '2024-04')
+        assert bar.call_count == 2
+    assert second.layout.title.text == first.layout.title.text == 'Expenses by Category for 2024-03'
+
+def test_monthly_overview_figure(sample_transactions):
+    monthly_summary = timeseries_frame([
+        {"period": "2024-03", "income": 1000.0, "expenses": 80.0, "net": 920.0}
+    ])
+    fig = monthly_overview_figure(monthly_summary)
+    assert isinstance(fig, go.Figure)
+    assert [trace.name for trace in fig.data] == ['Income', 'Expenses', 'Net']
+    assert fig.layout.barmode == 'relative'